@@ -104,6 +104,7 @@ def launch(json_uri, splash_img=None, runner=None, interactive=False):
         gui_app.set_splash_message(SPLASH_MSG_GUI())
 
     gui_app.add_window(ui._window)
+    ui._window.preload_modules()
 
     LOGGER.info(_('Starting application'))
     gui_app.execute(interactive=interactive)
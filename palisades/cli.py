@@ -0,0 +1,189 @@
+"""Run palisades forms from the command line, without a display.
+
+Each parameter file (as saved by the form's "Save parameters" action) is
+loaded into a form built from the configuration, validated, and run.  The
+graphical interface is never imported, so this works on machines without Qt
+or a display.
+
+For usage instructions:
+    palisades --help
+    palisades run --help
+"""
+import argparse
+import logging
+import sys
+
+import palisades
+from palisades import elements
+from palisades import execution
+from palisades.i18n import translation
+
+LOGGER = logging.getLogger('palisades.cli')
+
+
+def build_form(config_uri, lang_code='en'):
+    """Build a Form from a palisades JSON configuration the way Application
+    does, but without loading the lastrun state.
+
+        config_uri - a URI to a palisades JSON configuration file.
+        lang_code='en' - the language to render the configuration in.
+
+    Returns an elements.Form."""
+    palisades.i18n.language.set(lang_code)
+    allowed_langs, configuration = translation.translate_json(config_uri,
+                                                              lang_code)
+    form = elements.Form(configuration, ignore_prev_runs=True)
+    form.set_langs(allowed_langs)
+    return form
+
+
+def queue_run(queue, config_uri, params_uri, lang_code='en',
+              workspace_can_exist=False):
+    """Load a parameter file into a new form, check it and add the run to
+    queue.
+
+        queue - an execution.RunQueue.
+        config_uri - a URI to a palisades JSON configuration file.
+        params_uri - a URI to a parameter file saved from that form.
+        lang_code='en' - the language to render the configuration in.
+        workspace_can_exist=False - a boolean.  If False, runs whose
+            workspace already contains files are not queued.
+
+    Raises elements.InvalidData or elements.WorkspaceExists if the run can't
+    be submitted.
+
+    Returns the int id of the queued job."""
+    form = build_form(config_uri, lang_code)
+    form.load_state(params_uri)
+    form.validate_inputs()
+    snapshot = form.check_submission(workspace_can_exist)
+
+    target_script, function_name = form.target()
+    return queue.add(target_script, snapshot.arguments(), function_name)
+
+
+def run(config_uri, params_uris, workers=1, lang_code='en',
+        workspace_can_exist=False, runner_class=None):
+    """Run the model of a palisades configuration once for each parameter
+    file, at most workers runs at a time.  The outcome of each run is printed
+    to stdout.
+
+        config_uri - a URI to a palisades JSON configuration file.
+        params_uris - a list of URIs to parameter files.
+        workers=1 - the number of runs to execute at once.
+        lang_code='en' - the language to render the configuration in.
+        workspace_can_exist=False - a boolean.  If False, runs whose
+            workspace already contains files are skipped.
+        runner_class=None - the runner class to run each model with.  If
+            None, each model runs in its own process.
+
+    Returns True if every run finished successfully, False otherwise."""
+    config_uri = palisades.locate_config(config_uri)
+    queue = execution.RunQueue(max_workers=workers, runner_class=runner_class)
+
+    job_params = {}
+    all_succeeded = True
+    for params_uri in params_uris:
+        try:
+            job_id = queue_run(queue, config_uri, params_uri, lang_code,
+                               workspace_can_exist)
+        except elements.WorkspaceExists as workspace:
+            print '%s: skipped, workspace %s contains files' % (params_uri,
+                                                                workspace)
+            all_succeeded = False
+        except elements.InvalidData as error:
+            print '%s: skipped, inputs have errors:' % params_uri
+            for args_id, value in error.data:
+                print '    %s: %r' % (args_id, value)
+            all_succeeded = False
+        except (IOError, ValueError) as error:
+            print '%s: skipped, %s' % (params_uri, error)
+            all_succeeded = False
+        except Exception as error:
+            # We deliberately want to catch all possible exceptions, so that
+            # one bad parameter file doesn't stop the others from running.
+            LOGGER.debug('Could not queue %s', params_uri, exc_info=True)
+            print '%s: skipped, %s: %s' % (params_uri,
+                                           error.__class__.__name__, error)
+            all_succeeded = False
+        else:
+            job_params[job_id] = params_uri
+
+    queue.start()
+    queue.wait()
+
+    for job in queue.jobs():
+        message = '%s: %s' % (job_params[job['id']], job['status'])
+        if job['error'] is not None:
+            message += ' (%s)' % job['error']
+        if job['log_file'] is not None:
+            message += ', log at %s' % job['log_file']
+        print message
+        if job['status'] != 'finished':
+            all_succeeded = False
+
+    return all_succeeded
+
+
+def main(user_args=None):
+    """Parse the command line and run the requested command.
+
+        user_args=None - a list of command-line arguments.  If None, the
+            arguments of this process are used.
+
+    Returns the process's exit code."""
+    parser = argparse.ArgumentParser(description="""Run palisades forms
+            without a graphical interface.""")
+    subparsers = parser.add_subparsers(dest='command')
+
+    run_parser = subparsers.add_parser('run', help="""Run a model once for
+            each of a set of saved parameter files.""")
+    run_parser.add_argument('config', help="""The palisades JSON
+            configuration of the form.""")
+    run_parser.add_argument('--params', nargs='+', required=True,
+        dest='params', help="""Parameter files saved from the form.  The
+        model is run once for each file.""")
+    run_parser.add_argument('-w', '--workers', type=int, default=1,
+        dest='workers', help="""Number of runs to execute at once.
+        (default=1)""")
+    run_parser.add_argument('--lang', default=None, dest='lang',
+        help="""The language to render the form in.  Defaults to the
+        distribution's language.""")
+    run_parser.add_argument('--overwrite', action='store_true',
+        default=False, dest='overwrite', help="""Run even if a workspace
+        already contains files.""")
+    run_parser.add_argument('--threads', action='store_true', default=False,
+        dest='threads', help="""Run each model in a thread of this process
+        instead of in its own process.""")
+    run_parser.add_argument('-v', '--verbose', action='store_true',
+        default=False, dest='verbose', help="""Print the models' log
+        messages.""")
+
+    args = parser.parse_args(user_args)
+
+    # Runs set the root logger's level to NOTSET, so the level is set on the
+    # handler instead.
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(execution.LogManager.LOG_FMT,
+                                           execution.LogManager.DATE_FMT))
+    handler.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logging.getLogger().addHandler(handler)
+    try:
+        lang_code = args.lang
+        if lang_code is None:
+            lang_code = palisades.locate_dist_config()['lang']
+
+        if args.threads:
+            runner_class = execution.PythonRunner
+        else:
+            runner_class = None
+
+        if run(args.config, args.params, args.workers, lang_code,
+               args.overwrite, runner_class):
+            return 0
+        return 1
+    finally:
+        logging.getLogger().removeHandler(handler)
+
+if __name__ == '__main__':
+    sys.exit(main())
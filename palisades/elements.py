@@ -1,10 +1,12 @@
 import os
+import csv
 import logging
 from types import *
 import re
 import itertools
 import glob
 import threading
+import contextlib
 
 from palisades import fileio
 from palisades import utils
@@ -12,7 +14,6 @@ from palisades.utils import Communicator
 from palisades import validation
 from palisades import execution
 from palisades.i18n import translation
-import palisades.gui
 import palisades.i18n
 
 LOGGER = logging.getLogger('palisades.elements')
@@ -72,9 +73,9 @@ class Application(object):
         palisades.i18n.language.set(lang_code)
         allowed_langs, configuration = translation.translate_json(config_uri, lang_code)
         self.config_langs = allowed_langs
-        self._window = Form(configuration, ignore_prev_runs=ignore_prev_runs)
+        self._window = Form(configuration, ignore_prev_runs=ignore_prev_runs,
+                            initial_signals=True)
         self._window.set_langs(allowed_langs)
-        self._window.emit_signals()
 
 class Element(object):
     """Element contains the core logic and interactivity required by all
@@ -96,6 +97,13 @@ class Element(object):
         self._parent_ui - a reference to the parent UI.
         self._default_config - a dictionary containing default configuration
             options.
+
+    Thread safety:
+        Element state is held in attributes that are replaced rather than
+        mutated in place, so getters such as value(), is_enabled() and
+        label() read without taking self.lock.  self.lock serializes changes
+        to an element's state; signals are emitted and validation is started
+        outside of it wherever possible.
     """
     defaults = {
         "enabled": True,
@@ -104,6 +112,7 @@ class Element(object):
     def __init__(self, configuration, parent=None):
         object.__init__(self)
         self._visible = True
+        self._signals_held = 0
         self.lock = threading.RLock()
 
         self._parent_ui = parent
@@ -145,6 +154,31 @@ class Element(object):
             self.visibility_changed.emit(self.is_visible())
             self.satisfaction_changed.emit(self.is_satisfied())
 
+    def hold_signals(self):
+        """Defer emission of all of this element's signals until
+        release_signals() is called.  While held, emits are coalesced so that
+        only the most recent emit of each signal is sent on release, except
+        for signals created with coalesce=False, which send every emit.
+
+        Returns nothing."""
+        with self.lock:
+            self._signals_held += 1
+            for signal_name in self.signals:
+                getattr(self, signal_name).hold()
+
+    def release_signals(self):
+        """Release a hold placed by hold_signals() and flush any deferred
+        signals.
+
+        Returns a list of the string names of the signals that were emitted."""
+        with self.lock:
+            self._signals_held = max(0, self._signals_held - 1)
+            flushed_signals = []
+            for signal_name in self.signals:
+                if getattr(self, signal_name).release():
+                    flushed_signals.append(signal_name)
+            return flushed_signals
+
     def set_default_config(self, new_defaults):
         """Add default configuration options to this Element instance's default
         config dictionary.  If this function is called after the element's UI
@@ -160,10 +194,29 @@ class Element(object):
         Returns nothing."""
 
         with self.lock:
+            class_defaults_only = (not self._default_config and
+                                   new_defaults is self.defaults)
             self._default_config.update(new_defaults)
-            self.config = utils.apply_defaults(self.config, self._default_config)
+            if class_defaults_only:
+                # The common case, when the element is constructed.
+                self.config = self._defaults_template().apply(self.config)
+            else:
+                self.config = utils.apply_defaults(self.config,
+                                                   self._default_config)
             self.config_changed.emit(self.config)
 
+    @classmethod
+    def _defaults_template(cls):
+        """Get the compiled defaults of this class, compiling them on first
+        use.  Returns a utils.DefaultsTemplate."""
+        # look in the class's own __dict__ so that subclasses do not pick up
+        # the template of their parent class.
+        try:
+            return cls.__dict__['_compiled_defaults']
+        except KeyError:
+            cls._compiled_defaults = utils.DefaultsTemplate(cls.defaults)
+            return cls._compiled_defaults
+
     def is_enabled(self):
         """Query whether this element is enabled, indicating whether this
         element can be interacted with by the user.
@@ -171,11 +224,9 @@ class Element(object):
         If this element is currently invisible, False will always be returned.
 
         Returns a boolean."""
-
-        with self.lock:
-            if self.is_visible():
-                return self._enabled
-            return False
+        if self.is_visible():
+            return self._enabled
+        return False
 
     def set_disabled(self, new_state):
         """Enable or disable this element.
@@ -221,9 +272,7 @@ class Element(object):
         state.
 
         Returns a boolean."""
-
-        with self.lock:
-            return self._visible
+        return self._visible
 
     def set_visible(self, new_visibility):
         """Show or hide this element to the user.
@@ -256,40 +305,40 @@ class Element(object):
 
     def _get_hashable_config(self):
         """Get the hashable configuration dictionary."""
-        with self.lock:
-            hashable_obj = {}
-            for config_key, value in self._default_config.iteritems():
-                if config_key in self._hashable_config:
-                    hashable_obj[config_key] = value
-
-            # we always want to add certain object information, so add that here.
-            hashable_obj['classname'] = self.__class__.__name__
-            try:
-                hashable_obj['args_id'] = self.config['args_id']
-            except KeyError:
-                # if there's no args_id for this element, skip it.
-                pass
+        # Iterate over a copy, since set_default_config() may update the
+        # defaults from another thread.
+        hashable_obj = {}
+        for config_key, value in self._default_config.copy().iteritems():
+            if config_key in self._hashable_config:
+                hashable_obj[config_key] = value
+
+        # we always want to add certain object information, so add that here.
+        hashable_obj['classname'] = self.__class__.__name__
+        try:
+            hashable_obj['args_id'] = self.config['args_id']
+        except KeyError:
+            # if there's no args_id for this element, skip it.
+            pass
 
-            LOGGER.debug('Hashable object: %s', hashable_obj)
-            return hashable_obj
+        LOGGER.debug('Hashable object: %s', hashable_obj)
+        return hashable_obj
 
     def get_id(self, id_type='md5sum'):
         # md5sum represents a hash of relevant element attributes.
         # user represents the user-defined identifier, if provided (None if not
         # provided in JSON config)
         # TODO: make this work for Groups.
-        with self.lock:
-            assert id_type in ['md5sum', 'user']
+        assert id_type in ['md5sum', 'user']
 
-            if id_type == 'md5sum':
-                return utils.get_md5sum(self._get_hashable_config())
-            else: # id type must be user-defined
-                try:
-                    return self.config['id']
-                except KeyError:
-                    # If the user did not specify an ID, then there is no user key.
-                    # when this happens, get the md5sum ID instead.
-                    return self.get_id('md5sum')
+        if id_type == 'md5sum':
+            return utils.get_md5sum(self._get_hashable_config())
+        else: # id type must be user-defined
+            try:
+                return self.config['id']
+            except KeyError:
+                # If the user did not specify an ID, then there is no user key.
+                # when this happens, get the md5sum ID instead.
+                return self.get_id('md5sum')
 
     def is_satisfied(self):
         """Basic function to test whether this element is satisfied.
@@ -301,8 +350,30 @@ class Element(object):
         return self.is_enabled()
 
 
+def _cast_to_string(value):
+    """Cast value to a unicode string.  None and unicode values are returned
+    unchanged.  Returns a unicode string or None."""
+    if type(value) in [bool, int, float]:
+        value = str(value)
+    elif isinstance(value, unicode) or value is None:
+        return value
+    return unicode(value, 'utf-8')
+
+
 class Primitive(Element):
     """Primitive represents the simplest input element."""
+    # maps the config's returns type to the function used to cast the value.
+    type_casts = {
+        'string': _cast_to_string,
+        'int': int,
+        'float': float,
+        'bool': bool,
+    }
+
+    # (raw value, return type, cast value) of the most recent call to value().
+    # A cached cast is only used while the raw value is the same object, so
+    # any assignment of self._value invalidates it.
+    _cached_value = None
     defaults = {
         'validateAs': {'type': 'disabled'},
         'hideable': False,
@@ -331,6 +402,7 @@ class Primitive(Element):
             #           warning)
             self._valid = None
             self._validation_error = None
+            self._validation_pending = False  # validation deferred by a hold
             self._hashable_config = ['hideable', 'validateAs']
 
             # Set up our Communicator(s)
@@ -393,76 +465,100 @@ class Primitive(Element):
             if not self.is_enabled():
                 return
 
-            # If the value of this element has changed, we want to trigger all the
-            # elements that requested notification.
-            old_value = self.value()
-    #        if old_value != new_value:
             self._value = new_value
+            self._cached_value = None
             self._valid = None
-            self.value_changed.emit(new_value)
-            self.validate()
+
+        # Signals and validation happen outside of the lock, so readers and
+        # validation callbacks are not blocked while they run.
+        self.value_changed.emit(new_value)
+        self.validate()
 
     def value(self):
         """Get the value of this element."""
-        with self.lock:
-            def _cast_to_string(value):
-                if type(value) in [bool, int, float]:
-                    value = str(value)
-                elif isinstance(value, unicode) or value is None:
-                    return value
-                return unicode(value, 'utf-8')
-
-            type_casts = {
-                'string': _cast_to_string,
-                'int': int,
-                'float': float,
-                'bool': bool,
-            }
-            try:
-                return_datatype = self.config['returns']['type']
-                return type_casts[return_datatype](self._value)
-            except KeyError as missing_key:
-                # If the programmer requested an invalid type, raise a helpful
-                # exception.
-                raise KeyError(('Return type %s not allowed, must be one of '
-                                '"string", "int" or "float"') % missing_key)
-            except ValueError:
-                # When the value cannot be converted to the reqested type, raise a
-                # helpful exception.
-                if isinstance(self._value, basestring):
-                    if len(self._value) == 0:
-                        return self._value
-
-                raise ValueError('Value %s cannot be converted to %s.' % (
-                    self._value, return_datatype))
+        # Read the value once; it is only ever replaced, never mutated, so no
+        # lock is needed.
+        current_value = self._value
+        cached = self._cached_value
+        try:
+            return_datatype = self.config['returns']['type']
+            if (cached is not None and cached[0] is current_value and
+                    cached[1] == return_datatype):
+                return cached[2]
+
+            cast_value = self.type_casts[return_datatype](current_value)
+            self._cached_value = (current_value, return_datatype, cast_value)
+            return cast_value
+        except KeyError as missing_key:
+            # If the programmer requested an invalid type, raise a helpful
+            # exception.
+            raise KeyError(('Return type %s not allowed, must be one of '
+                            '"string", "int" or "float"') % missing_key)
+        except ValueError:
+            # When the value cannot be converted to the reqested type, raise a
+            # helpful exception.
+            if isinstance(current_value, basestring):
+                if len(current_value) == 0:
+                    return current_value
+
+            raise ValueError('Value %s cannot be converted to %s.' % (
+                current_value, return_datatype))
 
     def is_valid(self):
         """Return the validity of this input.  If an element has not been
         validated, it will be validated here and will block until validation
         completes.  Returns a Boolean.
         """
-        with self.lock:
-            # Return whether validation passed (a boolean).
-            if self.has_input():
+        # Return whether validation passed (a boolean).
+        if self.has_input():
+            return self._valid
+        else:
+            if self.is_required():
                 return self._valid
             else:
-                if self.is_required():
-                    return self._valid
-                else:
-                    return True  # if no input and optional, input is valid.
-
-    def validate(self, data=None):
-        with self.lock:
-            if self.config['required'] and not self.has_input():
-                LOGGER.debug('Element %s is required' % self)
-                elem_req_msg = _('Element is required')
-                elem_req_state = validation.V_FAIL
-                self._get_validation_result((elem_req_msg, elem_req_state))
+                return True  # if no input and optional, input is valid.
+
+    def validation_error(self):
+        """Return the error message from the most recent validation, or None
+        if it passed or this element has not been validated."""
+        return self._validation_error
+
+    def release_signals(self):
+        """Release a hold placed by hold_signals().  If validation was
+        requested while signals were held, the element is validated exactly
+        once: either by the flushed value_changed signal or directly.
+
+        Returns a list of the string names of the signals that were emitted."""
+        with self.lock:
+            flushed_signals = Element.release_signals(self)
+            if self._signals_held == 0 and self._validation_pending:
+                self._validation_pending = False
+                if 'value_changed' not in flushed_signals:
+                    self.validate()
+            return flushed_signals
+
+    def validate(self, data=None, join=False):
+        """Validate the current value of this element.  If join is True, block
+        until the result has been recorded; otherwise the result is recorded
+        in the background.  Returns nothing."""
+        with self.lock:
+            if self._signals_held > 0:
+                # Validate once, when the hold is released.
+                self._validation_pending = True
                 return
 
-            if self.has_input():
-                validation_dict = self.config['validateAs'].copy()
-                self._validator.validate(self.value(), validation_dict)  # this starts the thread
+        if self.config['required'] and not self.has_input():
+            LOGGER.debug('Element %s is required' % self)
+            elem_req_msg = _('Element is required')
+            elem_req_state = validation.V_FAIL
+            self._get_validation_result((elem_req_msg, elem_req_state))
+            return
+
+        # The validator runs without holding this element's lock, so that
+        # slow checks (e.g. opening a raster) don't block readers.
+        if self.has_input():
+            validation_dict = self.config['validateAs'].copy()
+            self._validator.validate(self.value(), validation_dict, join)  # this starts the thread
 
     def _get_validation_result(self, error=None):
         """Utility class method to get the error result from the validator
@@ -508,8 +604,7 @@ class Primitive(Element):
                 self.satisfaction_changed.emit(self.is_satisfied())
 
     def is_hideable(self):
-        with self.lock:
-            return self._hideable
+        return self._hideable
 
     def set_hidden(self, is_hidden):
         with self.lock:
@@ -521,8 +616,7 @@ class Primitive(Element):
                 self.hidden_toggled.emit(is_hidden)
 
     def is_hidden(self):
-        with self.lock:
-            return self._hidden
+        return self._hidden
 
     def is_satisfied(self):
         """Determine if this element has satisfactory input.  An element is
@@ -531,19 +625,17 @@ class Primitive(Element):
             - The element's validation must pass (if it has validation)
             - The element must be enabled.
         Returns a boolean with the satisfaction state."""
-        with self.lock:
-            if self.has_input() and self._valid and self.is_enabled():
-                return True
-            return False
+        if self.has_input() and self._valid and self.is_enabled():
+            return True
+        return False
 
     def state(self):
         """Return a python dictionary describing the state of this element."""
-        with self.lock:
-            state_dict = {
-                'value': self.value(),
-                'is_hidden': self.is_hidden()
-            }
-            return state_dict
+        state_dict = {
+            'value': self.value(),
+            'is_hidden': self.is_hidden()
+        }
+        return state_dict
 
     def set_state(self, state):
         """Set the state of this Element.
@@ -558,61 +650,57 @@ class Primitive(Element):
             self.set_hidden(state['is_hidden'])
 
     def is_required(self):
-        with self.lock:
-            if self._required:
-                return self._required
-            return self._conditionally_required
+        if self._required:
+            return self._required
+        return self._conditionally_required
 
     def set_conditionally_required(self, cond_require):
         with self.lock:
             self._conditionally_required = cond_require
 
     def has_input(self):
-        with self.lock:
-            if self.value() != None:
-                return True
-            return False
+        if self.value() != None:
+            return True
+        return False
 
     def should_return(self):
-        with self.lock:
-            LOGGER.debug('Checking whether should return: %s (%s)',
-                        self, self.get_id('user'))
-            # if element does not have an args_id, we're not supposed to return.
-            # Therefore, return False.
-            if 'args_id' not in self.config:
-                LOGGER.debug('Element %s does not have an args_id', self)
-                return False
+        LOGGER.debug('Checking whether should return: %s (%s)',
+                    self, self.get_id('user'))
+        # if element does not have an args_id, we're not supposed to return.
+        # Therefore, return False.
+        if 'args_id' not in self.config:
+            LOGGER.debug('Element %s does not have an args_id', self)
+            return False
+
+        if self.config['returns']['ifHidden']:
+            LOGGER.debug('Element %s should return, even if hidden.', self)
+            return True
 
-            if self.config['returns']['ifHidden']:
-                LOGGER.debug('Element %s should return, even if hidden.', self)
-                return True
-
-            # if element is disabled and we're not supposed to return if disabled,
-            # return False.
-            return_if_disabled = self.config['returns']['ifDisabled']
-            if self.is_enabled() is False:
-                if return_if_disabled is False:
-                    LOGGER.debug('Element %s is disabled and should not return',
-                        self)
-                    return False
-
-            # if the element is empty and we're not supposed to return if it's
-            # empty, return False.  This is only the case when element is not
-            # required.
-            return_if_empty = self.config['returns']['ifEmpty']
-            required = self.config['required']
-            if (not return_if_empty and not self.has_input()) and not required:
-                LOGGER.debug('Element %s (%s) is empty', self,
-                        self.config['args_id'])
+        # if element is disabled and we're not supposed to return if disabled,
+        # return False.
+        return_if_disabled = self.config['returns']['ifDisabled']
+        if self.is_enabled() is False:
+            if return_if_disabled is False:
+                LOGGER.debug('Element %s is disabled and should not return',
+                    self)
                 return False
 
-            # If none of the previous conditions have been met, return True.
-            return True
+        # if the element is empty and we're not supposed to return if it's
+        # empty, return False.  This is only the case when element is not
+        # required.
+        return_if_empty = self.config['returns']['ifEmpty']
+        required = self.config['required']
+        if (not return_if_empty and not self.has_input()) and not required:
+            LOGGER.debug('Element %s (%s) is empty', self,
+                    self.config['args_id'])
+            return False
+
+        # If none of the previous conditions have been met, return True.
+        return True
 
     def help_text(self):
         """Returns the helpText attribute string."""
-        with self.lock:
-            return self.config['helpText']
+        return self.config['helpText']
 
 class LabeledPrimitive(Primitive):
     defaults = {
@@ -643,8 +731,7 @@ class LabeledPrimitive(Primitive):
             self._label = cast_label
 
     def label(self):
-        with self.lock:
-            return self._label
+        return self._label
 
 class Dropdown(LabeledPrimitive):
     defaults = {
@@ -680,23 +767,24 @@ class Dropdown(LabeledPrimitive):
             self.options_changed = Communicator('options_changed')
 
     def set_value(self, new_value):
-        with self.lock:
-            if isinstance(new_value, int):
-                assert new_value >= -1, 'Dropdown index must be >= -1, not %s' % new_value
-                assert new_value <= len(self.options), 'Dropdown index must exist'
-            elif isinstance(new_value, basestring):
-                assert new_value in self.options, (
-                    'Value "%s" not in options %s' % (new_value, self.options))
-            else:
-                raise AssertionError(('Dropdown value type not '
-                                    'recognized: {ctype}').format(ctype=type(new_value)))
+        options = self.options
+        if isinstance(new_value, int):
+            assert new_value >= -1, 'Dropdown index must be >= -1, not %s' % new_value
+            assert new_value <= len(options), 'Dropdown index must exist'
+        elif isinstance(new_value, basestring):
+            assert new_value in options, (
+                'Value "%s" not in options %s' % (new_value, options))
+        else:
+            raise AssertionError(('Dropdown value type not '
+                                'recognized: {ctype}').format(ctype=type(new_value)))
 
-            LabeledPrimitive.set_value(self, new_value)
+        LabeledPrimitive.set_value(self, new_value)
 
     def set_options(self, options_list, new_value=None):
         with self.lock:
             if self.options != options_list:
                 self.options = options_list
+                self._cached_value = None
 
                 try:
                     if new_value is None:
@@ -727,26 +815,37 @@ class Dropdown(LabeledPrimitive):
         # if there are no options to select or the user has not selected an
         # option, return None.
         with self.lock:
-            if len(self.options) == 0 or self._value == -1:
-                return None
-
-            # get the value of the currently selected option.
-            return_option = self.config['returns']['type']
-            if return_option == 'string':
-                if isinstance(self._value, int):
-                    return_value = self.options[self._value]
-                else:
-                    return_value = self._value
+            options = self.options
+            current_value = self._value
+
+            # The resolved option is cached for as long as neither the options
+            # list nor the raw value have been replaced.
+            cached = self._cached_value
+            if (cached is not None and cached[0] is options and
+                    cached[1] is current_value):
+                return cached[2]
+
+            if len(options) == 0 or current_value == -1:
+                return_value = None
             else:
-                return_value = self._value
+                # get the value of the currently selected option.
+                return_option = self.config['returns']['type']
+                if return_option == 'string' and isinstance(current_value, int):
+                    return_value = options[current_value]
+                else:
+                    return_value = current_value
 
-            try:
-                return self.config['returns']['mapValues'][return_value]
-            except KeyError:
-                # If the user's config doesn't have 'mapValues' OR the config
-                # doesn't define a mapping for this value, return the original
-                # return value, defined by the config['returns']['type'] string.
-                return return_value
+                try:
+                    return_value = self.config['returns']['mapValues'][return_value]
+                except KeyError:
+                    # If the user's config doesn't have 'mapValues' OR the
+                    # config doesn't define a mapping for this value, return
+                    # the original return value, defined by the
+                    # config['returns']['type'] string.
+                    pass
+
+            self._cached_value = (options, current_value, return_value)
+            return return_value
 
     def state(self):
         with self.lock:
@@ -775,9 +874,95 @@ class TableDropdown(Dropdown):
         },
     }
 
-    def load_columns(self, filepath):
+    # Column names read from table files, shared by all table dropdowns.
+    # Keys are (classname, filepath, mtime, size) tuples, so a file's columns
+    # are read again as soon as the file changes on disk.
+    _columns_cache = {}
+    _columns_cache_lock = threading.Lock()
+    _columns_cache_size = 128
+
+    # The number of calls made to load_columns().  Only the most recent load
+    # may set this dropdown's options.
+    _load_generation = 0
+
+    def read_columns(self, filepath):
+        """Read the column names of the table at filepath.  Subclasses must
+        implement this, reading no more of the file than they need to.
+
+        Returns a list of column names, or None if the file could not be
+        read as a table."""
         raise NotImplementedError
 
+    def load_columns(self, filepath):
+        """Load the column names of the table at filepath as the options of
+        this dropdown.
+
+        Columns are read in a background thread and cached by the file's path
+        and modification time.  If load_columns() is called again before an
+        earlier load finishes, the result of the earlier load is discarded.
+
+            filepath - a URI to a table file on disk.
+
+        Returns the threading.Thread doing the loading."""
+        with self.lock:
+            self._load_generation += 1
+            generation = self._load_generation
+
+        loader = threading.Thread(target=self._load_columns,
+                                  args=(filepath, generation))
+        loader.daemon = True
+        loader.start()
+        return loader
+
+    def _load_columns(self, filepath, generation):
+        """Read the columns of filepath (from the cache, if possible) and set
+        them as this dropdown's options, unless a newer load has started.
+
+        Returns nothing."""
+        try:
+            columns = self._get_columns(filepath)
+        except Exception:
+            LOGGER.exception('Could not read columns from %s', filepath)
+            columns = None
+
+        with self.lock:
+            if generation != self._load_generation:
+                LOGGER.debug('Discarding stale columns from %s', filepath)
+                return
+
+            if columns is None:
+                self.set_options([])
+            else:
+                self.set_options(columns,
+                                 new_value=self.config['defaultValue'])
+
+    def _get_columns(self, filepath):
+        """Get the column names of filepath, reading them only if they are
+        not already cached for the current version of the file.
+
+        Returns a list of column names, or None."""
+        try:
+            file_stat = os.stat(filepath)
+        except (OSError, TypeError):
+            # the file does not exist (or filepath is not a path at all)
+            return None
+
+        cache_key = (self.__class__.__name__, filepath, file_stat.st_mtime,
+                     file_stat.st_size)
+        try:
+            return list(TableDropdown._columns_cache[cache_key])
+        except KeyError:
+            pass
+
+        columns = self.read_columns(filepath)
+        if columns is not None:
+            with TableDropdown._columns_cache_lock:
+                if (len(TableDropdown._columns_cache) >=
+                        TableDropdown._columns_cache_size):
+                    TableDropdown._columns_cache.clear()
+                TableDropdown._columns_cache[cache_key] = tuple(columns)
+        return columns
+
     def state(self):
         with self.lock:
             state_dict = {
@@ -811,17 +996,42 @@ class OGRFieldDropdown(TableDropdown):
         },
     }
 
-    def load_columns(self, filepath):
+    def read_columns(self, filepath):
+        """Read the field names of the first layer of the vector at filepath.
+        Only the layer definition is read, not the features.
+
+        Returns a list of field names, or None if filepath is not a vector."""
         from osgeo import ogr
-        with self.lock:
-            vector = ogr.Open(filepath)
-            if not vector:
-                self.set_options([])
-                return
+        vector = ogr.Open(filepath)
+        if not vector:
+            return None
+
+        layer_defn = vector.GetLayer().GetLayerDefn()
+        return [layer_defn.GetFieldDefn(field_index).GetName()
+                for field_index in range(layer_defn.GetFieldCount())]
+
+
+class CSVFieldDropdown(TableDropdown):
+    def read_columns(self, filepath):
+        """Read the column names from the header line of the CSV at filepath.
+        Only the header line is read.
 
-            layer = vector.GetLayer()
-            fieldnames = [field.GetName() for field in layer.schema]
-            self.set_options(fieldnames, new_value=self.config['defaultValue'])
+        Returns a list of column names, or None if the file has no header."""
+        with open(filepath, 'rbU') as csv_file:
+            header = csv_file.readline()
+
+        if not header.strip():
+            return None
+
+        # Sniff the dialect the same way as validation.check_csv does.
+        try:
+            dialect = csv.Sniffer().sniff(header, delimiters=';,')
+        except csv.Error:
+            # A single column (no delimiter) can't be sniffed.
+            dialect = csv.excel
+
+        return [utils.decode_string(column.strip())
+                for column in csv.reader([header], dialect).next()]
 
 
 class Text(LabeledPrimitive):
@@ -858,27 +1068,25 @@ class Text(LabeledPrimitive):
 
         Returns nothing."""
 
-        with self.lock:
-            # Numbers must first be cast to a str before they can be converted to
-            # python unicode objects.
-            if isinstance(new_value, float) or isinstance(new_value, int):
-                new_value = str(new_value)
+        # Numbers must first be cast to a str before they can be converted to
+        # python unicode objects.
+        if isinstance(new_value, float) or isinstance(new_value, int):
+            new_value = str(new_value)
 
-            try:
-                new_value = unicode(new_value, 'utf-8')
-            except TypeError:
-                # For when new_value is already unicode.
-                pass
+        try:
+            new_value = unicode(new_value, 'utf-8')
+        except TypeError:
+            # For when new_value is already unicode.
+            pass
 
-            LOGGER.debug('Text element %s setting value from %s to %s',
-                        self.get_id('user'), self._value, new_value)
-            LabeledPrimitive.set_value(self, new_value)
+        LOGGER.debug('Text element %s setting value from %s to %s',
+                    self.get_id('user'), self._value, new_value)
+        LabeledPrimitive.set_value(self, new_value)
 
     def has_input(self):
-        with self.lock:
-            if len(self._value) > 0:
-                return True
-            return False
+        if len(self._value) > 0:
+            return True
+        return False
 
 class File(Text):
     defaults = {
@@ -923,21 +1131,20 @@ class File(Text):
         new_value=''.
 
         Returns nothing."""
-        with self.lock:
-            assert type(new_value) in [StringType, UnicodeType], ('New value must'
-                'be either a bytestring or a unicode string, '
-                '%s found.' % type(new_value))
+        assert type(new_value) in [StringType, UnicodeType], ('New value must'
+            'be either a bytestring or a unicode string, '
+            '%s found.' % type(new_value))
 
-            new_value = utils.decode_string(new_value)
+        new_value = utils.decode_string(new_value)
 
-            if new_value == '':
-                # os.path.abspath('') is the same as os.getcwd(),
-                # so I need to have a special case here.  If the user enters '.',
-                # then the current dir will be used.
-                absolute_path = ''
-            else:
-                absolute_path = os.path.abspath(os.path.expanduser(new_value))
-            Text.set_value(self, absolute_path)
+        if new_value == '':
+            # os.path.abspath('') is the same as os.getcwd(),
+            # so I need to have a special case here.  If the user enters '.',
+            # then the current dir will be used.
+            absolute_path = ''
+        else:
+            absolute_path = os.path.abspath(os.path.expanduser(new_value))
+        Text.set_value(self, absolute_path)
 
 
 class Folder(File):
@@ -975,20 +1182,18 @@ class Static(Primitive):
             self._hashable_config = ['returnValue']
 
     def value(self):
-        with self.lock:
-            try:
-                return self.config['defaultValue']
-            except:
-                pass
-            return self.config['returnValue']
+        try:
+            return self.config['defaultValue']
+        except:
+            pass
+        return self.config['returnValue']
 
     def should_return(self):
-        with self.lock:
-            if 'args_id' in self.config:
-                # Static elements should always return, so long as there's an
-                # args_id.
-                return True
-            return False
+        if 'args_id' in self.config:
+            # Static elements should always return, so long as there's an
+            # args_id.
+            return True
+        return False
 
     def state(self):
         return None
@@ -1090,14 +1295,13 @@ class CheckBox(LabeledPrimitive):
             self.set_value(self.config['defaultValue'])
 
     def set_value(self, new_value):
-        with self.lock:
-            new_value = bool(new_value)
-            LabeledPrimitive.set_value(self, new_value)
+        new_value = bool(new_value)
+        LabeledPrimitive.set_value(self, new_value)
 
-            # For most elements, satisfaction_changed is emitted after validation
-            # completes successfully.  For checkboxes, we rarely (if ever) have
-            # validation.
-            self.satisfaction_changed.emit(new_value)
+        # For most elements, satisfaction_changed is emitted after validation
+        # completes successfully.  For checkboxes, we rarely (if ever) have
+        # validation.
+        self.satisfaction_changed.emit(new_value)
 
     def has_input(self):
         return self.value()
@@ -1119,6 +1323,7 @@ class Group(Element):
             'label': Label,
             'dropdown': Dropdown,
             'OGRFieldDropdown': OGRFieldDropdown,
+            'CSVFieldDropdown': CSVFieldDropdown,
             'container': Container,
             'checkbox': CheckBox,
             'multi': Multi,
@@ -1153,16 +1358,23 @@ class Group(Element):
             Returns nothing."""
         with self.lock:
             for element_config in elements:
-                try:
-                    new_element_cls = self._registrar[element_config['type']]
-                except KeyError as error:
-                    raise KeyError('%s not recognized as an acceptable element type' % error)
-                else:
-                    LOGGER.debug('Creating a new element with configuration %s',
-                                element_config)
-                    new_element = new_element_cls(element_config)
+                self._add_element(self._create_element(element_config))
+
+    def _create_element(self, element_config):
+        """Construct a single element from its configuration without adding
+        it to this group.
 
-                self._add_element(new_element)
+            element_config - a dictionary describing the element to create.
+
+        Returns the new element instance."""
+        try:
+            new_element_cls = self._registrar[element_config['type']]
+        except KeyError as error:
+            raise KeyError('%s not recognized as an acceptable element type' % error)
+
+        LOGGER.debug('Creating a new element with configuration %s',
+                    element_config)
+        return new_element_cls(element_config)
 
     def elements(self):
         return self._elements
@@ -1206,11 +1418,10 @@ class Group(Element):
     def state(self):
         """Returns a python dictionary with the relevant state of the Group (not
             including contained elements)."""
-        with self.lock:
-            state_dict = {
-                'enabled': self.is_enabled(),
-            }
-            return state_dict
+        state_dict = {
+            'enabled': self.is_enabled(),
+        }
+        return state_dict
 
     def set_state(self, state):
         """Set the state of this group element.
@@ -1266,10 +1477,9 @@ class Container(Group):
             self._display_label = display
 
     def label(self):
-        with self.lock:
-            if self._display_label:
-                return self.config['label']
-            return ''
+        if self._display_label:
+            return self.config['label']
+        return ''
 
     def value(self):
         return not self._collapsed
@@ -1298,10 +1508,9 @@ class Container(Group):
     def state(self):
         """Returns a python dictionary with the relevant state of the Group (not
             including contained elements)."""
-        with self.lock:
-            state_dict = Group.state(self)
-            state_dict['collapsed'] = self.is_collapsed()
-            return state_dict
+        state_dict = Group.state(self)
+        state_dict['collapsed'] = self.is_collapsed()
+        return state_dict
 
     def set_state(self, state):
         """Set the state of this group element.
@@ -1320,16 +1529,15 @@ class Container(Group):
         return True
 
     def should_return(self):
-        with self.lock:
-            LOGGER.debug('Checking whether should return: %s', self)
-            # if element does not have an args_id, we're not supposed to return.
-            # Therefore, return False.
-            if 'args_id' not in self.config:
-                LOGGER.debug('Element %s does not have an args_id', self)
-                return False
+        LOGGER.debug('Checking whether should return: %s', self)
+        # if element does not have an args_id, we're not supposed to return.
+        # Therefore, return False.
+        if 'args_id' not in self.config:
+            LOGGER.debug('Element %s does not have an args_id', self)
+            return False
 
-            # If none of the previous conditions have been met, return True.
-            return True
+        # If none of the previous conditions have been met, return True.
+        return True
 
     def is_required(self):
         # containers are never reauired.
@@ -1372,6 +1580,13 @@ class Multi(Container):
     }
 
     def __init__(self, configuration, new_elements=None):
+        # Container.__init__ may emit our signals, so create them first.
+        # Each add or remove is a separate change to the rows, so these
+        # signals are never coalesced while held (see hold_signals()).
+        self.element_added = Communicator('element_added', coalesce=False)
+        self.element_removed = Communicator('element_removed', coalesce=False)
+        self.rows_replaced = Communicator('rows_replaced')
+
         Container.__init__(self, configuration, new_elements)
 
         with self.lock:
@@ -1385,21 +1600,41 @@ class Multi(Container):
                 LOGGER.warn('Multi element does not currently support '
                     ' non-template elements.  Elements found have been removed.')
 
-            self.element_added = Communicator('element_added')
-            self.element_removed = Communicator('element_removed')
-
+            self._compile_template()
             self.set_value(self.config['defaultValue'])
 
     def emit_signals(self):
         with self.lock:
-            for element_index in range(len(self._elements)):
-                self.element_added.emit(element_index)
+            self.rows_replaced.emit(list(self._elements))
+
+    def _compile_template(self):
+        """Resolve this Multi's row template into an element class and a
+        rendered configuration.
+
+        The row class is looked up in the registrar and the class defaults
+        are merged into the template once, here.  All rows share the rendered
+        template configuration (including its validateAs spec), so rendering
+        it again as each row is constructed adds no keys.
+
+        Returns nothing."""
+        template = self.config['template']
+        try:
+            self._row_class = self._registrar[template['type']]
+        except KeyError as error:
+            raise KeyError('%s not recognized as an acceptable element type' % error)
+
+        self._row_config = self._row_class._defaults_template().apply(template)
+
+    def _create_row(self):
+        """Create a new row element from this Multi's compiled template
+        without adding it to the Multi.  Returns the new element."""
+        return self._row_class(self._row_config)
 
     def add_element(self, index=None):
         # need an optional argument for when an element is added by the
         # Container widget.
         with self.lock:
-            self.create_elements([self.config['template']])
+            self._add_element(self._create_row())
             new_index = len(self.elements()) - 1
             LOGGER.debug('Adding a new element at index %s', new_index)
             self.element_added.emit(new_index)  #index of element
@@ -1409,60 +1644,75 @@ class Multi(Container):
             popped_element = self._elements.pop(index)
             self.element_removed.emit(index)
 
+    def replace_elements(self, new_rows):
+        """Replace all rows of this Multi with the given row elements in a
+        single operation.
+
+            new_rows - a list of element instances, usually created from this
+                Multi's template.
+
+        Emits the rows_replaced signal once with a list of the new rows,
+        rather than an element_removed/element_added signal per row.
+
+        Returns nothing."""
+        with self.lock:
+            self._elements = list(new_rows)
+            LOGGER.debug('Replaced rows, now %s rows', len(self._elements))
+            self.rows_replaced.emit(list(self._elements))
+
     def is_collapsed(self):
         return False
 
     def set_value(self, value_list):
-        with self.lock:
-            self.clear()
-
-            for value in value_list:
-                self.add_element()
-                self.elements()[-1].set_value(value)
+        # The new rows aren't part of the Multi until replace_elements(), so
+        # they are built without holding the lock.
+        new_rows = []
+        for value in value_list:
+            new_row = self._create_row()
+            new_row.set_value(value)
+            new_rows.append(new_row)
+        self.replace_elements(new_rows)
 
     def clear(self):
-        while True:
-            try:
-                self.remove_element(0)
-            except IndexError:
-                # We've removed all the elements
-                break
+        """Remove all rows from this Multi.  Emits rows_replaced once.
+
+        Returns nothing."""
+        self.replace_elements([])
 
     def value(self):
-        with self.lock:
-            return_type = self.config['return_type']
-            return_values = {
-                'list': lambda elem_list: [_recursive_value(e) for e in elem_list],
-                'dict': lambda elem_list: dict((e.config['args_id'],
-                    _recursive_value(e)) for e in elem_list),
-            }
+        return_type = self.config['return_type']
+        return_values = {
+            'list': lambda elem_list: [_recursive_value(e) for e in elem_list],
+            'dict': lambda elem_list: dict((e.config['args_id'],
+                _recursive_value(e)) for e in elem_list),
+        }
 
-            def _recursive_value(element):
-                """Recurse through a nested set of elements and return a list of
-                values and lists of values for the elements contained within this
-                multi."""
-                if isinstance(element, Container):
-                    # may raise KeyError in either of two circumstances:
-                    #  - args_id is missing from any of the contained elements
-                    #  - return_value is not in ['list', 'dict']
-                    value = return_values[return_type](element.elements())
-                else:
-                    value = element.value()
-                return value
+        def _recursive_value(element):
+            """Recurse through a nested set of elements and return a list of
+            values and lists of values for the elements contained within this
+            multi."""
+            if isinstance(element, Container):
+                # may raise KeyError in either of two circumstances:
+                #  - args_id is missing from any of the contained elements
+                #  - return_value is not in ['list', 'dict']
+                value = return_values[return_type](list(element.elements()))
+            else:
+                value = element.value()
+            return value
 
-            return_list = [_recursive_value(e) for e in self.elements()]
-            return return_list
+        # Read from a copy of the rows, so that rows added or removed while
+        # the values are read don't affect the result.
+        return_list = [_recursive_value(e) for e in list(self.elements())]
+        return return_list
 
     def state(self):
-        with self.lock:
-            state_dict = Container.state(self)
-            state_dict['value'] = self.value()
-            return state_dict
+        state_dict = Container.state(self)
+        state_dict['value'] = self.value()
+        return state_dict
 
     def set_state(self, state):
-        with self.lock:
-            self.set_value(state['value'])
-            Container.set_state(self, state)
+        self.set_value(state['value'])
+        Container.set_state(self, state)
 
     def reset_value(self):
         with self.lock:
@@ -1496,35 +1746,208 @@ class Tab(Group):
 #  * contains a group of elements
 #  * packages up required arguments from elements
 #  * starts a model running when triggered.
+class FormSnapshot(object):
+    """A point-in-time capture of the state of every element in a Form.
+
+    Each element is visited once.  Primitive elements are read while holding
+    their lock, so that the value and validity recorded for an element are
+    consistent with each other even while validation threads are running.
+    Primitives only hold their lock briefly, while a new value or validation
+    result is swapped in.  Containers (such as Multi) are read without their
+    lock, since they can hold it for a long time (e.g. while building rows)
+    and are always valid, so their fields don't need to agree with a
+    validation result.  The form's arguments, errors and saveable state are
+    all derived from this single capture.
+
+    Public Attributes:
+        self.records - a list of python dictionaries, one per element, in the
+            order of the form's elements.
+    """
+    def __init__(self, elements, include_state=True):
+        """Capture the state of elements.
+
+            elements - a list of Element instances.
+            include_state - a boolean.  If True, also capture each element's
+                saveable state and md5sum ID, as needed by state().
+
+        Returns nothing."""
+        self.include_state = include_state
+        self.records = []
+        for element in elements:
+            if isinstance(element, Primitive):
+                with element.lock:
+                    record = self._capture(element)
+            else:
+                record = self._capture(element)
+            self.records.append(record)
+
+    def _capture(self, element):
+        """Read the state of a single element.  Returns a python dictionary."""
+        should_return = element.should_return()
+        record = {
+            'element': element,
+            'args_id': element.config.get('args_id'),
+            'is_valid': element.is_valid(),
+            'should_return': should_return,
+            'is_required': element.is_required(),
+            'is_visible': element.is_visible(),
+            # values are only needed (and only guaranteed to be castable)
+            # when the element returns.
+            'value': element.value() if should_return else None,
+        }
+
+        if self.include_state:
+            # the md5sum ID is the hash of the hashable config, so only build
+            # the hashable config once.
+            hashable_config = element._get_hashable_config()
+            record['id'] = utils.get_md5sum(hashable_config)
+            record['hashable_config'] = hashable_config
+            record['state'] = element.state()
+        return record
+
+    def arguments(self):
+        """Collect the values of all returning elements into a single
+        dictionary in the form of {'args_id': value}.
+
+        Returns a python dictionary."""
+        args_dict = {}
+        for record in self.records:
+            if record['should_return']:
+                args_dict[record['args_id']] = record['value']
+            else:
+                LOGGER.debug('Element %s should not return, skipping args_id %s',
+                    record['element'], record['args_id'])
+        return args_dict
+
+    def is_valid(self):
+        """Check if all the inputs captured are valid for submission.
+
+        Returns a boolean."""
+        for record in self.records:
+            if record['args_id'] is None:
+                continue  # no args_id, so skip.
+            if not record['is_visible']:
+                continue
+            if not record['should_return']:  # element should not return
+                continue
+            if record['is_valid'] and record['should_return'] is True:
+                continue  # is valid, should return
+            return False  # otherwise, element is not ok for submission.
+        return True
+
+    def errors(self):
+        """Return a list of tuples containing (args_id, value) for the visible
+        elements that should return but are invalid."""
+        invalid_inputs = []
+        for record in self.records:
+            if not record['is_visible']:
+                continue  # skip elements that are hidden from view.
+
+            if not record['is_valid'] and record['should_return']:
+                invalid_inputs.append((record['args_id'], record['value']))
+        return invalid_inputs
+
+    def state(self, debug=False):
+        """Assemble the saveable state of all captured elements, keyed by
+        element md5sum ID, as written by Form.save_state().
+
+            debug=False - a boolean.  If True, a copy of each element's
+                hashable configuration is included in its state under the
+                '_debug' key.
+
+        Returns a python dictionary."""
+        assert self.include_state, 'Snapshot was taken without element states'
+        state_dict = {}
+        for record in self.records:
+            element_state = record['state']
+            if debug and element_state is not None:
+                element_state = element_state.copy()
+                element_state['_debug'] = record['hashable_config']
+            state_dict[record['id']] = element_state
+        return state_dict
+
+
 class Form():
-    def __init__(self, configuration, ignore_prev_runs=False):
+    def __init__(self, configuration, ignore_prev_runs=False,
+                 initial_signals=False):
+        """Build the form described by configuration.
+
+            configuration - a python dictionary describing the form.
+            ignore_prev_runs - a boolean.  If True, the lastrun state is not
+                loaded.
+            initial_signals - a boolean.  If True, emit the signals of all
+                elements (see emit_signals()) as part of construction.
+
+        The element tree is walked once to build both the element list and
+        the element index, so every Element target is known when signals are
+        wired.  Signal wiring, the lastrun state and (optionally) the initial
+        signals are all applied within a single batch, so no inter-element
+        signal is emitted until the lastrun values are in place, and each
+        signal is emitted at most once."""
         self._ui = Group(configuration)
 
-        self.elements = self.find_elements()
+        (self.elements, self._element_index,
+         self._state_ids) = self._index_elements()
+        self.preload_thread = None
         self.runner = None
         self._runner_class = execution.PythonRunner
         self._unknown_signals = []  # track signals we might setup later
         self.langs = []  # initially, available langs are unknown.
 
-        self.setup_communication(self.elements)
-
         self.submission_requested = Communicator('submission_requested')
         self.submission_requested.register(_check_workspace, priority=-1, form=self)
         self.submitted = Communicator('submitted')
 
-        # now that the form has been created, load the lastrun state, if
+        # now that the form has been created, read the lastrun state, if
         # appliccable.
+        form_state = None
         lastrun_uri = self.lastrun_uri()
+        self.lastrun = fileio.LastrunStore(lastrun_uri)
         if not ignore_prev_runs:
             try:
-                self.load_state(lastrun_uri)
-                LOGGER.info('Successfully loaded lastrun from %s',
-                    lastrun_uri)
+                form_state = fileio.read_state(lastrun_uri)
             except IOError:
                 # when no lastrun file exists for this version
                 LOGGER.info(('No lastrun file found at %s. Using default form '
                              'values.'), lastrun_uri)
 
+        with self.batch():
+            self.setup_communication(self.elements)
+
+            if form_state is not None:
+                self._apply_state(form_state)
+                LOGGER.info('Successfully loaded lastrun from %s',
+                    lastrun_uri)
+
+            if initial_signals:
+                self.emit_signals()
+
+    def preload_modules(self):
+        """Start importing the target script and the modules of Python signal
+        targets in the background, so that the first submission doesn't wait
+        for them.  See execution.preload_modules().  Nothing is preloaded
+        unless this is called; the GUI calls it once its window is built, so
+        the background imports don't compete with the GUI's own.
+
+        The target script is skipped if the form's runner imports the model in
+        a separate process (see execution.SubprocessRunner), since importing
+        it here would not help.
+
+        Returns the started threading.Thread, or None if there is nothing to
+        preload."""
+        modules = []
+        if ('targetScript' in self._ui.config and
+                not issubclass(self._runner_class, execution.SubprocessRunner)):
+            modules.append(self._ui.config['targetScript'])
+        for element in self.elements:
+            modules += utils.python_signal_modules(
+                element.config.get('signals', []))
+
+        if not modules:
+            return None
+        self.preload_thread = execution.preload_modules(modules)
+        return self.preload_thread
+
     def set_langs(self, langs):
         """Set the available languages of the form."""
         self.langs = langs
@@ -1571,7 +1994,7 @@ class Form():
 
     @property
     def element_index(self):
-        return dict((e.get_id('user'), e) for e in self.elements)
+        return self._element_index
 
     def emit_signals(self):
         for element in self.elements:
@@ -1646,6 +2069,8 @@ class Form():
 
         self._ui._add_element(element)
         self.elements.append(element)
+        self._element_index[element.get_id('user')] = element
+        self._state_ids.append(element.get_id())
 
         # attempt to process unknown signals.
         self._process_unknown_signals()
@@ -1677,22 +2102,51 @@ class Form():
         objects.
 
         Returns a list of element object references."""
+        return self._index_elements()[0]
+
+    def _index_elements(self):
+        """Walk this Form's UI once, collecting all Element objects and
+        indexing them by their user-defined ID and their md5sum ID.
+
+        Returns a tuple of (list of element object references, dict mapping
+        user IDs to elements, list of the md5sum ID of each element in the
+        element list)."""
 
         # TODO: if two elements have the same ID, raise an exception with a
         # helpful error message.
         all_elements = []
+        element_index = {}
+        state_ids = []
+
+        def index_element(element):
+            # the md5sum ID is also the fallback user ID, so only hash once.
+            md5sum_id = element.get_id()
+            all_elements.append(element)
+            state_ids.append(md5sum_id)
+            element_index[element.config.get('id', md5sum_id)] = element
 
         def append_elements(element_list):
             for element in element_list:
                 if isinstance(element, Group):
                     if isinstance(element, Container):
-                        all_elements.append(element)
+                        index_element(element)
                     append_elements(element._elements)
                 else:
-                    all_elements.append(element)
+                    index_element(element)
 
         append_elements(self._ui._elements)
-        return all_elements
+        return all_elements, element_index, state_ids
+
+    def snapshot(self, include_state=True):
+        """Capture the value, validity, visibility, should_return status and
+        (optionally) the saveable state of every element in this form in a
+        single pass.
+
+            include_state - a boolean.  If False, element states are not
+                captured, and the snapshot cannot be saved with save_state().
+
+        Returns a FormSnapshot."""
+        return FormSnapshot(self.elements, include_state)
 
     def collect_arguments(self):
         """Collect arguments from all elements in this form into a single
@@ -1702,64 +2156,108 @@ class Form():
         the element is skipped.
 
         Returns a python dictionary."""
+        return self.snapshot(include_state=False).arguments()
 
-        # Create the args dictionary and pass it back to the Application.
-        args_dict = {}
-        for element in self.elements:
-            if element.should_return():
-                args_dict[element.config['args_id']] = element.value()
-            else:
-                try:
-                    args_id = element.config['args_id']
-                except KeyError:
-                    args_id = element.get_id('user')
-                LOGGER.debug('Element %s should not return, skipping args_id %s',
-                    element, args_id)
-        return args_dict
-
-    def save_state(self, uri):
-        """Assemble the state of all elements and save them to a json object.
+    def save_state(self, uri, snapshot=None, debug=False,
+                   state_format='json'):
+        """Assemble the state of all elements and save them to a file.
 
-            uri - a URI to the file where the dictionary should be saved as JSON
+            uri - a URI to the file where the dictionary should be saved.
+            snapshot=None - a FormSnapshot to save.  If None, a new snapshot
+                of the form is taken.
+            debug=False - a boolean.  If True, include each element's hashable
+                configuration in its state under the '_debug' key.
+            state_format='json' - the file format to write.  One of
+                fileio.STATE_FORMATS.
 
             Returns nothing."""
-        state_dict = {}
-        for element in self.elements:
-            element_id = element.get_id()
-            element_state = element.state()
-            try:
-                element_state['_debug'] = element._get_hashable_config()
-            except TypeError:
-                # happens when element_state is None, which can happen when the
-                # element is not a primitive.
-                pass
+        if snapshot is None:
+            snapshot = self.snapshot()
+        fileio.save_state(snapshot.state(debug), uri, state_format)
 
-            state_dict[element_id] = element_state
+    def autosave_lastrun(self, delay=2.0):
+        """Save element states to the lastrun file in the background whenever
+        element values change.  See fileio.LastrunStore.autosave().
 
-        utils.save_dict_to_json(state_dict, uri, 4)
+            delay=2.0 - the number of seconds to wait after a change before
+                saving.
+
+        Returns nothing."""
+        self.lastrun.autosave(self.elements, delay)
 
     def load_state(self, state_uri):
         """Load a state from a file on disk.
 
             state_uri - a URI to a file on disk from where the Form's state can
-                be loaded.
+                be loaded.  Any of the formats written by save_state() may be
+                loaded.
 
             Returns nothing."""
-        form_state = utils.load_json(state_uri)
-        for element in self.elements:
-            element_id = element.get_id()
+        self._apply_state(fileio.read_state(state_uri))
 
-            # get the state of the element that matches this ID.
-            try:
-                element_state = form_state[element_id]
+    def _apply_state(self, form_state):
+        """Apply a previously-saved form state to the elements of this form.
+
+            form_state - a python dictionary mapping element md5sum IDs to
+                element states, as written by save_state().
+
+            Returns nothing."""
+        with self.batch():
+            # md5sum IDs were computed when the form was indexed, so there's
+            # no need to re-hash each element's configuration here.
+            for element_id, element in zip(self._state_ids, self.elements):
+                # get the state of the element that matches this ID.
+                try:
+                    element_state = form_state[element_id]
+                except KeyError:
+                    # When an ID key is missing, it means that the developer
+                    # added an element or else changed the element enough for
+                    # it to not be recognizeable to palisades.  When this
+                    # happens, we can't set the state, so log a warning and
+                    # proceed.
+                    LOGGER.warn('Element ID %s (%s) does not have a saved state.',
+                        element_id, element.get_id('user'))
+                    continue
                 element.set_state(element_state)
-            except KeyError as missing_key:
-                # When an ID key is missing, it means that the developer added
-                # an element or else changed the element enough for it to not be
-                # recognizeable to palisades.  When this happens, we can't set
-                # the state, so log a warning and proceed.
-                LOGGER.warn('Element ID %s (%s) does not have a saved state.',
-                    missing_key, element.get_id('user'))
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Manage a context in which all element signals and validation are
+        deferred.
+
+        While inside this context, element signals are held and coalesced and
+        validation requests are recorded rather than started.  When the
+        context exits, each element emits at most one of each of its signals
+        and each element whose value changed is validated once.
+
+        Contexts may be nested; deferred signals are flushed when the
+        outermost context exits."""
+        elements = list(self.elements)
+        for element in elements:
+            element.hold_signals()
+        try:
+            yield self
+        finally:
+            for element in elements:
+                element.release_signals()
+
+    def bulk_update(self, values):
+        """Set the values of many elements at once, flushing a single round of
+        signals and validation when all values have been applied.
+
+            values - a python dictionary mapping user-defined element IDs to
+                the new value of that element.
+
+        Raises KeyError if an element ID is not known to the form.
+
+        Returns nothing."""
+        # Look up all elements first so an unknown ID leaves the form untouched.
+        element_index = self.element_index
+        updates = [(element_index[element_id], new_value)
+                   for element_id, new_value in values.iteritems()]
+        with self.batch():
+            for element, new_value in updates:
+                element.set_value(new_value)
 
     def lastrun_uri(self):
         """Fetch the URI for the internal lastrun save file."""
@@ -1775,76 +2273,60 @@ class Form():
         LOGGER.debug('Lastrun URI: %s', lastrun_uri)
         return lastrun_uri
 
-    def form_is_valid(self):
-        """Check if all the inputs in this form are valid.  Returns True if so,
-        a list of tuples if not.  Tuples indicate failed"""
-        # Check the validity of all inputs
-        form_data = []
+    def validate_inputs(self):
+        """Validate every input in this form and wait for the results, rather
+        than recording them in the background.  Returns nothing."""
         for element in self.elements:
-            try:
-                form_data.append((element.config['args_id'], element.is_valid(),
-                    element.should_return(), element.is_required(),
-                    element.is_visible(), element.value()))
-            except KeyError:
-                # no attribute args_id, so skip.
-                pass
-
-
-        def element_ok_for_submission(args_id, is_valid, should_return,
-                is_required, is_visible, value):
-            """Check that this element is ok for submission.  Returns a
-            boolean."""
-            if not is_visible:
-                return True
-            if not should_return:  # element should not return, so ignore
-                return True
-            if not is_valid and is_required:
-                return False
-            if is_valid and should_return is True: # is valid, should return
-                return True
-            return False  # otherwise, element should not return
-
-        element_validity = [element_ok_for_submission(*x) for x in form_data]
+            if isinstance(element, Primitive):
+                element.validate(join=True)
 
-        #print "VALID | args_id, is_valid, should_return, is_required, is_visible"
-        #for element, valid in zip(form_data, element_validity):
-        #    print valid, element
-
-        return all(element_validity)
+    def form_is_valid(self):
+        """Check if all the inputs in this form are valid.  Returns a
+        boolean."""
+        return self.snapshot(include_state=False).is_valid()
 
     def form_errors(self):
         """Return a list of tuples containing (args_id, value) that are invalid
         values."""
-        invalid_inputs = []
-        for element in self.elements:
-            if not element.is_visible():
-                continue  # skip elements that are hidden from view.
-
-            if not element.is_valid() and element.should_return():
-                invalid_inputs.append((element.config['args_id'], element.value()))
-        return invalid_inputs
+        return self.snapshot(include_state=False).errors()
 
     def save_to_python(self, filename):
         """Save the form's data to an exacuteable python file at filename"""
-        if not self.form_is_valid():
-            raise InvalidData(self.form_errors())
+        snapshot = self.snapshot(include_state=False)
+        if not snapshot.is_valid():
+            raise InvalidData(snapshot.errors())
         else:
-            try:
-                function_name = self._ui.config['targetFunction']
-            except KeyError:
-                function_name = 'execute'
-            file_path = self._ui.config['targetScript']
-
-            fileio.save_model_run(self.collect_arguments(), file_path,
+            file_path, function_name = self.target()
+            fileio.save_model_run(snapshot.arguments(), file_path,
                     filename, function_name)
 
+    def target(self):
+        """Get the model this form runs.
+
+        Returns a tuple of (targetScript module string, function name)."""
+        try:
+            function_name = self._ui.config['targetFunction']
+        except KeyError:
+            function_name = 'execute'
+        return self._ui.config['targetScript'], function_name
+
     def set_runner(self, runner_class):
         """Set the runner class that should be used for this form.
         Runner_class should provide the same interface as and similar
         functionality to execution.PythonRunner."""
         self._runner_class = runner_class
 
-    def submit(self, event=None, workspace_can_exist=False):
+    def check_submission(self, workspace_can_exist=False):
+        """Check that this form can be submitted: the submission_requested
+        callbacks (including the workspace check) must not raise and every
+        input must be valid.
+
+            workspace_can_exist=False - a boolean.  If False, WorkspaceExists
+                is raised when the workspace already contains files.
+
+        Raises WorkspaceExists or InvalidData.
+
+        Returns the FormSnapshot that was checked."""
         LOGGER.debug('Starting the form submission process')
 
         # User has the opportunity to raise InvalidData here
@@ -1875,31 +2357,33 @@ class Form():
             if other_exceptions:
                 raise InvalidData(other_exceptions)
 
-        # if success, assemble the arguments dictionary and send it off to the
-        # base Application
-        if not self.form_is_valid():
-            raise InvalidData(self.form_errors())
-        else:
-            # save the current state of the UI to the lastrun location.
-            self.save_state(self.lastrun_uri())
+        # Validity, lastrun state and arguments all come from the same
+        # snapshot of the form.
+        snapshot = self.snapshot()
+        if not snapshot.is_valid():
+            raise InvalidData(snapshot.errors())
+        return snapshot
 
-            args_dict = self.collect_arguments()
+    def submit(self, event=None, workspace_can_exist=False):
+        snapshot = self.check_submission(workspace_can_exist)
 
-            # TODO: submit the args dict and other relevant data back to app.
-            try:
-                try:
-                    function_name = self._ui.config['targetFunction']
-                except KeyError:
-                    function_name = 'execute'
+        # save the current state of the UI to the lastrun location.  Only
+        # the states that changed since the last save are re-serialized.
+        self.lastrun.save(snapshot.state())
 
-                self.runner = self._runner_class(self._ui.config['targetScript'],
-                    args_dict, function_name)
-                self.submitted.emit(True)
-            except ImportError as error:
-                LOGGER.error('Problem loading %s', self._ui.config['targetScript'])
-                raise
+        args_dict = snapshot.arguments()
 
-            self.runner.start()
+        # TODO: submit the args dict and other relevant data back to app.
+        target_script, function_name = self.target()
+        try:
+            self.runner = self._runner_class(target_script, args_dict,
+                                             function_name)
+            self.submitted.emit(True)
+        except ImportError as error:
+            LOGGER.error('Problem loading %s', target_script)
+            raise
+
+        self.runner.start()
 
     def reset_values(self):
         for element in self.elements:
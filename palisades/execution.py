@@ -10,51 +10,125 @@ import contextlib
 import tempfile
 import pprint
 import traceback
+import json
+import subprocess
+import copy
+import Queue
+import collections
+import hashlib
 
 from palisades.utils import Communicator
 from palisades.utils import RepeatingTimer
+from palisades.utils import load_json
+from palisades.utils import write_atomic
 
 LOGGER = logging.getLogger('palisades.execution')
 
+# The maximum number of log records waiting to be handled by a LogManager.
+LOG_QUEUE_SIZE = 10000
+
+
+_TEMP_VARIABLES = ['TMP', 'TEMP', 'TEMPDIR']
+_TEMPDIR_LOCK = threading.Lock()
+_ACTIVE_TEMPDIRS = []  # tempdirs of the active patch_tempdir() contexts
+_SAVED_TEMP_ENVIRONMENT = {}  # values of _TEMP_VARIABLES before patching
+_SAVED_TEMPFILE_TEMPDIR = [None]  # tempfile.tempdir before patching
+_THREAD_TEMPDIR = threading.local()
+_ORIGINAL_GETTEMPDIR = tempfile.gettempdir
+
+
+def _routed_gettempdir():
+    """Replacement for tempfile.gettempdir() that is installed by
+    patch_tempdir().  Returns the tempdir of the calling thread's
+    patch_tempdir() context if it has one, otherwise the tempdir of the most
+    recently entered active context, otherwise python's default."""
+    tempdir_path = getattr(_THREAD_TEMPDIR, 'path', None)
+    if tempdir_path is not None:
+        return tempdir_path
+    with _TEMPDIR_LOCK:
+        if _ACTIVE_TEMPDIRS:
+            return _ACTIVE_TEMPDIRS[-1]
+    return _ORIGINAL_GETTEMPDIR()
+
+
+def _set_temp_environment(tempdir_path):
+    """Point the tempdir environment variables and ``tempfile.tempdir`` at
+    tempdir_path, or restore their saved values if tempdir_path is None.
+    Must be called with _TEMPDIR_LOCK held.  Returns nothing."""
+    if tempdir_path is not None:
+        tempfile.tempdir = tempdir_path
+    else:
+        tempfile.tempdir = _SAVED_TEMPFILE_TEMPDIR[0]
+
+    for env_varname in _TEMP_VARIABLES:
+        if tempdir_path is not None:
+            LOGGER.debug('Setting $%s=%s', env_varname, tempdir_path)
+            os.environ[env_varname] = tempdir_path
+        else:
+            old_value = _SAVED_TEMP_ENVIRONMENT[env_varname]
+            LOGGER.debug('Restoring former value of $%s=%s', env_varname,
+                         old_value)
+            if not old_value:
+                os.environ.pop(env_varname, None)
+            else:
+                os.environ[env_varname] = old_value
+
 
 @contextlib.contextmanager
 def patch_tempdir(tempdir_path):
     """Manage a context with tempfiles saved to a defined directory.
 
-    When inside of this activated context, the environment variables
-    ``TMP``, ``TEMP``, and ``TEMPDIR``, as well as ``tempfile.tempdir``, will
-    all be set to the ``tempdir_path`` parameter.  These values will be
-    restored to their original states when the context manager exits.
+    When inside of this activated context, the functions of python's
+    ``tempfile`` module called from this thread create their files in
+    ``tempdir_path``.  Each thread is routed separately, so several runs in
+    one process can each have their own tempdir.  Threads that aren't in a
+    context use the tempdir of the most recently entered active context.
+
+    The routing is done by replacing ``tempfile.gettempdir``, which is only
+    replaced while at least one context is active.  The original function is
+    put back when the last active context exits.
+
+    ``tempfile.tempdir`` and the environment variables ``TMP``, ``TEMP``, and
+    ``TEMPDIR`` are shared by the whole process (and the variables are
+    inherited by child processes), so they are set to the tempdir of the most
+    recently entered active context, and restored to their original values
+    when no context is active.  Code that reads ``tempfile.tempdir`` directly
+    therefore sees that tempdir rather than its own thread's.  Runs that need
+    these isolated as well should run in separate processes (see
+    SubprocessRunner).
 
     Parameters:
         tempdir_path (string): The path to the new folder where tempfiles
-            should be saved.  See python's ``tempfile`` documentation for
-            details.
+            should be saved, or None to leave the tempdir unchanged.  See
+            python's ``tempfile`` documentation for details.
     """
-    old_env_values = {}
-    for tmp_variable in ['TMP', 'TEMP', 'TEMPDIR']:
-        LOGGER.debug('Setting $%s=%s', tmp_variable, tempdir_path)
-        try:
-            current_value = os.environ[tmp_variable]
-        except KeyError:
-            current_value = None
-        old_env_values[tmp_variable] = current_value
-
-        os.environ[tmp_variable] = tempdir_path
-
-    old_tempdir = tempfile.tempdir
-    tempfile.tempdir = tempdir_path
-
-    yield
-
-    tempfile.tempdir = old_tempdir
-    for env_varname, old_value in old_env_values.iteritems():
-        LOGGER.debug('Restoring former value of $%s=%s', env_varname,
-                     old_value)
-        if not old_value:
-            del os.environ[env_varname]
-        else:
-            os.environ[env_varname] = old_value
+    if tempdir_path is None:
+        yield
+        return
+
+    with _TEMPDIR_LOCK:
+        if not _ACTIVE_TEMPDIRS:
+            tempfile.gettempdir = _routed_gettempdir
+            _SAVED_TEMPFILE_TEMPDIR[0] = tempfile.tempdir
+            for env_varname in _TEMP_VARIABLES:
+                _SAVED_TEMP_ENVIRONMENT[env_varname] = os.environ.get(
+                    env_varname)
+        _ACTIVE_TEMPDIRS.append(tempdir_path)
+        _set_temp_environment(tempdir_path)
+
+    previous_thread_tempdir = getattr(_THREAD_TEMPDIR, 'path', None)
+    _THREAD_TEMPDIR.path = tempdir_path
+    try:
+        yield
+    finally:
+        _THREAD_TEMPDIR.path = previous_thread_tempdir
+        with _TEMPDIR_LOCK:
+            _ACTIVE_TEMPDIRS.remove(tempdir_path)
+            if _ACTIVE_TEMPDIRS:
+                _set_temp_environment(_ACTIVE_TEMPDIRS[-1])
+            else:
+                _set_temp_environment(None)
+                tempfile.gettempdir = _ORIGINAL_GETTEMPDIR
 
 
 class ThreadFilter(logging.Filter):
@@ -84,26 +158,92 @@ class PalisadesFilter(logging.Filter):
         return True
 
 
+def _message_template(msg):
+    """Convert the msg of a log record, which may be any object, to a unicode
+    string.  Returns a unicode string."""
+    try:
+        return unicode(msg)
+    except UnicodeError:
+        return repr(msg)
+
+
 class ErrorQueueFilter(logging.Filter):
     """When used, this filters for log messages that have a user-defined log
     level or greated and tracks matching messages.
     This is useful for accumulating log messages for the end of a script run.
 
+    Only the first and the last max_records matching records are kept.
+    Every matching record is counted, grouped by its logger, level and
+    message template (the message before its arguments are merged), so that
+    a model that logs the same warning many times can be summarized.  At most
+    max_groups groups are counted separately; records that would start a new
+    group after that are counted together.
+
     Arguments passed to the constructor:
         threshold - an int.  Defaults to logging.WARNING (30)
+        max_records - an int.  Defaults to 10.
+        max_groups - an int.  Defaults to 100.
     """
-    def __init__(self, threshold=logging.WARNING):
+    OTHER_GROUP = ('', '', '(other messages)')
+
+    def __init__(self, threshold=logging.WARNING, max_records=10,
+                 max_groups=100):
         logging.Filter.__init__(self)
         self.threshold = threshold
-        self._queue = []
+        self.max_records = max_records
+        self.max_groups = max_groups
+        self._first_records = []
+        self._last_records = collections.deque(maxlen=max_records)
+        self._counts = {}
+        self._total = 0
 
     def filter(self, record):
         if record.levelno >= self.threshold:
-            self._queue.append(record)
+            self._total += 1
+            if len(self._first_records) < self.max_records:
+                self._first_records.append(record)
+            else:
+                self._last_records.append(record)
+
+            group = (record.name, record.levelname, _message_template(
+                getattr(record, 'msg_template', record.msg)))
+            if (group not in self._counts and
+                    len(self._counts) >= self.max_groups):
+                group = self.OTHER_GROUP
+            self._counts[group] = self._counts.get(group, 0) + 1
         return True
 
     def get_errors(self):
-        return self._queue
+        """Return the kept records, oldest first."""
+        return self._first_records + list(self._last_records)
+
+    def get_records(self):
+        """Return a tuple of (list of the first records kept, list of the last
+        records kept).  Records logged between the two were not kept."""
+        return self._first_records[:], list(self._last_records)
+
+    def count(self):
+        """Return the number of matching records, including those that were
+        not kept."""
+        return self._total
+
+    def summary(self):
+        """Count the matching records in each group.  Returns a list of tuples
+        of (count, logger name, level name, message template), largest count
+        first."""
+        return sorted([(count,) + group for group, count in
+                       self._counts.iteritems()],
+                      key=lambda row: (-row[0], row[1:]))
+
+    def format_summary(self):
+        """Render summary() as a table.  Returns a string."""
+        rows = self.summary()
+        name_width = max([len('Logger')] + [len(row[1]) for row in rows])
+        row_format = u'%8s  %-8s  %-' + str(name_width) + u's  %s'
+        lines = [row_format % ('Count', 'Level', 'Logger', 'Message')]
+        for count, name, level_name, template in rows:
+            lines.append(row_format % (count, level_name, name, template))
+        return u'\n'.join(lines)
 
 
 class TimedProgressLoggingFilter:
@@ -128,13 +268,421 @@ class TimedProgressLoggingFilter:
         return False
 
 
+class QueueHandler(logging.Handler):
+    """A logging handler that puts log records on a queue, to be handled in
+    another thread by a QueueListener.  (logging.handlers.QueueHandler is
+    not available in python 2.)
+
+    When the queue is bounded and full, progress records (records with a
+    'progress' attribute, see utils.ProgressLoggerAdapter) are dropped and
+    counted in the dropped attribute.  Other records wait for space.
+    """
+    def __init__(self, queue):
+        logging.Handler.__init__(self)
+        self.queue = queue
+        self.dropped = 0
+        self._exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        """Copy a record and make it safe to handle in another thread: the
+        message is merged with its arguments, which may change after this
+        returns, and the traceback is formatted.
+
+        Returns the copied record."""
+        record = copy.copy(record)
+        record.msg_template = getattr(record, 'msg_template', record.msg)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self._exception_formatter.formatException(
+                    record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            record = self.prepare(record)
+            if hasattr(record, 'progress'):
+                try:
+                    self.queue.put_nowait(record)
+                except Queue.Full:
+                    self.dropped += 1
+            else:
+                self.queue.put(record)
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+    """Handle the log records put on a queue by a QueueHandler with a set of
+    handlers, in a background thread.  The filters and formatters of the
+    handlers run in that thread rather than in the thread that logged the
+    record."""
+    def __init__(self, queue):
+        self.queue = queue
+        self.handlers = []
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def add_handler(self, handler):
+        """Handle records with handler as well.  Returns nothing."""
+        with self.lock:
+            self.handlers.append(handler)
+
+    def remove_handler(self, handler):
+        """Stop handling records with handler.  Returns nothing."""
+        with self.lock:
+            if handler in self.handlers:
+                self.handlers.remove(handler)
+
+    def start(self):
+        """Start handling records in a background thread.  Returns
+        nothing."""
+        self._thread = threading.Thread(target=self._handle_records,
+                                        name='log_listener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def flush(self):
+        """Block until every record put on the queue so far has been handled.
+        Returns nothing."""
+        self.queue.join()
+
+    def stop(self):
+        """Handle the records remaining on the queue and stop the background
+        thread.  Returns nothing."""
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def handle(self, record):
+        """Pass a record to each handler whose level it meets.  Returns
+        nothing."""
+        with self.lock:
+            handlers = self.handlers[:]
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _handle_records(self):
+        """Handle records from the queue until None is received.  Returns
+        nothing."""
+        while True:
+            record = self.queue.get()
+            try:
+                if record is None:
+                    return
+                self.handle(record)
+            finally:
+                self.queue.task_done()
+
+
+class LogRouter(logging.Handler):
+    """A logging handler that passes each record to the handlers registered
+    for the thread that logged it, found by the record's threadName.
+
+    Finding a record's handlers is a single dictionary lookup, so the cost
+    of a record doesn't grow with the number of runs logging at once.  The
+    router adds itself to logger when its first route is added, and removes
+    itself when its last route is removed.
+    """
+    def __init__(self, logger):
+        logging.Handler.__init__(self)
+        self.logger = logger
+        self._routes_lock = threading.Lock()
+        # replaced rather than modified, so handle() can read it without
+        # taking the lock.
+        self._routes = {}
+
+    def add_route(self, thread_name, handler):
+        """Pass the records logged from the thread named thread_name to
+        handler.  Returns nothing."""
+        with self._routes_lock:
+            routes = self._routes.copy()
+            routes[thread_name] = routes.get(thread_name, ()) + (handler,)
+            self._routes = routes
+            self.logger.addHandler(self)
+
+    def remove_route(self, thread_name, handler):
+        """Stop passing the records logged from the thread named thread_name
+        to handler.  Returns nothing."""
+        with self._routes_lock:
+            routes = self._routes.copy()
+            handlers = tuple(route_handler for route_handler in
+                             routes.get(thread_name, ())
+                             if route_handler is not handler)
+            if handlers:
+                routes[thread_name] = handlers
+            else:
+                routes.pop(thread_name, None)
+            self._routes = routes
+            if not routes:
+                self.logger.removeHandler(self)
+
+    def handle(self, record):
+        # Overridden so that records from different threads don't wait on
+        # this handler's lock.
+        handlers = self._routes.get(record.threadName, ())
+        for handler in handlers:
+            handler.handle(record)
+        return len(handlers) > 0
+
+    def emit(self, record):
+        self.handle(record)
+
+
+# Routes the records logged by each run's thread to its LogManager.
+LOG_ROUTER = LogRouter(logging.getLogger())
+
+
+class RunCancelled(Exception):
+    """Raised by check_cancelled() when the run has been cancelled."""
+    pass
+
+
+class CancellationToken(object):
+    """A flag indicating that a run should stop.  The token is set by the
+    run's executor when the run is cancelled; models check it cooperatively
+    (see cancel_requested() and check_cancelled())."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request that the run stop.  Returns nothing."""
+        self._event.set()
+
+    def is_cancelled(self):
+        """Whether the run has been asked to stop.  Returns a boolean."""
+        return self._event.is_set()
+
+
+# The cancellation token of the run executing in the current thread, if any.
+_RUN_CONTEXT = threading.local()
+
+
+def current_token():
+    """Get the cancellation token of the run executing in the current thread.
+
+    Returns a CancellationToken, or None if the current thread is not running
+    a model."""
+    return getattr(_RUN_CONTEXT, 'token', None)
+
+
+def cancel_requested():
+    """Whether the run executing in the current thread has been cancelled.
+    Models may call this periodically to stop early.  Returns a boolean."""
+    token = current_token()
+    return token is not None and token.is_cancelled()
+
+
+def check_cancelled():
+    """Raise RunCancelled if the run executing in the current thread has been
+    cancelled.  Models may call this periodically to stop early.
+
+    Returns nothing."""
+    if cancel_requested():
+        raise RunCancelled('Run cancelled')
+
+
+@contextlib.contextmanager
+def _run_context(token):
+    """Manage a context in which token is the current thread's cancellation
+    token."""
+    previous_token = current_token()
+    _RUN_CONTEXT.token = token
+    try:
+        yield
+    finally:
+        _RUN_CONTEXT.token = previous_token
+
+
+def parse_progress(progress):
+    """Interpret the 'progress' attribute attached to a log record by
+    utils.ProgressLoggerAdapter.
+
+        progress - either a number between 0 and 1 indicating the fraction of
+            the work that is complete, or a (completed, total) tuple of
+            numbers of work units.
+
+    Returns a tuple of (fraction complete, completed units, total units).  The
+    units are None if progress is a fraction.  Raises ValueError if progress
+    can't be interpreted."""
+    try:
+        if isinstance(progress, (tuple, list)):
+            completed, total = map(float, progress)
+            if total <= 0:
+                raise ValueError('Total work must be positive, %s found' %
+                                 total)
+            return (min(max(completed / total, 0.0), 1.0), completed, total)
+        return (min(max(float(progress), 0.0), 1.0), None, None)
+    except TypeError:
+        raise ValueError('Cannot interpret progress %r' % (progress,))
+
+
+class ProgressMonitor(logging.Handler):
+    """A logging handler that tracks the progress of a run from the
+    'progress' attribute of the log records that have one (see
+    utils.ProgressLoggerAdapter and parse_progress()).
+
+    Every progress record updates the monitor's status, a dictionary with
+    these keys:
+        'fraction' - the fraction of the work complete, between 0 and 1.
+        'completed', 'total' - the numbers of work units completed and in
+            total, or None if progress is reported as a fraction.
+        'elapsed' - the seconds since the monitor was started.
+        'eta' - the estimated seconds remaining, or None if unknown.
+        'throughput' - the work units completed per second (or the fraction
+            completed per second, if there are no units), or None if unknown.
+        'message' - the message of the log record.
+
+    The status is emitted by the progress_changed communicator at most once
+    per interval seconds, and always when the work is complete.  Unlike the
+    logfile, the monitor sees every progress record; it does not go through
+    TimedProgressLoggingFilter."""
+    def __init__(self, interval=0.25):
+        logging.Handler.__init__(self)
+        self.interval = interval
+        self.progress_changed = Communicator('progress_changed')
+        self.start_time = time.time()
+        self._last_emit_time = None
+        self._status = None
+
+    def start(self):
+        """Reset the monitor at the start of a run.  Returns nothing."""
+        self.start_time = time.time()
+        self._last_emit_time = None
+        self._status = None
+
+    def status(self):
+        """Get the most recent progress status.  Returns a dictionary, or None
+        if no progress has been reported."""
+        return self._status
+
+    def emit(self, record):
+        try:
+            progress = record.progress
+        except AttributeError:
+            return
+
+        try:
+            fraction, completed, total = parse_progress(progress)
+        except ValueError as error:
+            LOGGER.debug('Ignoring progress: %s', error)
+            return
+
+        current_time = time.time()
+        elapsed = current_time - self.start_time
+        if fraction > 0 and elapsed > 0:
+            eta = elapsed * (1.0 - fraction) / fraction
+            throughput = (completed if completed is not None
+                          else fraction) / elapsed
+        else:
+            eta = None
+            throughput = None
+
+        self._status = {
+            'fraction': fraction,
+            'completed': completed,
+            'total': total,
+            'elapsed': elapsed,
+            'eta': eta,
+            'throughput': throughput,
+            'message': record.getMessage(),
+        }
+
+        if (fraction >= 1.0 or self._last_emit_time is None or
+                current_time - self._last_emit_time >= self.interval):
+            self._last_emit_time = current_time
+            self.progress_changed.emit(self._status.copy())
+
+
+# Modules found by locate_module(), keyed by the module string (the absolute
+# path for source files).  Values are tuples of (module, module name, source
+# file signature), where the signature is None for modules imported from the
+# python path.
+_MODULE_CACHE = {}
+_MODULE_CACHE_LOCK = threading.Lock()
+
+
+def _source_signature(uri):
+    """Get a signature of a source file that changes when the file is edited.
+    Returns a tuple of (modification time, size in bytes)."""
+    file_stat = os.stat(uri)
+    return (file_stat.st_mtime, file_stat.st_size)
+
+
+def _source_module_name(uri):
+    """Get the name a source file is loaded under, which is unique to the
+    file's absolute path.  Returns a string."""
+    uri = os.path.abspath(uri)
+    return 'palisades_model_%s' % hashlib.md5(uri).hexdigest()
+
+
 def locate_module(module):
     """Locate and import the requested module.
 
+    Modules are only located and imported once.  A source file on disk is
+    executed again only if it has been modified since it was last loaded.
+
         module - a python string, either in python's package.subpackage.module
             notation or a URI on disk.
 
         Returns a tuple of (executeable module, module name)"""
+    if os.path.isfile(module):
+        cache_key = os.path.abspath(module)
+        signature = _source_signature(module)
+    else:
+        cache_key = module
+        signature = None
+
+    # Holding the lock while importing keeps concurrent callers from
+    # executing the same source file twice.
+    with _MODULE_CACHE_LOCK:
+        try:
+            model, model_name, cached_signature = _MODULE_CACHE[cache_key]
+            if cached_signature == signature:
+                LOGGER.debug('Found %s in the module cache', module)
+                return (model, model_name)
+            LOGGER.debug('%s has changed since it was loaded', module)
+        except KeyError:
+            pass
+
+        model, model_name = _import_module(module)
+        _MODULE_CACHE[cache_key] = (model, model_name, signature)
+        return (model, model_name)
+
+
+def preload_modules(modules):
+    """Locate and import modules in a background thread, so that a later
+    locate_module() call for one of them returns immediately.  A module that
+    can't be imported is skipped; the error is raised again when the module is
+    located for use.
+
+        modules - a list of module strings (see locate_module()).
+
+    Returns the started threading.Thread."""
+    def _preload():
+        for module in modules:
+            try:
+                locate_module(module)
+            except Exception as error:
+                # We deliberately want to catch all possible exceptions.
+                LOGGER.warning('Could not preload module %s: %s', module,
+                               error)
+
+    preload_thread = threading.Thread(target=_preload, name='preload_modules')
+    preload_thread.daemon = True
+    preload_thread.start()
+    return preload_thread
+
+
+def _import_module(module):
+    """Import the requested module, trying each of the ways a module string
+    can be resolved.  See locate_module().
+
+    Returns a tuple of (executeable module, module name)"""
 
     LOGGER.debug('Trying to import %s', module)
     try:
@@ -147,7 +695,9 @@ def locate_module(module):
         model_name = model.__name__
         LOGGER.debug('Found %s in sys.modules', module)
     elif os.path.isfile(module):
-        model = imp.load_source('model', module)
+        # Each source file gets its own entry in sys.modules, so loading
+        # another file can't replace the code of a module already located.
+        model = imp.load_source(_source_module_name(module), module)
         # Model name is name of module file, minus the extension
         model_name = os.path.splitext(os.path.basename(module))[0]
         LOGGER.debug('Loading %s from %s', model_name, model)
@@ -225,10 +775,14 @@ def _get_module_from_path(module_list, path=None):
         Returns None if not."""
 
     LOGGER.debug('Importing module list %s.', module_list)
+    if isinstance(path, basestring):
+        path = [path]
     if path is not None:
-        LOGGER.debug('Adding to path %s', path)
-        sys.path += path  # path is expected to be a list of URIs.
-        LOGGER.debug(sys.path)
+        # only add folders that aren't already on the path, so that repeated
+        # imports don't grow sys.path.
+        new_folders = [folder for folder in path if folder not in sys.path]
+        LOGGER.debug('Adding to path %s', new_folders)
+        sys.path.extend(new_folders)
 
     current_name = module_list[0]
     module_info = imp.find_module(current_name, path)
@@ -246,6 +800,30 @@ def _get_module_from_path(module_list, path=None):
         return imported_module
 
 
+def _prepare_workspace(args, module_name):
+    """Create the workspace and temporary folders for a run of module_name
+    with args, and pick a name for the run's logfile.
+
+        args - a python dictionary of arguments.  Must have a 'workspace_dir'
+            key.
+        module_name - a string name of the model to run.
+
+    Returns a tuple of (logfile URI, temporary folder URI)."""
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d--%H_%M_%S")
+    filename = '%s-log-%s.txt' % (module_name, timestamp)
+
+    tempdir = os.path.join(args['workspace_dir'], 'tmp')
+    for path in [args['workspace_dir'], tempdir]:
+        try:
+            os.makedirs(path)
+        except OSError:
+            # folder already exists, so no need to do anything else.
+            pass
+
+    log_file_uri = os.path.join(args['workspace_dir'], filename)
+    return log_file_uri, tempdir
+
+
 # TODO: Need ability to run some things pre-run:
 #  * redirect temp folder to workspace
 #  * make the workspace
@@ -274,26 +852,27 @@ class PythonRunner():
             '%s (%s) found instead' % (args, type(args)))
 
         module, module_name = locate_module(module_string)
-
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d--%H_%M_%S")
-        filename = '%s-log-%s.txt' % (module_name, timestamp)
-
-        tempdir = os.path.join(args['workspace_dir'], 'tmp')
-        for path in [args['workspace_dir'], tempdir]:
-            try:
-                os.makedirs(tempdir)
-            except OSError:
-                # folder already exists, so no need to do anything else.
-                pass
-
-        log_file_uri = os.path.join(args['workspace_dir'], filename)
-        self.executor = Executor(module, args, func_name, log_file_uri, tempdir=tempdir)
+        log_file_uri, tempdir = _prepare_workspace(args, module_name)
+        self._setup(Executor(module, args, func_name, log_file_uri,
+                             tempdir=tempdir), args)
+
+    def _setup(self, executor, args):
+        """Set up the communicators and status attributes of this runner
+        around the executor that will run the model.  Returns nothing."""
+        self.executor = executor
         self._checker = RepeatingTimer(0.1, self._check_executor)
         self.args = args
 
         self.started = Communicator()
         self.finished = Communicator()
+
+        # The executor is discarded when it finishes, so keep the monitor to
+        # report the final progress.
+        self._progress_monitor = self.executor.progress_monitor
+        self.progress_changed = self._progress_monitor.progress_changed
         self.failed = None
+        self.cancelled = False
+        self.exception = None
         self.traceback = None
 
     def start(self):
@@ -303,6 +882,8 @@ class PythonRunner():
         Returns nothing."""
 
         self.failed = None
+        self.cancelled = False
+        self.exception = None
         self.traceback = None
 
         self.executor.start()
@@ -314,6 +895,29 @@ class PythonRunner():
         self.started.emit(thread_name=self.executor.name,
                           thread_args=self.args)
 
+    def cancel(self, grace_period=5.0):
+        """Ask the run to stop.  The model is signalled cooperatively (see
+        check_cancelled()).  A model running in this process can't be forced
+        to stop, so it stops when it next checks for cancellation.
+
+            grace_period=5.0 - the number of seconds a model running in a
+                separate process is given to stop before it is terminated.
+                Ignored by this runner.
+
+        When the run stops, finished is emitted with thread_cancelled=True.
+
+        Returns nothing."""
+        executor = self.executor
+        if executor is not None:
+            executor.cancel(grace_period)
+
+    def progress(self):
+        """Get the most recent progress reported by the run.  See
+        ProgressMonitor for the keys of the status dictionary.
+
+        Returns a dictionary, or None if no progress has been reported."""
+        return self._progress_monitor.status()
+
     def is_finished(self):
         """Check whether the current executor thread is active.
         Returns a boolean."""
@@ -329,25 +933,69 @@ class PythonRunner():
         if not self.executor.is_alive():
             self._checker.cancel()
             self.failed = self.executor.failed
+            self.cancelled = self.executor.cancelled
+            self.exception = self.executor.exception
             self.traceback = self.executor.traceback
             self.finished.emit(thread_name=self.executor.name,
                                thread_failed=self.executor.failed,
-                               thread_traceback=self.executor.traceback)
+                               thread_traceback=self.executor.traceback,
+                               thread_cancelled=self.executor.cancelled)
             del self.executor
             self.executor = None
 
 
+class SubprocessRunner(PythonRunner):
+    """A PythonRunner that runs the model in a separate python process.
+
+    The model can't block the GUI process by holding the GIL, changes it
+    makes to the process environment (such as the temporary folder) don't
+    leak into the GUI process, and a crash of the model doesn't take the GUI
+    down with it.  Log records from the model are sent back to this process
+    and handled by the executor's LogManager as if the model had run in a
+    thread here.
+
+    The model's arguments are sent to the process as JSON, so they must be
+    JSON-serializable (tuples are received as lists).
+
+    When the run is cancelled, the model is first signalled cooperatively and
+    its process is terminated if it hasn't stopped after the grace period."""
+    def __init__(self, module_string, args, func_name='execute'):
+        """Initialization function for the SubprocessRunner class.  The
+        arguments are the same as for PythonRunner; the module is only
+        imported in the model's process."""
+
+        assert isinstance(args, dict), ('Args must be a dict, '
+            '%s (%s) found instead' % (args, type(args)))
+
+        if os.path.isfile(module_string):
+            module_name = os.path.splitext(os.path.basename(module_string))[0]
+        else:
+            module_name = module_string.split('.')[-1]
+        log_file_uri, tempdir = _prepare_workspace(args, module_name)
+        self._setup(SubprocessExecutor(module_string, args, func_name,
+                                       log_file_uri, tempdir=tempdir), args)
+
+
 class LogManager():
     LOG_FMT = "%(asctime)s %(name)-18s %(levelname)-8s %(message)s"
     DATE_FMT = "%m/%d/%Y %H:%M:%S "
 
-    def __init__(self, thread_name, log_uri=None):
+    def __init__(self, thread_name, log_uri=None,
+                 max_queue_size=LOG_QUEUE_SIZE):
         """Initialization function for the LogManager.
 
             thread_name - A string. Log messsages will only be recorded from
                 this thread.
             log_uri=None - a URI or None.  If a URI is given, all logging will
                 be saved to that file.
+            max_queue_size=LOG_QUEUE_SIZE - the maximum number of records
+                waiting to be handled.  When the queue is full, progress
+                records are dropped and other records wait.
+
+        The thread that logs a record only looks up its LogManager (see
+        LOG_ROUTER) and puts the record on that manager's queue.  Filtering, formatting and output to the logfile and to the
+        handlers added with add_log_handler() happen in a background
+        listener thread.
         """
         self.log_uri = log_uri
         self.thread_name = thread_name
@@ -361,18 +1009,22 @@ class LogManager():
         else:
             self.logfile_handler = logging.NullHandler()
 
-        self.thread_filter = ThreadFilter(thread_name)
         self.error_queue_filter = ErrorQueueFilter()
         self.palisades_filter = PalisadesFilter()
         self.timed_filter = TimedProgressLoggingFilter(interval=5)
 
-        self.logfile_handler.addFilter(self.thread_filter)
         self.logfile_handler.addFilter(self.palisades_filter)
         self.logfile_handler.addFilter(self.error_queue_filter)
         self.logfile_handler.addFilter(self.timed_filter)
         self.logfile_handler.setFormatter(self._file_formatter)
 
-        self.logger.addHandler(self.logfile_handler)
+        self.log_queue = Queue.Queue(max_queue_size)
+        self.queue_handler = QueueHandler(self.log_queue)
+        self.listener = QueueListener(self.log_queue)
+        self.listener.add_handler(self.logfile_handler)
+        self.listener.start()
+
+        LOG_ROUTER.add_route(thread_name, self.queue_handler)
 
     def print_args(self, args):
         """Log the input arguments dictionary to this manager's logfile.
@@ -395,47 +1047,96 @@ class LogManager():
         args_string = "Printing arguments\nArguments:\n%s\n" % args_string
         self.logger.info(args_string)
 
+        # Make sure the arguments are on disk before the model starts.
+        self.flush()
+
+    def flush(self):
+        """Block until every record logged so far has been handled.  Returns
+        nothing."""
+        self.listener.flush()
+
     def print_errors(self):
         """Print all logging errors"""
-        error_records = self.error_queue_filter.get_errors()
-        if len(error_records) > 0:
-            self.logfile_handler.removeFilter(self.error_queue_filter)
+        # the errors are collected as records are handled.
+        self.flush()
+        error_filter = self.error_queue_filter
+        if error_filter.count() > 0:
+            first_records, last_records = error_filter.get_records()
+            self.logfile_handler.removeFilter(error_filter)
             self.logger.info('\n\n')
             self.logger.warn('Non-critical warnings found during execution:')
-            for error_record in self.error_queue_filter.get_errors():
+            for error_record in first_records:
                 self.logger.handle(error_record)
-            self.logger.info('\n\n')
-            self.logfile_handler.addFilter(self.error_queue_filter)
-
-    def add_log_handler(self, handler, filter_palisades=False):
-        """Add a logging handler.  Before the handler is added to the logger
-        object, we also add a logging filter so that it only logs messages from
-        this thread."""
-        handler.addFilter(self.thread_filter)
+            skipped_records = (error_filter.count() - len(first_records) -
+                               len(last_records))
+            if skipped_records > 0:
+                self.logger.warn('... %s more warnings not shown ...',
+                                 skipped_records)
+            for error_record in last_records:
+                self.logger.handle(error_record)
+            self.logger.info('\n\nWarnings by message:\n%s\n\n',
+                             error_filter.format_summary())
+            self.flush()
+            self.logfile_handler.addFilter(error_filter)
+
+    def add_log_handler(self, handler, filter_palisades=False,
+                        throttle_progress=True):
+        """Add a logging handler.  The handler only receives messages from this
+        manager's thread, and is called from the listener thread.  If
+        filter_palisades is True, messages from palisades are filtered out.
+        If throttle_progress is True, progress messages are also limited to
+        one every few seconds."""
         if filter_palisades:
             handler.addFilter(self.palisades_filter)
-        handler.addFilter(self.timed_filter)
-        self.logger.addHandler(handler)
+        if throttle_progress:
+            handler.addFilter(self.timed_filter)
+        self.listener.add_handler(handler)
 
     def remove_log_handler(self, handler):
-        """Remove a logging handler."""
-        handler.removeFilter(self.thread_filter)
+        """Remove a logging handler, once it has handled the messages logged
+        so far."""
+        self.flush()
+        self.listener.remove_handler(handler)
         handler.removeFilter(self.error_queue_filter)
         handler.removeFilter(self.palisades_filter)
         handler.removeFilter(self.timed_filter)
-        self.logger.removeHandler(handler)
+
+    def finish_run(self, start_time, cancelled=False):
+        """Log the warnings recorded during a run, its elapsed time and how it
+        ended.
+
+            start_time - the time.time() at which the run started.
+            cancelled=False - whether the run was cancelled.
+
+        Returns nothing."""
+        self.print_errors()
+        if self.queue_handler.dropped > 0:
+            self.logger.info('%s progress messages were not logged',
+                             self.queue_handler.dropped)
+        elapsed_time = round(time.time() - start_time, 2)
+        self.logger.info('Elapsed time: %s', format_time(elapsed_time))
+        if cancelled:
+            self.logger.info('Execution cancelled')
+        else:
+            self.logger.info('Execution finished')
+        self.flush()
 
     def print_message(self, message):
         """Print the input message to the log using the simple print formatter."""
+        self.flush()
         self.logfile_handler.setFormatter(self._print_formatter)
         self.logger.debug(message)
+        self.flush()
         self.logfile_handler.setFormatter(self._file_formatter)
 
     def close(self):
-        """Close the logfile handler and un-register it from the LOGGER
+        """Handle the messages logged so far, stop the listener thread, and
+        close the logfile handler and un-register it from the LOGGER
         object."""
-        self.logfile_handler.close()
+        LOG_ROUTER.remove_route(self.thread_name, self.queue_handler)
+        self.listener.stop()
         self.remove_log_handler(self.logfile_handler)
+        self.logfile_handler.close()
 
 
 class Executor(threading.Thread):
@@ -474,45 +1175,602 @@ class Executor(threading.Thread):
         self.args = args
         self.func_name = func_name
         self.log_manager = LogManager(self.name, log_file)
+        self.progress_monitor = ProgressMonitor()
+        self.token = CancellationToken()
         self.failed = False
+        self.cancelled = False
         self.exception = None
         self.traceback = None
         self.tempdir = tempdir
 
+    def cancel(self, grace_period=None):
+        """Ask the model to stop by setting the run's cancellation token.  The
+        grace_period is ignored; a thread can't be forced to stop.
+
+        Returns nothing."""
+        LOGGER.info('Cancelling run %s', self.name)
+        self.token.cancel()
+
     def run(self):
         """Run the python script provided by the user with the arguments
         specified.  This function also prints the arguments to the logfile
         handler.  If an exception is raised in either the loading or execution
         of the module or function, a traceback is printed and the exception is
-        saved."""
+        saved.  However the run ends, its logs are finished and closed."""
         start_time = time.time()
         self.log_manager.print_args(self.args)
+        self.progress_monitor.start()
+        self.log_manager.add_log_handler(self.progress_monitor,
+                                         throttle_progress=False)
+        try:
+            self._execute()
+        except Exception as error:
+            if self.token.is_cancelled():
+                # Whatever the model raised while stopping, the run was
+                # cancelled rather than failed.
+                LOGGER.debug('Model stopped after cancellation: %r', error)
+                self.cancelled = True
+            else:
+                # We deliberately want to catch all possible exceptions.
+                LOGGER.exception(error)
+                self.failed = True
+                self.exception = error
+                self.traceback = traceback.format_exc()
+        finally:
+            self._finish_execution()
+            self.log_manager.finish_run(start_time, self.cancelled)
+            self.log_manager.remove_log_handler(self.progress_monitor)
+            self.log_manager.close()
+
+    def _execute(self):
+        """Call the model function in this thread.  Called by run(), which
+        handles any exception raised.  Returns nothing."""
         try:
             function = getattr(self.module, self.func_name)
-        except AttributeError as error:
-            self.log_manager.logger.exception(error)
-            self.failed = True
-            raise AttributeError(('Unable to find function "%s" in module "%s" '
-                'at %s') % (self.func_name, self.module.__name__,
+        except AttributeError:
+            raise AttributeError(('Unable to find function "%s" in module '
+                '"%s" at %s') % (self.func_name, self.module.__name__,
                 self.module.__file__))
+
+        LOGGER.debug('Found function %s', function)
+        LOGGER.debug('Starting model with args: \n%s',
+                     pprint.pformat(self.args))
+        with patch_tempdir(self.tempdir), _run_context(self.token):
+            function(self.args.copy())
+
+    def _finish_execution(self):
+        """Release anything _execute() left behind, however the run ended.
+        Called by run() before the logs are closed.  Returns nothing."""
+        pass
+
+
+class ModelProcessError(RuntimeError):
+    """Raised in the GUI process to represent an exception raised by a model
+    running in a separate process, or the failure of that process."""
+    pass
+
+
+class SubprocessExecutor(Executor):
+    """An Executor that runs the model function in a child python process.
+
+    The thread starts the process, sends it the run configuration, and then
+    handles the log records and the result that the process sends back until
+    the process exits.  Has the same attributes as Executor, except that
+    module is the module string to import in the process rather than an
+    imported module."""
+    def __init__(self, module, args, func_name='execute', log_file=None,
+                 tempdir=None):
+        """Initialization function for the SubprocessExecutor.
+
+            module - a string.  Either a URI to a python source file or a
+                python path string that the child process can import.
+            args - a python dictionary of JSON-serializable arguments to be
+                passed to the function.
+            func_name='execute' - the name of the function to call.
+            log_file=None - a URI to the logfile for this run, or None.
+            tempdir=None - a URI to the folder the model's temporary files
+                should be saved to, or None.
+        """
+        Executor.__init__(self, module, args, func_name, log_file, tempdir)
+        self._process = None
+        self._process_lock = threading.Lock()
+        self._terminate_timer = None
+
+    def cancel(self, grace_period=5.0):
+        """Ask the model to stop.  The model's process is sent a cancellation
+        request, which sets the cancellation token in the process.  If the
+        process is still running after grace_period seconds, it is
+        terminated.
+
+            grace_period=5.0 - a number of seconds.  If 0, the process is
+                terminated immediately.
+
+        Returns nothing."""
+        with self._process_lock:
+            if self.token.is_cancelled():
+                return
+            LOGGER.info('Cancelling run %s', self.name)
+            self.token.cancel()
+            if self._process is None:
+                # _start_process() won't start the process.
+                return
+
+            try:
+                _send_message(self._process.stdin, {'type': 'cancel'})
+            except (IOError, ValueError):
+                # the process has already exited or closed its input.
+                pass
+            self._terminate_timer = threading.Timer(grace_period,
+                                                    self._terminate)
+            self._terminate_timer.daemon = True
+            self._terminate_timer.start()
+
+    def _terminate(self):
+        """Terminate the model's process if it is still running.  Returns
+        nothing."""
+        with self._process_lock:
+            if self._process is not None and self._process.poll() is None:
+                LOGGER.info('Terminating model process %s', self._process.pid)
+                self._process.terminate()
+
+    def _start_process(self):
+        """Start the model's process and send it the run configuration.
+        Returns True if the process was started, False if the run was
+        cancelled first."""
+        # the child needs to be able to import this copy of palisades.
+        env = os.environ.copy()
+        palisades_dir = os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [palisades_dir] + [path for path in
+                               [env.get('PYTHONPATH')] if path])
+
+        with self._process_lock:
+            if self.token.is_cancelled():
+                return False
+            self._process = subprocess.Popen(
+                [sys.executable, '-u', '-c',
+                 'from palisades import execution; '
+                 'execution._subprocess_main()'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+
+            # The process's stdin stays open for cancellation requests.
+            _send_message(self._process.stdin, {
+                'module': self.module,
+                'func_name': self.func_name,
+                'args': self.args,
+                'tempdir': self.tempdir,
+            })
+        return True
+
+    def _handle_message(self, message):
+        """Handle a message sent by the model's process.  Returns nothing."""
+        if message['type'] == 'log':
+            record = logging.makeLogRecord(message['record'])
+            # The LogManager only handles records from this thread.
+            record.threadName = self.name
+            self.log_manager.logger.handle(record)
+        elif message['type'] == 'result':
+            self.failed = message['failed']
+            self.cancelled = message['cancelled']
+            if self.failed:
+                self.exception = ModelProcessError(message['exception'])
+                self.traceback = message['traceback']
+
+    def _execute(self):
+        """Run the model in a child process, handling the log records it sends
+        until it exits.  If the process fails to start or exits without
+        reporting a result, the run has failed, unless it was cancelled.
+        Called by run().  Returns nothing."""
+        if not self._start_process():
+            self.cancelled = True
+            return
+
+        result_received = False
+        for line in iter(self._process.stdout.readline, ''):
+            try:
+                message = json.loads(line)
+            except ValueError:
+                LOGGER.debug('Unexpected output from the model process: '
+                             '%s', line.rstrip())
+                continue
+            self._handle_message(message)
+            if message['type'] == 'result':
+                result_received = True
+        return_code = self._process.wait()
+
+        if not result_received:
+            if self.token.is_cancelled():
+                LOGGER.info('Model process was terminated')
+                self.cancelled = True
+            else:
+                raise ModelProcessError(
+                    'Model process exited unexpectedly with code %s' %
+                    return_code)
+
+    def _finish_execution(self):
+        """Stop the pending termination, if any, and close the process's
+        input.  Returns nothing."""
+        with self._process_lock:
+            if self._terminate_timer is not None:
+                self._terminate_timer.cancel()
+            if self._process is not None:
+                try:
+                    self._process.stdin.close()
+                except IOError:
+                    pass
+
+
+class _PipeHandler(logging.Handler):
+    """Send log records over a pipe to the parent process as JSON lines."""
+    def __init__(self, pipe):
+        logging.Handler.__init__(self)
+        self.pipe = pipe
+        self._exception_formatter = logging.Formatter()
+
+    def emit(self, record):
         try:
-            LOGGER.debug('Found function %s', function)
-            LOGGER.debug('Starting model with args: \n%s',
-                         pprint.pformat(self.args))
-            with patch_tempdir(self.tempdir):
-                function(self.args.copy())
-        except Exception as error:
+            record_dict = record.__dict__.copy()
+            record_dict['msg_template'] = _message_template(record.msg)
+            record_dict['msg'] = record.getMessage()
+            record_dict['args'] = None
+            if record.exc_info:
+                record_dict['exc_text'] = (
+                    self._exception_formatter.formatException(
+                        record.exc_info))
+            record_dict['exc_info'] = None
+            _send_message(self.pipe, {'type': 'log', 'record': record_dict})
+        except Exception:
+            self.handleError(record)
+
+
+def _send_message(pipe, message):
+    """Write a message to the parent process.  Values that can't be
+    represented in JSON are sent as their repr().  Returns nothing."""
+    pipe.write(json.dumps(message, default=repr) + '\n')
+    pipe.flush()
+
+
+def _read_cancel_requests(token):
+    """Read messages from the parent process on stdin until it closes, and set
+    the run's cancellation token when cancellation is requested.  Returns
+    nothing."""
+    for line in iter(sys.stdin.readline, ''):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            continue
+        if message.get('type') == 'cancel':
+            LOGGER.info('Cancellation requested')
+            token.cancel()
+
+
+def _subprocess_main():
+    """Run a model in this process, as started by SubprocessExecutor.
+
+    The run configuration is read as a JSON line from stdin; further lines
+    may request cancellation.  Log records and then the result of the run are
+    written to stdout as JSON lines.  Anything else the model writes to
+    stdout is redirected to stderr.
+
+    Returns nothing."""
+    config = json.loads(sys.stdin.readline())
+    token = CancellationToken()
+    cancel_reader = threading.Thread(target=_read_cancel_requests,
+                                     args=(token,))
+    cancel_reader.daemon = True
+    cancel_reader.start()
+
+    # Keep the original stdout for messages to the parent, and point file
+    # descriptor 1 at stderr so output from the model can't corrupt them.
+    pipe = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(_PipeHandler(pipe))
+    root_logger.setLevel(logging.NOTSET)
+
+    result = {'type': 'result', 'failed': False, 'cancelled': False}
+    try:
+        module, module_name = locate_module(config['module'])
+        function = getattr(module, config['func_name'])
+        with _run_context(token):
+            with patch_tempdir(config['tempdir']):
+                function(config['args'])
+    except Exception as error:
+        if token.is_cancelled():
+            LOGGER.debug('Model stopped after cancellation: %r', error)
+            result['cancelled'] = True
+        else:
             # We deliberately want to catch all possible exceptions.
             LOGGER.exception(error)
-            self.failed = True
-            self.exception = error
-            self.traceback = traceback.format_exc()
-        finally:
-            self.log_manager.print_errors()
-            elapsed_time = round(time.time() - start_time, 2)
-            self.log_manager.logger.info('Elapsed time: %s', format_time(elapsed_time))
-            self.log_manager.logger.info('Execution finished')
-            self.log_manager.close()
+            result.update({
+                'failed': True,
+                'exception': '%s: %s' % (error.__class__.__name__, error),
+                'traceback': traceback.format_exc(),
+            })
+    _send_message(pipe, result)
+    pipe.close()
+
+
+JOB_STATES = ['queued', 'running', 'finished', 'failed', 'cancelled']
+
+
+class RunQueue(object):
+    """A queue of model runs that are run a few at a time.
+
+    Each job is a dictionary with these keys:
+        'id' - an int that identifies the job within its queue.
+        'module' - the module string to run (see locate_module()).
+        'func_name' - the name of the function to call.
+        'args' - the arguments dictionary.  args['workspace_dir'] is the
+            job's workspace.
+        'status' - one of JOB_STATES.
+        'log_file' - the URI to the job's logfile once it has started, or
+            None.
+        'error' - a string describing why the job failed, or None.
+
+    Jobs are started in the order they were added, at most max_workers at a
+    time.  Jobs that share a workspace are never run at the same time.  By
+    default each job runs in its own python process (see SubprocessRunner),
+    so its arguments must be JSON-serializable.
+
+    If queue_uri is given, the queue is saved to that file whenever it
+    changes, and loaded from it when the RunQueue is created.  Jobs that were
+    running when the queue was last saved are queued again.
+
+    Jobs are only started once start() has been called.  These communicators
+    are emitted in separate threads:
+        job_changed - emitted with a copy of a job dictionary when a job is
+            added or its status changes.
+        queue_changed - emitted with a dictionary mapping each of JOB_STATES
+            to the number of jobs in that state.
+    """
+    def __init__(self, queue_uri=None, max_workers=2, workspace_root=None,
+                 runner_class=None):
+        """Initialization function for the RunQueue.
+
+            queue_uri=None - a URI to the file where the queue is saved, or
+                None if the queue should not be saved.
+            max_workers=2 - the maximum number of jobs to run at once.
+            workspace_root=None - a URI to a folder.  Jobs added without a
+                'workspace_dir' argument are given their own workspace within
+                this folder.
+            runner_class=None - the runner class used to run each job.
+                Defaults to SubprocessRunner.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1, %s found' %
+                             max_workers)
+        if runner_class is None:
+            runner_class = SubprocessRunner
+
+        self.queue_uri = queue_uri
+        self.max_workers = max_workers
+        self.workspace_root = workspace_root
+        self.runner_class = runner_class
+        self.lock = threading.RLock()
+        self._jobs_changed = threading.Condition(self.lock)
+        self._jobs = []
+        self._runners = {}
+        self._next_id = 0
+        self._started = False
+
+        self.job_changed = Communicator('job_changed')
+        self.queue_changed = Communicator('queue_changed')
+
+        if queue_uri is not None and os.path.exists(queue_uri):
+            self._load()
+
+    def _load(self):
+        """Load the jobs saved in this queue's file.  Returns nothing."""
+        saved_queue = load_json(self.queue_uri)
+        for job in saved_queue['jobs']:
+            if job['status'] == 'running':
+                LOGGER.info('Job %s was interrupted and will be run again',
+                            job['id'])
+                job['status'] = 'queued'
+            self._jobs.append(job)
+        self._next_id = saved_queue['next_id']
+
+    def _save(self):
+        """Save the queue to this queue's file, if it has one.  Must be called
+        with the lock held.  Returns nothing."""
+        if self.queue_uri is not None:
+            # The queue file is rewritten on every change, so it's written
+            # directly rather than through save_dict_to_json(), which warns
+            # whenever it overwrites a file.
+            write_atomic(self.queue_uri, json.dumps(
+                {'jobs': self._jobs, 'next_id': self._next_id}, indent=4,
+                sort_keys=True))
+
+    def _find_job(self, job_id):
+        """Get the job dictionary with the id job_id.  Raises a KeyError if
+        there is no such job.  Must be called with the lock held."""
+        for job in self._jobs:
+            if job['id'] == job_id:
+                return job
+        raise KeyError(job_id)
+
+    def _set_status(self, job, status, error=None):
+        """Change the status of a job, save the queue and notify listeners.
+        Must be called with the lock held.  Returns nothing."""
+        job['status'] = status
+        job['error'] = error
+        self._save()
+        self._jobs_changed.notify_all()
+        self.job_changed.emit(copy.deepcopy(job))
+        self.queue_changed.emit(self.counts())
+
+    def add(self, module, args, func_name='execute'):
+        """Add a job to the end of the queue.
+
+            module - a module string (see locate_module()).
+            args - a python dictionary of arguments.  If it has no
+                'workspace_dir' key, the job is given a workspace within this
+                queue's workspace_root.  The dictionary is copied.
+            func_name='execute' - the name of the function to call.
+
+        Raises a ValueError if args has no workspace and this queue has no
+        workspace_root.
+
+        Returns the int id of the new job."""
+        args = copy.deepcopy(args)
+        with self.lock:
+            job_id = self._next_id
+            if 'workspace_dir' not in args:
+                if self.workspace_root is None:
+                    raise ValueError('args must have a workspace_dir when '
+                                     'the queue has no workspace_root')
+                args['workspace_dir'] = os.path.join(self.workspace_root,
+                                                     'job-%s' % job_id)
+            self._next_id += 1
+            job = {
+                'id': job_id,
+                'module': module,
+                'func_name': func_name,
+                'args': args,
+                'log_file': None,
+            }
+            self._jobs.append(job)
+            self._set_status(job, 'queued')
+            self._start_jobs()
+        return job_id
+
+    def jobs(self, status=None):
+        """Get copies of the jobs in this queue, in the order they were added.
+
+            status=None - if one of JOB_STATES, only jobs in that state are
+                returned.
+
+        Returns a list of job dictionaries."""
+        with self.lock:
+            return [copy.deepcopy(job) for job in self._jobs
+                    if status is None or job['status'] == status]
+
+    def counts(self):
+        """Count the jobs in each state.  Returns a dictionary mapping each of
+        JOB_STATES to an int."""
+        with self.lock:
+            counts = dict((status, 0) for status in JOB_STATES)
+            for job in self._jobs:
+                counts[job['status']] += 1
+            return counts
+
+    def start(self):
+        """Start running queued jobs.  Returns nothing."""
+        with self.lock:
+            self._started = True
+            self._start_jobs()
+
+    def pause(self):
+        """Stop starting queued jobs.  Jobs that are running are not stopped.
+        Returns nothing."""
+        with self.lock:
+            self._started = False
+
+    def cancel(self, job_id, grace_period=5.0):
+        """Cancel a job.  A queued job is cancelled immediately; a running
+        job is asked to stop (see PythonRunner.cancel()) and is marked as
+        cancelled when it has stopped.
+
+            job_id - the int id of the job.
+            grace_period=5.0 - the number of seconds a running job is given
+                to stop before its process is terminated.
+
+        Raises a KeyError if there is no such job.  Returns nothing."""
+        with self.lock:
+            job = self._find_job(job_id)
+            if job['status'] == 'queued':
+                self._set_status(job, 'cancelled')
+            elif job['status'] == 'running':
+                self._runners[job_id].cancel(grace_period)
+
+    def clear_finished(self):
+        """Remove the jobs that have finished, failed or been cancelled from
+        the queue.  Returns nothing."""
+        with self.lock:
+            self._jobs = [job for job in self._jobs
+                          if job['status'] in ('queued', 'running')]
+            self._save()
+            self.queue_changed.emit(self.counts())
+
+    def wait(self, timeout=None):
+        """Block until no jobs are queued or running.  Queued jobs are only
+        run once the queue has been started.
+
+            timeout=None - the maximum number of seconds to wait, or None to
+                wait indefinitely.
+
+        Returns True if the queue is idle, False if the timeout passed
+        first."""
+        end_time = None if timeout is None else time.time() + timeout
+        with self.lock:
+            while True:
+                counts = self.counts()
+                if counts['queued'] + counts['running'] == 0:
+                    return True
+                if end_time is None:
+                    self._jobs_changed.wait()
+                else:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._jobs_changed.wait(remaining)
+
+    def _start_jobs(self):
+        """Start queued jobs until max_workers jobs are running.  Must be
+        called with the lock held.  Returns nothing."""
+        if not self._started:
+            return
+
+        busy_workspaces = set(
+            os.path.abspath(job['args']['workspace_dir'])
+            for job in self._jobs if job['status'] == 'running')
+        for job in self._jobs:
+            if len(self._runners) >= self.max_workers:
+                break
+            if job['status'] != 'queued':
+                continue
+            workspace = os.path.abspath(job['args']['workspace_dir'])
+            if workspace in busy_workspaces:
+                continue
+
+            try:
+                runner = self.runner_class(job['module'],
+                                           copy.deepcopy(job['args']),
+                                           job['func_name'])
+            except Exception as error:
+                # We deliberately want to catch all possible exceptions.
+                LOGGER.exception(error)
+                self._set_status(job, 'failed', '%s: %s' % (
+                    error.__class__.__name__, error))
+                continue
+
+            busy_workspaces.add(workspace)
+            self._runners[job['id']] = runner
+            job['log_file'] = runner.executor.log_manager.log_uri
+            runner.finished.register(self._job_finished, 0, job['id'])
+            self._set_status(job, 'running')
+            runner.start()
+
+    def _job_finished(self, job_id, thread_name, thread_failed,
+                      thread_traceback, thread_cancelled=False):
+        """Record how a job ended and start the next queued jobs.  Called when
+        a job's runner emits finished.  Returns nothing."""
+        with self.lock:
+            runner = self._runners.pop(job_id)
+            job = self._find_job(job_id)
+            if thread_cancelled:
+                self._set_status(job, 'cancelled')
+            elif thread_failed:
+                self._set_status(job, 'failed', '%s: %s' % (
+                    runner.exception.__class__.__name__, runner.exception))
+            else:
+                self._set_status(job, 'finished')
+            self._start_jobs()
 
 
 def format_time(seconds):
@@ -1,11 +1,17 @@
 import json
+import marshal
 import codecs
 import platform
 import ctypes
 import os
 import datetime
+import logging
+import threading
 
 import palisades
+from palisades import utils
+
+LOGGER = logging.getLogger('palisades.fileio')
 
 def read_config(config_uri):
     """Read in the configuration file and parse out the structure of the target
@@ -251,3 +257,190 @@ def save_model_run(arguments, module, out_file, func_name='execute'):
     model_script.close()
 
 
+
+
+# Compact state files start with this line, followed by the marshalled
+# state dictionary.
+COMPACT_STATE_HEADER = 'palisades-state-marshal-1\n'
+STATE_FORMATS = ['json', 'compact']
+
+def save_state(states, uri, state_format='json'):
+    """Save a dictionary of element states to a file on disk.
+
+        states - a python dictionary mapping element IDs to element states.
+        uri - a URI to the file where the states should be saved.
+        state_format='json' - one of STATE_FORMATS.  'json' writes a human-
+            readable JSON object.  'compact' writes the states with python's
+            marshal module, which is much faster to read and write for very
+            large states (such as Multi elements with many rows), but can
+            only be read by the same major version of python.
+
+    Returns nothing."""
+    assert state_format in STATE_FORMATS, (
+        'Unknown state format %s, must be one of %s' % (state_format,
+                                                        STATE_FORMATS))
+    if state_format == 'json':
+        utils.save_dict_to_json(states, uri, 4)
+    else:
+        utils.write_atomic(uri, COMPACT_STATE_HEADER + marshal.dumps(states))
+
+def read_state(uri):
+    """Read a dictionary of element states from a file on disk, written by
+    save_state() in any of the STATE_FORMATS.  The format is detected from
+    the file's contents.
+
+    Compact state files are read with python's marshal module, which is not
+    safe against maliciously-constructed data; only read state files that
+    palisades wrote.
+
+        uri - a URI to a state file on disk.
+
+    Returns a python dictionary."""
+    with open(uri, 'rb') as state_file:
+        state_data = state_file.read()
+
+    if state_data.startswith(COMPACT_STATE_HEADER):
+        try:
+            return marshal.loads(state_data[len(COMPACT_STATE_HEADER):])
+        except (EOFError, TypeError) as error:
+            # marshal raises these on truncated or corrupt data.
+            raise ValueError('Could not read compact state file %s: %s' % (
+                uri, error))
+    return json.loads(state_data)
+
+class LastrunStore(object):
+    """A JSON file of element states, keyed by element ID, that is kept up to
+    date incrementally.
+
+    The store remembers the states it last wrote.  Saving re-serializes only
+    the states that changed since then, and doesn't touch the file at all if
+    nothing changed.  The file is always written atomically.  States already
+    in the file when the store first saves are kept, so saving only some
+    elements never drops the others.
+
+    The store can also autosave in the background (see autosave()): elements
+    whose values change are collected and written together once they have
+    been quiet for a short delay, so the thread changing the values (e.g. the
+    GUI) never waits on the disk.
+    """
+    def __init__(self, uri):
+        self.uri = uri
+        self.lock = threading.RLock()
+        self._states = {}  # element ID -> the state last written
+        self._fragments = {}  # element ID -> the state's serialized JSON
+        self._dirty_elements = {}  # element ID -> element, for autosave
+        self._autosave_delay = None
+        self._timer = None
+        self._loaded = False
+
+    def _load(self):
+        """Read the states already in the store's file, if there is one, so
+        that they are written back along with the states saved later.  A
+        missing or unreadable file is treated as empty.  Returns nothing."""
+        self._loaded = True
+        try:
+            existing_states = utils.load_json(self.uri)
+        except (IOError, ValueError):
+            LOGGER.debug('No readable states in %s', self.uri)
+            return
+
+        if not isinstance(existing_states, dict):
+            return
+
+        for element_id, state in existing_states.iteritems():
+            self._states[element_id] = state
+            self._fragments[element_id] = json.dumps(state, sort_keys=True)
+
+    def save(self, states):
+        """Save element states to the store's file.
+
+            states - a python dictionary mapping element IDs to states.  IDs
+                not in this dictionary keep their previously-saved state.
+
+        Returns True if the file was written, False if nothing changed."""
+        with self.lock:
+            if not self._loaded:
+                self._load()
+
+            changed_ids = []
+            for element_id, state in states.iteritems():
+                if (element_id not in self._states or
+                        self._states[element_id] != state):
+                    self._states[element_id] = state
+                    self._fragments[element_id] = json.dumps(state,
+                                                             sort_keys=True)
+                    changed_ids.append(element_id)
+
+            if not changed_ids and os.path.exists(self.uri):
+                LOGGER.debug('No changed states, not writing %s', self.uri)
+                return False
+
+            LOGGER.debug('Writing %s states (%s changed) to %s',
+                         len(self._fragments), len(changed_ids), self.uri)
+            utils.write_atomic(self.uri, '{%s}' % ', '.join(
+                '%s: %s' % (json.dumps(element_id), self._fragments[element_id])
+                for element_id in sorted(self._fragments)))
+            return True
+
+    def autosave(self, elements, delay=2.0):
+        """Save the state of elements in the background whenever their values
+        change.
+
+            elements - a list of element objects.  Elements must provide
+                get_id(), state() and the value_changed and hidden_toggled
+                communicators.  Elements without them are skipped.
+            delay=2.0 - the number of seconds to wait after a change before
+                saving, so that bursts of changes are saved together.
+
+        Returns nothing."""
+        with self.lock:
+            self._autosave_delay = delay
+
+        for element in elements:
+            for signal_name in ['value_changed', 'hidden_toggled']:
+                try:
+                    signal = getattr(element, signal_name)
+                except AttributeError:
+                    continue
+                signal.register(self._element_changed, 0, element=element)
+
+    def _element_changed(self, new_value=None, element=None):
+        """Record that element changed and schedule an autosave, if one is not
+        already scheduled.  new_value is ignored, since the element's whole
+        state is read when saving.  Returns nothing."""
+        with self.lock:
+            if self._autosave_delay is None:
+                return
+
+            self._dirty_elements[element.get_id()] = element
+            if self._timer is None:
+                self._timer = threading.Timer(self._autosave_delay,
+                                              self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Save the states of all elements that changed since the last
+        autosave.  Returns True if the file was written."""
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty_elements = self._dirty_elements
+            self._dirty_elements = {}
+
+        states = dict((element_id, element.state())
+                      for (element_id, element) in dirty_elements.iteritems())
+        if not states:
+            return False
+        return self.save(states)
+
+    def stop(self):
+        """Stop autosaving, saving any pending changes first.
+
+        Returns nothing."""
+        with self.lock:
+            self._autosave_delay = None
+            if self._timer is not None:
+                self._timer.cancel()
+        self.flush()
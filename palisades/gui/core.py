@@ -5,13 +5,16 @@ import os
 import code
 import time
 import sys
+import threading
 import traceback
+import weakref
 
 os.environ['QT_API'] = 'PyQt4'
 
 import palisades.gui
 import palisades.i18n
 from palisades import elements
+from palisades import execution
 from palisades.gui import qt4 as toolkit
 from palisades.validation import V_ERROR
 from palisades.validation import V_FAIL
@@ -158,7 +161,17 @@ class UIObject(object):
         raise NotImplementedError
 
 class GroupGUI(UIObject):
-    def __init__(self, core_element, registrar=None):
+    def __init__(self, core_element, registrar=None, lazy=False):
+        """Build the GUI representation of a core Group.
+
+            core_element - the core Group element to represent.
+            registrar=None - a dictionary mapping core element classnames to
+                GUI classes, updating the default registry.
+            lazy=False - a boolean.  If True, groups whose contents are not
+                initially shown (tabs other than the first, collapsed
+                containers) don't build their contained views until they are
+                first shown.  The core elements are not affected.
+        """
         UIObject.__init__(self, core_element)
 
         #TODO: add all the necessary elements here to the form.
@@ -172,9 +185,11 @@ class GroupGUI(UIObject):
             'Dropdown': DropdownGUI,
             'TableDropdown': DropdownGUI,
             'OGRFieldDropdown': DropdownGUI,
+            'CSVFieldDropdown': DropdownGUI,
             'Container': ContainerGUI,
             'CheckBox': CheckBoxGUI,
             'Multi': MultiGUI,
+            'VirtualMulti': VirtualMultiGUI,
             'Tab': TabGUI,
             'TabGroup': TabGroupGUI,
         }
@@ -192,26 +207,74 @@ class GroupGUI(UIObject):
             self.widgets = toolkit.Group()
 
         self.elements = []
+        self.lazy = lazy
+        self._populated = False
+        self._populate_lock = threading.Lock()
 
         # create the elements here.  Elements should probably only ever be
         # created once, not dynamically (though they could be hidden/revealed
-        # dynamically), so no need for a separate function.
-        for element in core_element._elements:
+        # dynamically), so views are only created by populate().
+        if self.lazy and self._defer_population():
+            self.widgets.defer_contents(self.populate)
+        else:
+            self.populate()
+
+    def _defer_population(self):
+        """Whether this group's contents are not initially shown, so building
+        their views may be deferred.  Returns a boolean."""
+        return False
+
+    def is_populated(self):
+        """Whether the views of this group's elements have been built."""
+        return self._populated
+
+    def populate(self):
+        """Build the views of all elements in this group, if they haven't
+        been built already.  Returns nothing."""
+        with self._populate_lock:
+            if self._populated:
+                return
+            self._populated = True
+
+        for element in self.element._elements:
             self.add_view(element)
+        self._views_populated()
+
+    def _views_populated(self):
+        """Called once the views of this group's elements have been built.
+        Subclasses may override this to initialize the new views.  Returns
+        nothing."""
+        pass
 
     def add_view(self, element):
+        new_element = self._create_view(element)
+
+        # If the new element is None, there's no visualization.  Skip.
+        # new_element is the GUI representation of a palisades Element.
+        # TODO: create a better naming scheme for each layer.
+        if new_element is not None:
+            self.widgets.add_widget(new_element)
+            self.elements.append(new_element)
+
+    def _create_view(self, element):
+        """Create the GUI representation of a core element without adding it
+        to this group's widgets.  Returns the new GUI object, or None if the
+        element has no graphical representation."""
         # get the correct element type for the new object using the new
         # element's object's string class name.
         # TODO: if element is a Group, it must create its contained widgets
         try:
             element_classname = element.__class__.__name__
+            if (element_classname == 'Multi' and
+                    VirtualMultiGUI.can_represent(element)):
+                element_classname = 'VirtualMulti'
             try:
                 cls = self.registrar[element_classname]
             except KeyError as missing_key:
                 raise KeyError('%s not a recognized GUI type' % missing_key)
 
             if element_classname in ['Group', 'Container', 'TabGroup', 'Tab']:
-                new_element = cls(element, self.registrar)
+                new_element = cls(element, self.registrar, self.lazy)
             else:
                 new_element = cls(element)
         except TypeError as error:
@@ -220,13 +283,7 @@ class GroupGUI(UIObject):
             LOGGER.warning('No graphical representation known for %s: %s',
                 element_classname, error)
             new_element = None
-
-        # If the new element is None, there's no visualization.  Skip.
-        # new_element is the GUI representation of a palisades Element.
-        # TODO: create a better naming scheme for each layer.
-        if new_element is not None:
-            self.widgets.add_widget(new_element)
-            self.elements.append(new_element)
+        return new_element
 
     def set_visible(self, is_visible):
         """Set the visibility of this element."""
@@ -237,35 +294,43 @@ class GroupGUI(UIObject):
         self.widgets.set_enabled(is_enabled)
 
 class TabGroupGUI(GroupGUI):
-    def __init__(self, core_element, registrar=None):
+    def __init__(self, core_element, registrar=None, lazy=False):
         if not hasattr(self, 'widgets'):
             self.widgets = toolkit.TabGroup()
-        GroupGUI.__init__(self, core_element, registrar)
+        GroupGUI.__init__(self, core_element, registrar, lazy)
+
+    def _views_populated(self):
+        # The first tab is shown with the window, so build it up front so the
+        # window is sized to fit it.
+        if len(self.elements) > 0:
+            self.elements[0].populate()
 
 
 class TabGUI(GroupGUI):
-    def __init__(self, core_element, registrar=None):
+    def __init__(self, core_element, registrar=None, lazy=False):
         if not hasattr(self, 'widgets'):
             self.widgets = toolkit.Group()
-        GroupGUI.__init__(self, core_element, registrar)
+        GroupGUI.__init__(self, core_element, registrar, lazy)
+
+    def _defer_population(self):
+        # Tabs are built when they're first selected (see TabGroupGUI).
+        return True
 
     def label(self):
         return self.element.label()
 
 
 class ContainerGUI(GroupGUI):
-    def __init__(self, core_element, registrar=None):
+    def __init__(self, core_element, registrar=None, lazy=False):
         # TODO: find a better way to specify the toolkit widget.
         if not hasattr(self, 'widgets'):
             self.widgets = toolkit.Container(core_element.label())
 
-        GroupGUI.__init__(self, core_element, registrar)
+        GroupGUI.__init__(self, core_element, registrar, lazy)
         self.widgets.set_collapsible(self.element.is_collapsible())
 
         # initialize the collapsed state to mirror the state of the UI.
         self.widgets.set_collapsed(self.element.is_collapsed())
-        for gui_elem in self.elements:
-            gui_elem.set_visible(not self.element.is_collapsed())
 
         # when the container is collapsed by the GUI user, set the underlying
         # element to be collapsed
@@ -278,8 +343,18 @@ class ContainerGUI(GroupGUI):
         # Initialize the interactivity state
         self.widgets.set_enabled(self.element.is_enabled())
 
+    def _defer_population(self):
+        # Collapsed containers are built when they're first expanded.
+        return self.element.is_collapsible() and self.element.is_collapsed()
+
+    def _views_populated(self):
+        for gui_elem in self.elements:
+            gui_elem.set_visible(not self.element.is_collapsed())
+
     def _set_collapsed(self, event=None):
         self.widgets.set_collapsed(self.element.is_collapsed())
+        if not self.element.is_collapsed():
+            self.populate()
 
         for gui_elem in self.elements:
             gui_elem.set_visible(not self.element.is_collapsed())
@@ -295,6 +370,7 @@ class MultiGUI(ContainerGUI):
 
         self.widgets.element_requested.register(self.element.add_element)
         self.element.element_added.register(self._add_element)
+        self.element.rows_replaced.register(self._replace_elements)
 #        self.widgets.element_removed.register(self.element.remove_element)
         self.widgets.element_removed.register(self._remove_element)
 
@@ -310,6 +386,86 @@ class MultiGUI(ContainerGUI):
         self.add_view(new_element)
         # TODO: emit a communicator here??
 
+    def _replace_elements(self, new_rows):
+        # Rebuild the views for all rows in a single pass.  new_rows is the
+        # list of core row elements now contained by the Multi.
+        new_views = [view for view in map(self._create_view, new_rows)
+                     if view is not None]
+        self.widgets.replace_widgets(new_views)
+        self.elements = new_views
+
+class VirtualMultiGUI(ContainerGUI):
+    """Present the rows of a Multi in a table view instead of creating a view
+    per row.  The toolkit only asks for the values of the rows it displays, so
+    this is suited to Multis with thousands of rows.
+
+    Used for Multis configured with "virtualRows": true whose rows are plain
+    text inputs (see can_represent())."""
+    ROW_CLASSES = ['Text', 'File', 'Folder']
+
+    def __init__(self, core_element, registrar=None):
+        # The rows whose changes are already watched.  rows_replaced may be
+        # emitted again with rows that are still present, and they must not
+        # be registered a second time.
+        self._watched_rows = weakref.WeakKeyDictionary()
+        self._watched_rows_lock = threading.Lock()
+
+        self.widgets = toolkit.VirtualMulti(core_element.label(),
+                core_element.config['link_text'], self)
+        ContainerGUI.__init__(self, core_element, registrar)
+
+        self.widgets.element_requested.register(self.element.add_element)
+        self.widgets.element_removed.register(self.element.remove_element)
+        self.element.element_added.register(self._add_element)
+        self.element.element_removed.register(self.widgets.remove_row)
+        self.element.rows_replaced.register(self._replace_elements)
+        self._replace_elements(self.element.elements())
+
+    @classmethod
+    def can_represent(cls, core_element):
+        """Whether core_element is a Multi that should be shown with a
+        VirtualMultiGUI.  Returns a boolean."""
+        return (core_element.config.get('virtualRows', False) and
+                core_element._row_class.__name__ in cls.ROW_CLASSES)
+
+    def populate(self):
+        # Rows are presented by the toolkit's table model rather than by a
+        # view per row, so there are no views to build.
+        self._populated = True
+
+    def _watch_row(self, row):
+        """Redraw the visible rows when row changes, unless row is already
+        watched.  Returns nothing."""
+        with self._watched_rows_lock:
+            if row in self._watched_rows:
+                return
+            self._watched_rows[row] = True
+
+        row.value_changed.register(self._row_changed)
+        row.validation_completed.register(self._row_changed)
+
+    def _row_changed(self, event=None):
+        self.widgets.refresh_rows()
+
+    def _add_element(self, new_index):
+        self._watch_row(self.element.elements()[new_index])
+        self.widgets.insert_row(new_index)
+
+    def _replace_elements(self, new_rows):
+        for row in new_rows:
+            self._watch_row(row)
+        self.widgets.reset_rows(len(new_rows))
+
+    # The row source interface used by the toolkit's table model.
+    def row_value(self, index):
+        return self.element.elements()[index].value()
+
+    def row_error(self, index):
+        return self.element.elements()[index].validation_error()
+
+    def set_row_value(self, index, value):
+        self.element.elements()[index].set_value(value)
+
 class PrimitiveGUI(UIObject):
     def __init__(self, core_element):
         UIObject.__init__(self, core_element)
@@ -560,7 +716,10 @@ class FormGUI():
 
         self.langs = self.element.langs
 
-        self.group = GroupGUI(self.element._ui)
+        # Building the views of hidden tabs and collapsed containers may be
+        # deferred until they're first shown (the 'lazyWidgets' form option).
+        self.group = GroupGUI(self.element._ui,
+            lazy=self.element._ui.config.get('lazyWidgets', False))
         self.window = toolkit.FormWindow(self.group.widgets, self.element.title())
         self.window.set_langs(self.langs)
         self.quit_confirm = toolkit.ConfirmQuitDialog()
@@ -586,6 +745,7 @@ class FormGUI():
         self.window.save_python_request.register(self._save_python)
         self.messages_dialog.dir_open_requested.register(
             self._open_workspace_if_finished)
+        self.messages_dialog.cancel_requested.register(self._cancel_run)
 
     def find_input(self, id):
         """Recurse through all inputs in this form and locate the GUI object
@@ -595,6 +755,8 @@ class FormGUI():
         def _locate(element):
             known_elements[element.element.get_id('user')] = element
             if isinstance(element, GroupGUI):
+                # views of lazily-built groups may not exist yet.
+                element.populate()
                 for contained_element in element.elements:
                     _locate(contained_element)
 
@@ -623,8 +785,9 @@ class FormGUI():
     def _save_python(self, event=None):
         # get the errors that exist from the underlying form
         # only save the python file if there are no errors.
-        if not self.element.form_is_valid():
-            self.errors_dialog.set_messages(self.element.form_errors())
+        snapshot = self.element.snapshot(include_state=False)
+        if not snapshot.is_valid():
+            self.errors_dialog.set_messages(snapshot.errors())
             self.errors_dialog.show()
         else:
             python_file = self.file_dialog.get_file('new python file', save=True)
@@ -672,11 +835,32 @@ class FormGUI():
         self.messages_dialog.show()
         self.element.runner.executor.log_manager.add_log_handler(
             self.messages_handler, filter_palisades=True)
-
-    def _runner_finished(self, thread_name, thread_failed, thread_traceback):
-        if thread_failed:
+        self.element.runner.progress_changed.register(self._update_progress)
+
+    def _update_progress(self, status):
+        """Show a progress status reported by the runner (see
+        execution.ProgressMonitor) in the messages dialog."""
+        details = []
+        if status['eta'] is not None:
+            details.append(_('%s remaining') %
+                           execution.format_time(int(round(status['eta']))))
+        if status['throughput'] is not None and status['total'] is not None:
+            details.append(_('%.1f/s') % status['throughput'])
+        self.messages_dialog.set_progress(status['fraction'],
+                                          ', '.join(details))
+
+    def _cancel_run(self, event=None):
+        """Ask the form's current runner to stop."""
+        if self.element.runner is not None:
+            self.element.runner.cancel()
+
+    def _runner_finished(self, thread_name, thread_failed, thread_traceback,
+                         thread_cancelled=False):
+        if thread_cancelled:
+            self.messages_dialog.finish(False, cancelled=True)
+        elif thread_failed:
             self.messages_dialog.finish(thread_failed,
-                self.element.runner.executor.exception)
+                self.element.runner.exception)
         else:
             self.messages_dialog.finish(False)
             if self.messages_dialog.workspace_open_requested():
@@ -164,11 +164,39 @@ class Group(QtGui.QGroupBox, QtWidget):
         QtGui.QGroupBox.__init__(self)
         QtWidget.__init__(self)
         self.setLayout(QtGui.QGridLayout())
+        self._deferred_contents = None
 
-    def add_widget(self, gui_object, start_index=0):
+    def defer_contents(self, callback):
+        """Defer building the contents of this group until it is first shown.
+
+            callback - a callable taking no arguments that adds this group's
+                widgets.  It is called at most once.
+
+        Returns nothing."""
+        self._deferred_contents = callback
+
+    def _build_deferred_contents(self):
+        """Call the deferred contents callback, if there is one.  Returns
+        nothing."""
+        with self.lock:
+            callback = self._deferred_contents
+            self._deferred_contents = None
+        if callback is not None:
+            callback()
+
+    def showEvent(self, event=None):
+        self._build_deferred_contents()
+        QtGui.QGroupBox.showEvent(self, event)
+
+    def add_widget(self, gui_object, start_index=0, row=None):
         # do the logic of adding the widgets of the gui_object to the Qt Widget.
+        # The widgets are added to a new row at the bottom of the layout,
+        # unless a row is given.
         layout = self.layout()
-        current_row = layout.rowCount()
+        if row is None:
+            current_row = layout.rowCount()
+        else:
+            current_row = row
 
         # If the item has a widgets attribute that is a list, we assume that we
         # want to add widgets to the UI in that order.
@@ -205,8 +233,17 @@ class Container(Group):
         self.setSizePolicy(QtGui.QSizePolicy.Minimum,
             QtGui.QSizePolicy.Maximum)
 
+    def showEvent(self, event=None):
+        # A collapsed container's contents are hidden, so only build them
+        # once the container is expanded.
+        if not self.is_collapsed():
+            self._build_deferred_contents()
+        QtGui.QGroupBox.showEvent(self, event)
+
     def _container_toggled(self):
         # returns whether the container is collapsed.
+        if not self.is_collapsed():
+            self._build_deferred_contents()
         self.checkbox_toggled.emit(self.is_collapsed())
         if self.sizeHint().isValid():
             self.setMinimumSize(self.sizeHint())
@@ -289,6 +326,11 @@ class Multi(Container):
         self.update()
         self._active_elements = []
 
+        # QGridLayout never shrinks its row count, so rows are numbered here
+        # instead, and the layout rows of cleared rows are reused.
+        self._first_row_num = self.layout().rowCount()
+        self._next_row_num = self._first_row_num
+
     def count(self):
         # return the number of elements in the layout that are active.
         return len(self._active_elements)
@@ -315,23 +357,69 @@ class Multi(Container):
         self.element_removed.emit(element_index)
 
     def add_widget(self, gui_object=None):
+        self._add_row(gui_object)
+
+        # readjust the minimum size to accommodate the new elements.
+        if self.sizeHint().isValid():
+            self.setMinimumSize(self.sizeHint())
+        self.update()
+
+    def replace_widgets(self, gui_objects):
+        """Replace all rows of this Multi with rows for the given GUI objects.
+
+        Existing rows are removed without emitting element_removed, and the
+        widget is only resized once, after all new rows have been added.
+
+            gui_objects - a list of GUI objects, one per row.
+
+        Returns nothing."""
+        self.setUpdatesEnabled(False)
+        try:
+            self._clear_rows()
+            for gui_object in gui_objects:
+                self._add_row(gui_object)
+        finally:
+            self.setUpdatesEnabled(True)
+
+        if self.sizeHint().isValid():
+            self.setMinimumSize(self.sizeHint())
+        self.update()
+
+    def _clear_rows(self):
+        """Remove and delete the widgets of all rows, including rows hidden
+        by _remove_element(), so that new rows reuse their layout rows."""
+        layout = self.layout()
+        for layout_row_num in range(self._first_row_num, self._next_row_num):
+            for j in range(layout.columnCount()):
+                sub_item = layout.itemAtPosition(layout_row_num, j)
+                if sub_item != None:  # None when no widget is there.
+                    sub_widget = sub_item.widget()
+                    layout.removeWidget(sub_widget)
+                    sub_widget.hide()
+                    sub_widget.deleteLater()
+            layout.setRowMinimumHeight(layout_row_num, 0)
+        self._active_elements = []
+        self._next_row_num = self._first_row_num
+
+    def _add_row(self, gui_object):
         # when an element is added, it must universally have a minus button in
         # front of it.  This should apply to when the element is supposed to
         # span all columns as well as when there are a number of individual
         # widgets.
         #minus_button = self.MinusButton(self.count())
-        row_number = self.layout().rowCount()
+        row_number = self._next_row_num
+        self._next_row_num += 1
         minus_button = self.MinusButton(row_number)
         minus_button.pushed.register(self._remove_element)
         if isinstance(gui_object.widgets, list):
             gui_object.widgets.insert(0, minus_button)
-            Container.add_widget(self, gui_object)
+            Container.add_widget(self, gui_object, row=row_number)
         elif isinstance(gui_object.widgets, Container):
             # we need a special case to add a container to the Multi, since the
             # container will span all columns EXCEPT for the first one, where
             # the minus button will reside.
             # TODO: roll this into Container.add_widget()??
-            current_row = self.layout().rowCount()
+            current_row = row_number
             num_cols = self.layout().columnCount()
 
             # add the minus button
@@ -346,10 +434,195 @@ class Multi(Container):
         # the widget later on
         self._active_elements.append(row_number)
 
-        # readjust the minimum size to accommodate the new elements.
-        if self.sizeHint().isValid():
-            self.setMinimumSize(self.sizeHint())
-        self.update()
+class MultiRowModel(QtCore.QAbstractTableModel):
+    """A table model presenting the rows of a Multi element.
+
+    Row data is fetched from a row source object on demand, so only the rows
+    that the view actually displays are ever asked for their values.  The row
+    source must implement:
+        row_value(index) - return the value of the row as a string.
+        row_error(index) - return the row's validation error message, or None.
+        set_row_value(index, value) - set the value of the row.
+
+    The model keeps its own row count, which only changes in the GUI thread
+    (see VirtualMulti), so the view never sees the count change outside of a
+    matching insert, remove or reset notification."""
+    COLUMN_VALUE = 0
+    COLUMN_STATUS = 1
+
+    def __init__(self, row_source):
+        QtCore.QAbstractTableModel.__init__(self)
+        self.row_source = row_source
+        self._row_count = 0
+        self._headers = [_('Value'), '']
+        self._icons = {
+            True: QtGui.QIcon(ICON_ERROR),
+            False: QtGui.QIcon(ICON_CHECKMARK),
+        }
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self._headers[section]
+        return section + 1
+
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.column() == self.COLUMN_VALUE:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        try:
+            if index.column() == self.COLUMN_VALUE:
+                if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+                    return self.row_source.row_value(index.row())
+            elif index.column() == self.COLUMN_STATUS:
+                if role == QtCore.Qt.DecorationRole:
+                    error = self.row_source.row_error(index.row())
+                    return self._icons[error not in (None, '')]
+                elif role == QtCore.Qt.ToolTipRole:
+                    return self.row_source.row_error(index.row())
+        except IndexError:
+            # the row was removed from the source, but the view hasn't caught
+            # up yet.
+            pass
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if (role != QtCore.Qt.EditRole or
+                index.column() != self.COLUMN_VALUE):
+            return False
+
+        # QVariant under PyQt4's v1 API, a python object under v2.
+        if hasattr(value, 'toString'):
+            value = value.toString()
+        try:
+            self.row_source.set_row_value(index.row(), unicode(value))
+        except IndexError:
+            return False
+        self.dataChanged.emit(index, index)
+        return True
+
+    def insert_row(self, row_index):
+        """Notify the view that a row was added at row_index.  Returns
+        nothing."""
+        self.beginInsertRows(QtCore.QModelIndex(), row_index, row_index)
+        self._row_count += 1
+        self.endInsertRows()
+
+    def remove_row(self, row_index):
+        """Notify the view that the row at row_index was removed.  Returns
+        nothing."""
+        self.beginRemoveRows(QtCore.QModelIndex(), row_index, row_index)
+        self._row_count -= 1
+        self.endRemoveRows()
+
+    def reset_rows(self, row_count):
+        """Notify the view that all rows were replaced, and that there are now
+        row_count rows.  Returns nothing."""
+        self.beginResetModel()
+        self._row_count = row_count
+        self.endResetModel()
+
+    def refresh_rows(self):
+        """Notify the view that the data of any row may have changed.  The
+        view only re-reads the rows it is displaying.  Returns nothing."""
+        if self._row_count > 0:
+            self.dataChanged.emit(
+                self.index(0, 0),
+                self.index(self._row_count - 1, len(self._headers) - 1))
+
+class VirtualMulti(Container):
+    """A Multi whose rows are shown in a table view over a MultiRowModel
+    instead of a row of widgets per element.  Rows cost no widgets, and only
+    the visible rows are ever drawn, so adding and scrolling through thousands
+    of rows stays fast.
+
+    Row changes may be reported from any thread; they are applied to the
+    model in the GUI thread."""
+    _row_inserted = Signal(int)
+    _row_removed = Signal(int)
+    _rows_reset = Signal(int)
+    _rows_refreshed = Signal()
+
+    def __init__(self, label_text, link_text, row_source):
+        Container.__init__(self, label_text)
+
+        self.element_requested = Communicator('element_requested')
+        self.element_removed = Communicator('element_removed')
+
+        self.model = MultiRowModel(row_source)
+        self.view = QtGui.QTableView()
+        self.view.setModel(self.model)
+        self.view.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.view.setMinimumHeight(200)
+
+        # Fixed row heights mean the view never has to measure rows that
+        # aren't visible.
+        vertical_header = self.view.verticalHeader()
+        vertical_header.setResizeMode(QtGui.QHeaderView.Fixed)
+        vertical_header.setDefaultSectionSize(
+            self.view.fontMetrics().height() + 8)
+        horizontal_header = self.view.horizontalHeader()
+        horizontal_header.setResizeMode(MultiRowModel.COLUMN_VALUE,
+                                        QtGui.QHeaderView.Stretch)
+        horizontal_header.setResizeMode(MultiRowModel.COLUMN_STATUS,
+                                        QtGui.QHeaderView.ResizeToContents)
+
+        self.add_element_link = Multi.AddElementLink(link_text)
+        self.add_element_link.clicked.register(self.element_requested.emit)
+        self.remove_button = QtGui.QPushButton(QtGui.QIcon(ICON_MINUS),
+                                               _('Remove selected'))
+        self.remove_button.clicked.connect(self._remove_selected)
+
+        layout = self.layout()
+        layout.addWidget(self.view, 0, 0, 1, 5)
+        layout.addWidget(self.add_element_link, 1, 0)
+        layout.addWidget(self.remove_button, 1, 4)
+
+        self._row_inserted.connect(self.model.insert_row)
+        self._row_removed.connect(self.model.remove_row)
+        self._rows_reset.connect(self.model.reset_rows)
+        self._rows_refreshed.connect(self.model.refresh_rows)
+
+    def count(self):
+        return self.model.rowCount()
+
+    def _remove_selected(self, checked=None):
+        # remove the highest rows first so the lower indices stay valid.
+        selected_rows = sorted(set(index.row() for index in
+                                   self.view.selectionModel().selectedRows()),
+                               reverse=True)
+        for row_index in selected_rows:
+            self.element_removed.emit(row_index, join=True)
+
+    def insert_row(self, row_index):
+        """Add a row at row_index.  Returns nothing."""
+        self._row_inserted.emit(row_index)
+
+    def remove_row(self, row_index):
+        """Remove the row at row_index.  Returns nothing."""
+        self._row_removed.emit(row_index)
+
+    def reset_rows(self, row_count):
+        """Replace all rows with row_count new rows.  Returns nothing."""
+        self._rows_reset.emit(row_count)
+
+    def refresh_rows(self):
+        """Redraw the visible rows.  Returns nothing."""
+        self._rows_refreshed.emit()
 
 class InformationButton(Button):
     """This class represents the information that a user will see when pressing
@@ -1160,17 +1433,33 @@ class RealtimeMessagesDialog(QtGui.QDialog):
         interacting with the main UI window while the model is processing and
         provides status updates for the model.
 
-        This window is not configurable through the JSON configuration file."""
+        This window is not configurable through the JSON configuration file.
+
+        Messages written to the dialog are buffered and added to the messages
+        area in a single batch every flush_interval milliseconds, so chatty
+        models can't flood the GUI thread.  The flush timer only runs while
+        there are buffered messages.  Only the most recent max_lines messages
+        are kept."""
     error_changed = Signal(bool)
-    message_added = Signal(unicode)
     _finished = Signal(bool)
+    _progress_changed = Signal(object)
+    _messages_buffered = Signal()
     started = Signal()
     showed = Signal()
 
-    def __init__(self, window_title=None):
+    PROGRESS_STEPS = 1000
+    MAX_LINES = 10000
+    FLUSH_INTERVAL = 100  # milliseconds
+
+    def __init__(self, window_title=None, max_lines=MAX_LINES,
+                 flush_interval=FLUSH_INTERVAL):
         """Constructor for the ModelDialog class.
 
-            root - a pointer to the parent window
+            window_title=None - the title of the dialog.
+            max_lines - the maximum number of lines kept in the messages
+                area.  Older lines are discarded.
+            flush_interval - the number of milliseconds between updates of
+                the messages area.
 
             returns an instance of ModelDialog."""
         QtGui.QDialog.__init__(self)
@@ -1187,13 +1476,24 @@ class RealtimeMessagesDialog(QtGui.QDialog):
         self.is_executing = False
         self.cancel = False
         self.dir_open_requested = Communicator('dir_open_requested')
+        self.cancel_requested = Communicator('cancel_requested')
 
         #create statusArea-related widgets for the window.
         self.statusAreaLabel = QtGui.QLabel(_('Messages:'))
         self.statusArea = QtGui.QPlainTextEdit()
         self.statusArea.setReadOnly(True)
+        self.statusArea.setMaximumBlockCount(max_lines)
         self.cursor = self.statusArea.textCursor()
 
+        # messages written from any thread are kept here until the next
+        # flush.  Each message is at least one line, so there's no point
+        # buffering more messages than there are lines to show them in.
+        self._messages = utils.RingBuffer(max_lines)
+        self._flush_timer = QtCore.QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self._flush_messages)
+        self._messages_buffered.connect(self._start_flush_timer)
+
         #set the background color of the statusArea widget to be white.
         self.statusArea.setStyleSheet("QWidget { background-color: White }")
 
@@ -1236,20 +1536,27 @@ class RealtimeMessagesDialog(QtGui.QDialog):
         #disable the 'Back' button by default
         self.backButton.setDisabled(True)
 
+        self.cancelButton = QtGui.QPushButton(_(' Cancel'))
+        self.cancelButton.setToolTip(_('Stop the model'))
+        self.cancelButton.setIcon(QtGui.QIcon(ICON_CLOSE))
+        self.cancelButton.setDisabled(True)
+
         #create the buttonBox (a container for buttons) and add the buttons to
         #the buttonBox.
         self.buttonBox = QtGui.QDialogButtonBox()
+        self.buttonBox.addButton(self.cancelButton, QtGui.QDialogButtonBox.RejectRole)
         self.buttonBox.addButton(self.backButton, QtGui.QDialogButtonBox.AcceptRole)
 
         #connect the buttons to their callback functions.
         self.backButton.clicked.connect(self.closeWindow)
+        self.cancelButton.clicked.connect(self._cancel_pressed)
 
         #add the buttonBox to the window.
         self.layout().addWidget(self.buttonBox)
 
         self.error_changed.connect(self.messageArea.set_error)
-        self.message_added.connect(self._write)
         self._finished.connect(self._threadsafe_finish)
+        self._progress_changed.connect(self._set_progress)
         self.started.connect(self._start)
         self.showed.connect(self._show)
 
@@ -1278,26 +1585,89 @@ class RealtimeMessagesDialog(QtGui.QDialog):
         self.statusArea.clear()
         self.start_buttons()
 
-        self.write(_('Initializing...\n'))
+        # Written directly so that it's shown before any messages from the
+        # run that are already buffered.
+        self._write(_('Initializing...\n'))
 
     def start_buttons(self):
         self.progressBar.setMaximum(0) #start the progressbar.
+        self.progressBar.setTextVisible(False)
         self.backButton.setDisabled(True)
+        self.cancelButton.setDisabled(False)
+
+    def set_progress(self, fraction, details=None):
+        """Show the progress of the run in the progress bar.  The progress bar
+            is indeterminate until this is first called for a run.  This
+            function is thread-safe.
+
+            fraction - a number between 0 and 1, the fraction of the run
+                that is complete.
+            details=None - a string (such as the time remaining) to show
+                after the percentage, or None.
+
+            returns nothing."""
+        self._progress_changed.emit((fraction, details))
+
+    def _set_progress(self, progress):
+        fraction, details = progress
+        self.progressBar.setMaximum(self.PROGRESS_STEPS)
+        self.progressBar.setValue(int(round(fraction * self.PROGRESS_STEPS)))
+
+        text = '%p%'
+        if details:
+            text += ' - ' + details.replace('%', '%%')
+        self.progressBar.setFormat(text)
+        self.progressBar.setTextVisible(True)
 
     def stop_buttons(self):
         self.progressBar.setMaximum(1) #stops the progressbar.
         self.backButton.setDisabled(False)
+        self.cancelButton.setDisabled(True)
+
+    def _cancel_pressed(self, checked=None):
+        """Request that the run be cancelled.  The dialog stays open until the
+        run finishes."""
+        self.cancel = True
+        self.cancelButton.setDisabled(True)
+        self.write(_('Cancelling...\n'))
+        self.cancel_requested.emit(True)
 
     def write(self, text):
-        """Write text.  If printing to the status area, also scrolls to the end
-            of the text region after writing to it.  This function is
-            necessarily thread-safe, thanks to Qt's signal/slot implementation.
+        """Write text.  The text is buffered and written to the status area
+            (which is then scrolled to the end) at the next flush.  This
+            function is thread-safe.
 
             text - a string to be written to self.statusArea.
 
             returns nothing."""
 
-        self.message_added.emit(text)
+        # The timer can only be started from the GUI thread, so it's started
+        # through a signal when the first message is buffered.
+        if self._messages.append(text):
+            self._messages_buffered.emit()
+
+    def _start_flush_timer(self):
+        """Start the flush timer if it isn't running.  Called in the GUI
+        thread when a message is buffered.  Returns nothing."""
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _flush_messages(self):
+        """Write all buffered messages to the status area at once, and stop
+        the flush timer if no messages were buffered since.  Called from the
+        GUI thread by the flush timer.  Returns nothing."""
+        messages, dropped = self._messages.drain()
+        if len(self._messages) == 0:
+            # A message buffered after this point restarts the timer.
+            self._flush_timer.stop()
+        if len(messages) == 0:
+            return
+
+        if dropped > 0:
+            messages.insert(0, _('... %s messages not shown ...\n') % dropped)
+        self._write(u''.join(utils.decode_string(message)
+                             if isinstance(message, str) else message
+                             for message in messages))
 
     def _write(self, text):
         self.statusArea.insertPlainText(QString(text))
@@ -1307,14 +1677,17 @@ class RealtimeMessagesDialog(QtGui.QDialog):
     def flush(self):
         pass
 
-    def finish(self, exception_found, thread_exception=None):
-        """Notify the user that model processing has finished.
+    def finish(self, exception_found, thread_exception=None, cancelled=False):
+        """Notify the user that model processing has finished.  If cancelled
+        is True, the run was stopped at the user's request.
 
             returns nothing."""
 
         self.is_executing = False
         self.stop_buttons()
-        if exception_found:
+        if cancelled:
+            self.messageArea.setText(_('Run cancelled.'))
+        elif exception_found:
             self.messageArea.setText((u'<b>%s</b> encountered: <em>%s</em> <br/>' +
                 _('See the log for details.')) % (thread_exception.__class__.__name__,
                 thread_exception))
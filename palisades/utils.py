@@ -6,6 +6,7 @@ import json
 import logging
 import hashlib
 import platform
+import ctypes
 from types import DictType
 from types import StringType
 from types import UnicodeType
@@ -13,6 +14,7 @@ import tempfile
 import locale
 import Queue
 import sys
+import collections
 import contextlib
 import time
 import uuid
@@ -46,7 +48,7 @@ class ProgressLoggerAdapter(logging.LoggerAdapter):
         if 'progress' not in kwargs:
             raise ValueError('progress argument expected but not found')
 
-        extra = {'progress': kwargs['progress']}
+        extra = {'progress': kwargs.pop('progress')}
         if 'extra' in kwargs:
             kwargs['extra'].update(extra)
         else:
@@ -86,6 +88,41 @@ class RepeatingTimer(threading.Thread):
             self.function()
 
 
+class RingBuffer(object):
+    """A thread-safe, fixed-size FIFO buffer.  When the buffer is full, adding
+    an item discards the oldest item."""
+    def __init__(self, maxlen):
+        self.lock = threading.Lock()
+        self.maxlen = maxlen
+        self._items = collections.deque(maxlen=maxlen)
+        self._dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def append(self, item):
+        """Add an item to the buffer.  Returns True if the buffer was empty
+        before the item was added, False otherwise."""
+        with self.lock:
+            was_empty = len(self._items) == 0
+            if len(self._items) == self.maxlen:
+                self._dropped += 1
+            self._items.append(item)
+            return was_empty
+
+    def drain(self):
+        """Remove all items from the buffer.
+
+        Returns a tuple of (list of the items, oldest first; the number of
+        items discarded since the last drain because the buffer was full)."""
+        with self.lock:
+            items = list(self._items)
+            dropped = self._dropped
+            self._items.clear()
+            self._dropped = 0
+        return items, dropped
+
+
 class CommunicationWorker(threading.Thread):
     def __init__(self, target, name, args=(), kwargs={}, response_queue=None):
         threading.Thread.__init__(self)
@@ -115,14 +152,22 @@ class Communicator(object):
     # signal['target'] - a pointer to the signal's target element and function
     # signal['condition'] - the condition under which this signal is emitted
     # When a signal is emitted, data about the signal should also be passed.
-    def __init__(self, name=None):
+    def __init__(self, name=None, coalesce=True):
         self.callbacks = []
-        self.callback_queue = Queue.PriorityQueue()
         self.response_queue = Queue.Queue()
         self.lock = threading.RLock()
         self._exceptions = []
         self.name = name
 
+        # Emits made while this communicator is held are sent when the
+        # communicator is released.  If coalesce is True, they are coalesced
+        # into a single pending emit (the most recent one wins).  Otherwise
+        # every emit is kept and sent in order, for signals whose emits each
+        # describe a separate event (like a row being added).
+        self.coalesce = coalesce
+        self._hold_count = 0
+        self._held_emits = []
+
     def register(self, callback, priority=0, *args, **kwargs):
         """Register a callback function and optional arguments.
 
@@ -153,29 +198,30 @@ class Communicator(object):
 
         argument - the object to be passed to all callbacks.
 
+        If this communicator is currently held (see hold()), the emit is
+        deferred until the communicator is released.
+
         Returns nothing."""
         with self.lock:
+            if self._hold_count > 0:
+                if self.coalesce and self._held_emits:
+                    join = join or self._held_emits[-1][1]
+                    self._held_emits = []
+                self._held_emits.append((argument, join, kwargs))
+                return
+
             # clear out the response queue
             self._exceptions = []
             while not self.response_queue.empty():
                 self.response_queue.get()
 
-            # load up the callback queue
-            # PriorityQueue returns lowest-valued priorities first, so the
-            # sentinel should be greater than the highest defined priority.
-            max_priority = 0
-            for priority, callback_data in self.callbacks:
-                max_priority = max(max_priority, priority)
-                self.callback_queue.put((priority, callback_data))
-            self.callback_queue.put((max_priority+1, 'STOP'))
-
+            # Callbacks with the lowest-valued priorities are called first.
+            # sorted() is stable, so callbacks of equal priority are called in
+            # the order they were registered.
             try:
                 threads = []
-                while True:
-                    priority, callback_data = self.callback_queue.get()
-                    if callback_data == 'STOP':
-                        break
-
+                for priority, callback_data in sorted(
+                        self.callbacks, key=lambda callback: callback[0]):
                     copied_kwargs = callback_data['kwargs'].copy()
                     copied_kwargs.update(kwargs)
 
@@ -197,6 +243,39 @@ class Communicator(object):
                     for thread in threads:
                         thread.join()
 
+    def hold(self):
+        """Defer all emits until release() is called.  Calls to hold() may
+        be nested; emits resume when every hold() has been matched by a
+        release().  Emits made while held are coalesced, so only the most
+        recent one is sent on release, unless the communicator was created
+        with coalesce=False.
+
+        Returns nothing."""
+        with self.lock:
+            self._hold_count += 1
+
+    def release(self):
+        """Release a hold on this communicator.  When the last hold is
+        released, the deferred emits (if any) are sent to all registered
+        callbacks in the order they were made.
+
+        Returns True if a deferred emit was sent, False otherwise."""
+        with self.lock:
+            self._hold_count = max(0, self._hold_count - 1)
+            if self._hold_count > 0 or not self._held_emits:
+                return False
+
+            held_emits = self._held_emits
+            self._held_emits = []
+            for argument, join, kwargs in held_emits:
+                self.emit(argument, join, **kwargs)
+            return True
+
+    def is_held(self):
+        """Return whether emits from this communicator are being deferred."""
+        with self.lock:
+            return self._hold_count > 0
+
     def exceptions(self):
         if not self.response_queue.empty():
             exceptions = []
@@ -257,7 +336,12 @@ def apply_defaults(configuration, defaults):
     """Applies defaults to the configuration dict.
 
     Take the input configuration and apply default values if and only if the
-    configuration option was not specified by the user.
+    configuration option was not specified by the user.  Nested dictionaries
+    are merged as well.  When the user specified a value, the user's value is
+    kept, even if its type differs from the default's.
+
+    The configuration is updated in place.  Default values that are missing
+    from the configuration are added by reference, not copied.
 
     Parameters:
         configuration - a python dictionary of configuration options
@@ -266,57 +350,124 @@ def apply_defaults(configuration, defaults):
     Returns:
         A dict with rendered default values."""
 
-    primitive_types = [int, float, basestring, str, unicode]
-    iterable_types = [list, dict]
-
-    # a = user config
-    # b = defaults
-    def merge(a, b, path=None):
-        "merges b into a"
-        if path is None: path = []
-        for key in b:
-            if key in a:
-                if isinstance(a[key], dict) and isinstance(b[key], dict):
-                    a[key] = merge(a[key], b[key], path + [str(key)])
-                elif a[key] == b[key]:
-                    pass  # same leaf value
-                elif ((type(a[key]) in primitive_types and
-                        type(b[key]) in primitive_types) or
-                        (type(a[key] in iterable_types) and
-                         type(b[key] in iterable_types))):
-                    # When types are both primitive or both iterable but
-                    # values differ, use the user's value.
-                    pass
-                else:
-                    raise TypeError('Conflict at %s' %
-                                    '.'.join(path + [str(key)]))
-            else:
-                a[key] = b[key]
-        return a
+    # Walk pairs of (user config, defaults) with an explicit stack rather than
+    # recursing: only nested dicts present in both need to be visited.
+    pending = [(configuration, defaults)]
+    while pending:
+        user_config, default_config = pending.pop()
+        for key, default_value in default_config.iteritems():
+            try:
+                user_value = user_config[key]
+            except KeyError:
+                user_config[key] = default_value
+                continue
+
+            if isinstance(user_value, dict) and isinstance(default_value, dict):
+                pending.append((user_value, default_value))
+
+    return configuration
+
+
+class DefaultsTemplate(object):
+    """A dictionary of default values, compiled for repeated application to
+    many configuration dictionaries.
 
-    return merge(configuration, defaults)
+    The top level of the defaults is scanned once, when the template is
+    created.  Configurations are rendered in place just as apply_defaults()
+    would.
+
+    The defaults should not gain or lose top-level keys once the template has
+    been created."""
+
+    def __init__(self, defaults):
+        self.defaults = defaults
+        self._items = [(key, value, isinstance(value, dict))
+                       for (key, value) in defaults.iteritems()]
+
+    def apply(self, configuration):
+        """Apply the default values of this template to configuration.
+
+            configuration - a python dictionary of configuration options.
+
+        Returns configuration, with rendered default values."""
+        for key, default_value, is_dict in self._items:
+            try:
+                user_value = configuration[key]
+            except KeyError:
+                configuration[key] = default_value
+                continue
+
+            if is_dict and isinstance(user_value, dict):
+                apply_defaults(user_value, default_value)
+
+        return configuration
 
 
 def save_dict_to_json(dictionary, uri, indent=None):
-    """Save a python dictionary to JSON at the specified URI."""
+    """Save a python dictionary to JSON at the specified URI.  The file is
+    written atomically (see write_atomic())."""
     if os.path.exists(uri):
         LOGGER.warn('File %s exists and will be overwritten.', uri)
 
+    write_atomic(uri, json.dumps(dictionary, indent=indent, sort_keys=True))
+
+
+def _replace_file(source_uri, dest_uri):
+    """Rename the file at source_uri to dest_uri, replacing dest_uri if it
+    exists.  os.rename() won't replace an existing file on Windows, so
+    MoveFileEx is used there instead, which replaces the file in a single
+    step.  Returns nothing."""
+    if platform.system() != 'Windows':
+        os.rename(source_uri, dest_uri)
+        return
+
+    move_file_replace_existing = 0x1
+    move_file_write_through = 0x8
+    filesystem_encoding = sys.getfilesystemencoding()
+    if not isinstance(source_uri, UnicodeType):
+        source_uri = source_uri.decode(filesystem_encoding)
+    if not isinstance(dest_uri, UnicodeType):
+        dest_uri = dest_uri.decode(filesystem_encoding)
+
+    if not ctypes.windll.kernel32.MoveFileExW(
+            source_uri, dest_uri,
+            move_file_replace_existing | move_file_write_through):
+        raise ctypes.WinError()
+
+
+def write_atomic(uri, data):
+    """Write a string to the file at uri, replacing the file if it exists.
+
+    The string is written to a temporary file in the same folder, which is
+    then renamed to uri.  Readers of uri will see either the old file or the
+    new one, never a partially-written file.  Folders in uri that do not exist
+    are created.
+
+        uri - a URI to the file to write.
+        data - a python string to write to the file.
+
+    Returns nothing."""
+    folder = os.path.dirname(os.path.abspath(uri))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    temp_fd, temp_uri = tempfile.mkstemp(
+        dir=folder, prefix='.%s.' % os.path.basename(uri), suffix='.tmp')
     try:
-        json_file = open(uri, mode='w+')
-    except IOError:
-        # IOError thrown when the folder structure of self.uri doesn't exist.
-        os.makedirs(os.path.dirname(uri))
-        json_file = open(uri, mode='w+')
+        with os.fdopen(temp_fd, 'wb') as temp_file:
+            temp_file.write(data)
 
-    json_file.writelines(json.dumps(dictionary, indent=indent, sort_keys=True))
-    json_file.close
+        _replace_file(temp_uri, uri)
+    except:
+        if os.path.exists(temp_uri):
+            os.remove(temp_uri)
+        raise
 
 def load_json(uri):
     """Load a JSON object from the file at URI.  Returns a python dictionary
     parsed from the JSON object at URI."""
-    json_file = open(uri).read()
-    return json.loads(json_file)
+    with open(uri) as json_file:
+        return json.loads(json_file.read())
 
 def get_md5sum(data_dict):
     """Get the MD5 hash for a dictionary of data.
@@ -622,9 +773,8 @@ def setup_signal(signal_config, element_index):
             target_func = globals()[target]
         else:
             # assume it's a python package path package.module.func
-            path_list = target.split('.')
-            target_module = execution.locate_module('.'.join(path_list[:-1]))
-            target_func = getattr(target_module, path_list[-1])
+            module_name, func_name = target.rsplit('.', 1)
+            target_func = _python_target(module_name, func_name)
 
     elif target_type == '_function':
         target_func = target  # just use the user-defined target
@@ -633,6 +783,47 @@ def setup_signal(signal_config, element_index):
     return (signal_config['signal_name'], target_func)
 
 
+def _python_target(module_name, func_name):
+    """Build a signal target that calls a function in a python module.  The
+    module is located when the target is first called rather than when the
+    signal is set up, so setting up signals doesn't wait for imports.  See
+    execution.preload_modules() for importing such modules ahead of time.
+
+        module_name - a module string (see execution.locate_module()).
+        func_name - the name of the function in that module.
+
+    Returns a function."""
+    def _call_target(*args, **kwargs):
+        from palisades import execution
+        target_module, _ = execution.locate_module(module_name)
+        return getattr(target_module, func_name)(*args, **kwargs)
+
+    _call_target.__name__ = str(func_name)
+    return _call_target
+
+
+def python_signal_modules(signals):
+    """Find the modules of the Python: targets in a list of signal
+    configurations.
+
+        signals - a list of signal configuration dictionaries or strings.
+
+    Returns a list of module strings."""
+    modules = []
+    for signal_config in signals:
+        try:
+            target = signal_config['target']
+        except (KeyError, TypeError):
+            # short-form signals only target elements.
+            continue
+        if (type(target) in [StringType, UnicodeType] and
+                target.startswith('Python:')):
+            target = target.replace('Python:', '', 1)
+            if '.' in target:
+                modules.append(target.rsplit('.', 1)[0])
+    return modules
+
+
 def settings_folder():
     """Return the file location of the user's settings folder.  This folder
     location is OS-dependent."""
@@ -343,6 +343,34 @@ def check_vector(path, mustExist=True, permissions='r', fieldsExist=None,
                             layer_name, layer_info['datum']))
 
 
+def check_dbf(path, mustExist=True, permissions='r', fieldsExist=None,
+              restrictions=None):
+    """Check a DBF table.  OGR opens a DBF file as a vector with a single
+    layer of attributes, so the fields and restrictions are checked the same
+    way as for a vector.  Returns nothing."""
+    check_vector(path, mustExist=mustExist, permissions=permissions,
+                 fieldsExist=fieldsExist, restrictions=restrictions)
+
+
+def check_table(path, mustExist=True, permissions='r', fieldsExist=None,
+                restrictions=None, allowBlankRows=False):
+    """Check a table that may be either a CSV or a DBF file, based on the
+    extension of path.  The file is checked like any other file first, so a
+    missing table fails validation the same way for both formats.
+    allowBlankRows only applies to CSV tables.  Returns nothing."""
+    check_filepath(path, mustExist=mustExist, permissions=permissions)
+    if not os.path.exists(path):
+        # an optional table that wasn't provided; there's nothing to read.
+        return
+
+    if os.path.splitext(path)[1].lower() == '.dbf':
+        check_dbf(path, mustExist=mustExist, permissions=permissions,
+                  fieldsExist=fieldsExist, restrictions=restrictions)
+    else:
+        check_csv(path, fieldsExist=fieldsExist, restrictions=restrictions,
+                  allowBlankRows=allowBlankRows)
+
+
 class Validator(object):
     types = {
         'disabled': lambda x: None,
@@ -353,6 +381,8 @@ class Validator(object):
         'exists': check_filepath,
         'folder': check_folder,
         'CSV': check_csv,
+        'DBF': check_dbf,
+        'table': check_table,
         'string': check_regexp,
         'text': check_regexp,
     }
@@ -360,7 +390,10 @@ class Validator(object):
         self.finished = Communicator()
         self.func = self.types[type_str]
 
-    def validate(self, value, config):
+    def validate(self, value, config, join=False):
+        """Validate value with this validator's check and emit the result
+        through finished.  If join is True, block until the finished callbacks
+        have returned.  Returns nothing."""
         try:
             cp_config = config.copy()
             try:
@@ -379,4 +412,4 @@ class Validator(object):
             error_msg = str(e)
             status = V_ERROR
 
-        self.finished.emit((error_msg, status))
+        self.finished.emit((error_msg, status), join=join)
@@ -0,0 +1,73 @@
+"""Time the construction of palisades forms from their JSON configuration.
+For usage instructions:
+    python benchmark_startup.py --help
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+logging.basicConfig(format='%(levelname)-8s %(message)s',
+                    level=logging.WARNING, datefmt='%m/%d/%Y %H:%M:%S ')
+
+from palisades import elements
+from palisades import utils
+from palisades.i18n import translation
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIGS = [
+    os.path.join(_REPO_DIR, 'iui_json', 'carbon.json.pal'),
+    os.path.join(_REPO_DIR, 'test', 'data', 'palisades_config',
+                 'all_elements.json'),
+]
+
+
+def time_form_startup(config_uri, repeats, lang_code='en',
+                      ignore_prev_runs=True):
+    """Build a Form from config_uri repeats times, the way Application does.
+
+    Returns a list of the wall-clock seconds taken by each construction."""
+    timings = []
+    for _ in range(repeats):
+        start_time = time.time()
+        try:
+            _, configuration = translation.translate_json(config_uri,
+                                                          lang_code)
+        except IndexError:
+            # configuration has no translatable strings.
+            configuration = utils.load_json(config_uri)
+        elements.Form(configuration, ignore_prev_runs=ignore_prev_runs,
+                      initial_signals=True)
+        timings.append(time.time() - start_time)
+    return timings
+
+
+def main(user_args=None):
+    parser = argparse.ArgumentParser(description="""Benchmark the construction
+            of palisades forms.""")
+    parser.add_argument('config_uris', nargs='*', default=DEFAULT_CONFIGS,
+        help="""URIs to palisades JSON configurations on disk (default: the
+        carbon and all_elements sample configurations).""")
+    parser.add_argument('-n', '--repeats', type=int, default=10,
+        dest='repeats', help="""Number of times to build each form.
+        (default=10)""")
+    parser.add_argument('--lastrun', action='store_true', default=False,
+        dest='lastrun', help="""Load each form's lastrun state, if one
+        exists.""")
+
+    args = parser.parse_args(user_args)
+
+    for config_uri in args.config_uris:
+        try:
+            timings = time_form_startup(config_uri, args.repeats,
+                                        ignore_prev_runs=not args.lastrun)
+        except Exception as error:
+            print '%-40s failed: %r' % (os.path.basename(config_uri), error)
+            continue
+        print '%-40s min %8.2fms  mean %8.2fms  (n=%s)' % (
+            os.path.basename(config_uri), min(timings) * 1000,
+            sum(timings) / len(timings) * 1000, len(timings))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+"""Compare how long palisades takes to save and load large lastrun states in
+each of the supported state file formats.
+For usage instructions:
+    python benchmark_state.py --help
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+logging.basicConfig(format='%(levelname)-8s %(message)s',
+                    level=logging.WARNING, datefmt='%m/%d/%Y %H:%M:%S ')
+
+from palisades import elements
+from palisades import fileio
+
+MULTI_FORM_CONFIG = {
+    'modelName': 'State benchmark',
+    'elements': [
+        {
+            'id': 'multi',
+            'type': 'multi',
+            'args_id': 'multi',
+            'template': {
+                'type': 'text',
+            },
+        },
+    ],
+}
+
+
+def build_states(num_rows):
+    """Build a lastrun state dictionary for MULTI_FORM_CONFIG with num_rows
+    rows in its Multi element.
+
+    Returns a tuple of (form, state dictionary)."""
+    form = elements.Form(MULTI_FORM_CONFIG, ignore_prev_runs=True)
+    states = form.snapshot().state()
+    multi_id = form.find_element('multi').get_id()
+    states[multi_id]['value'] = [u'row value %s' % index
+                                 for index in range(num_rows)]
+    return form, states
+
+
+def time_call(repeats, func, *args):
+    """Call func(*args) repeats times.
+
+    Returns the minimum wall-clock seconds taken by a call."""
+    timings = []
+    for _ in range(repeats):
+        start_time = time.time()
+        func(*args)
+        timings.append(time.time() - start_time)
+    return min(timings)
+
+
+def main(user_args=None):
+    parser = argparse.ArgumentParser(description="""Benchmark saving and
+            loading palisades lastrun states in each state format.""")
+    parser.add_argument('-r', '--rows', type=int, default=10000,
+        dest='rows', help="""Number of rows in the Multi element's saved
+        state. (default=10000)""")
+    parser.add_argument('-n', '--repeats', type=int, default=5,
+        dest='repeats', help="""Number of times to save and read each state
+        file. (default=5)""")
+    parser.add_argument('--apply', action='store_true', default=False,
+        dest='apply', help="""Also time loading each state file into a form
+        with Form.load_state().  Creating the Multi's rows is much slower than
+        reading the file.""")
+
+    args = parser.parse_args(user_args)
+
+    form, states = build_states(args.rows)
+    workspace = tempfile.mkdtemp()
+    try:
+        for state_format in fileio.STATE_FORMATS:
+            state_uri = os.path.join(workspace, 'lastrun.%s' % state_format)
+            save_time = time_call(args.repeats, fileio.save_state, states,
+                                  state_uri, state_format)
+            read_time = time_call(args.repeats, fileio.read_state, state_uri)
+            message = '%-8s %6s rows  %8.1fKB  save %8.2fms  read %8.2fms' % (
+                state_format, args.rows, os.path.getsize(state_uri) / 1024.,
+                save_time * 1000, read_time * 1000)
+            if args.apply:
+                apply_time = time_call(1, form.load_state, state_uri)
+                message += '  load_state %8.2fms' % (apply_time * 1000)
+            print message
+    finally:
+        shutil.rmtree(workspace)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
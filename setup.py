@@ -67,6 +67,11 @@ setup(
     natcap_version='palisades/version.py',
     setup_requires=['natcap.versioner>=0.4.2'],
     install_requires=['natcap.versioner>=0.4.2'],
+    entry_points={
+        'console_scripts': [
+            'palisades = palisades.cli:main',
+        ],
+    },
     cmdclass={
         'build': build,
         'build_trans': build_translations,
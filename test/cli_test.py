@@ -0,0 +1,106 @@
+import logging
+import unittest
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import mock
+
+from palisades import cli
+from palisades import elements
+from palisades import utils
+
+TEST_DIR = os.path.dirname(__file__)
+DATA_DIR = os.path.join(TEST_DIR, 'data')
+
+
+class RunTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.config_uri = os.path.join(self.workspace, 'config.json')
+        utils.save_dict_to_json({
+            'modelName': 'cli_test',
+            'targetScript': os.path.join(DATA_DIR, 'sample_scripts.py'),
+            'targetFunction': 'try_logging',
+            'elements': [
+                {
+                    'id': 'workspace_dir',
+                    'type': 'folder',
+                    'label': {'en': 'Workspace'},
+                    'args_id': 'workspace_dir',
+                    'required': True,
+                },
+            ],
+        }, self.config_uri)
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def save_params(self, name, workspace_dir):
+        """Save a parameter file for the test form.  Returns its URI."""
+        form = cli.build_form(self.config_uri)
+        form.find_element('workspace_dir').set_value(workspace_dir)
+        params_uri = os.path.join(self.workspace, name)
+        form.save_state(params_uri)
+        return params_uri
+
+    def test_run(self):
+        """Verify each parameter file is run in its own workspace."""
+        run_workspaces = [os.path.join(self.workspace, 'run_%s' % index)
+                          for index in range(3)]
+        params_uris = [self.save_params('params_%s.json' % index, workspace)
+                       for index, workspace in enumerate(run_workspaces)]
+
+        exit_code = cli.main(['run', self.config_uri, '--params'] +
+                             params_uris + ['--workers', '2', '--lang', 'en'])
+        self.assertEqual(exit_code, 0)
+
+        for workspace in run_workspaces:
+            log_files = [filename for filename in os.listdir(workspace)
+                         if filename.endswith('.txt')]
+            self.assertEqual(len(log_files), 1)
+
+    def test_invalid_params(self):
+        """Verify parameter files with invalid inputs aren't run."""
+        params_uri = self.save_params('params.json', '')
+        self.assertFalse(cli.run(self.config_uri, [params_uri]))
+
+    def test_unknown_element(self):
+        """Verify a parameter file that can't be loaded is skipped and the
+        others still run."""
+        bad_params_uri = os.path.join(self.workspace, 'bad_params.json')
+        utils.save_dict_to_json({'no_such_element': {'value': 1}},
+                                bad_params_uri)
+        run_workspace = os.path.join(self.workspace, 'run')
+        params_uri = self.save_params('params.json', run_workspace)
+
+        load_state = elements.Form.load_state
+
+        def _load_state(form, state_uri):
+            if state_uri == bad_params_uri:
+                raise KeyError('no_such_element')
+            return load_state(form, state_uri)
+
+        with mock.patch.object(elements.Form, 'load_state', autospec=True,
+                               side_effect=_load_state):
+            self.assertFalse(cli.run(self.config_uri,
+                                     [bad_params_uri, params_uri]))
+        self.assertTrue(os.path.exists(run_workspace))
+
+    def test_main_removes_handler(self):
+        """Verify main() doesn't leave its log handler on the root logger."""
+        root_handlers = list(logging.getLogger().handlers)
+        params_uri = self.save_params('params.json', '')
+        cli.main(['run', self.config_uri, '--params', params_uri,
+                  '--lang', 'en'])
+        self.assertEqual(logging.getLogger().handlers, root_handlers)
+
+    def test_gui_not_imported(self):
+        """Verify the command line interface doesn't import the GUI."""
+        gui_modules = subprocess.check_output([sys.executable, '-c',
+            'import sys; from palisades import cli; '
+            'print [name for name in sys.modules '
+            'if name.startswith("palisades.gui")]'])
+        self.assertEqual(gui_modules.strip(), '[]')
@@ -4,6 +4,11 @@ classes."""
 import time
 import datetime
 import logging
+import os
+import tempfile
+
+from palisades import execution
+from palisades import utils
 
 logging.basicConfig(format='%(asctime)s %(name)-18s %(threadName)-10s %(levelname)-8s \
      %(message)s', level=logging.DEBUG, datefmt='%m/%d/%Y %H:%M:%S ')
@@ -21,5 +26,28 @@ def try_logging(args):
     LOGGER.debug('Starting the function')
     LOGGER.debug('Finishing the function')
 
+def report_progress(args):
+    progress_logger = utils.ProgressLoggerAdapter(LOGGER, {})
+    for i in range(1, 5):
+        progress_logger.info('Step %s of 4', i, progress=(i, 4))
+
+def raise_error(args):
+    raise ValueError('Something went wrong')
+
+def sleep_forever(args):
+    while True:
+        time.sleep(0.1)
+
+def wait_for_cancel(args):
+    while True:
+        execution.check_cancelled()
+        time.sleep(0.05)
+
+def make_tempfiles(args):
+    time.sleep(0.2)  # give concurrent runs time to start.
+    file_handle, file_path = tempfile.mkstemp()
+    os.close(file_handle)
+    args['tempfiles'] += [file_path, tempfile.mkdtemp()]
+
 def return_one():
     return 1
@@ -2,14 +2,18 @@ import unittest
 import os
 import time
 import shutil
+import threading
 import tempfile
 import logging
 
 import mock
 
 import palisades
+import palisades.gui
 from palisades import elements as elements
+from palisades import utils
 from palisades import validation
+from palisades import execution
 
 TEST_DIR = os.path.dirname(__file__)
 IUI_CONFIG = os.path.join(TEST_DIR, 'data', 'iui_config')
@@ -583,6 +587,52 @@ class TextTest(LabeledPrimitiveTest):
         element._validator.join()
         self.assertFalse(element.is_valid())
 
+    def test_reads_do_not_lock(self):
+        """Verify getters don't wait on a lock held by another thread."""
+        lock_held = threading.Event()
+        release_lock = threading.Event()
+
+        def _hold_lock():
+            with self.element.lock:
+                lock_held.set()
+                release_lock.wait(5)
+
+        holder = threading.Thread(target=_hold_lock)
+        holder.start()
+        try:
+            lock_held.wait(5)
+            reads = {}
+
+            def _read():
+                reads['value'] = self.element.value()
+                reads['is_enabled'] = self.element.is_enabled()
+                reads['is_hidden'] = self.element.is_hidden()
+                reads['label'] = self.element.label()
+
+            reader = threading.Thread(target=_read)
+            reader.start()
+            reader.join(1)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual(sorted(reads),
+                             ['is_enabled', 'is_hidden', 'label', 'value'])
+        finally:
+            release_lock.set()
+            holder.join()
+
+    def test_value_cast_cached(self):
+        """Verify the cast value is reused until the value changes."""
+        self.element.set_value('abc')
+        cast = mock.MagicMock(return_value=u'abc')
+        with mock.patch.dict(elements.Primitive.type_casts, {'string': cast}):
+            self.element._cached_value = None
+            self.assertEqual(self.element.value(), u'abc')
+            self.assertEqual(self.element.value(), u'abc')
+            self.assertEqual(cast.call_count, 1)
+
+            self.element.set_value('def')
+            self.element.value()
+            self.assertEqual(cast.call_count, 2)
+
 class FileTest(TextTest):
     def setUp(self):
         self.element = elements.File({})
@@ -1123,6 +1173,7 @@ class MultiTest(ContainerTest):
             'element_added',
             'element_removed',
             'interactivity_changed',
+            'rows_replaced',
             'satisfaction_changed',
             'toggled',
             'visibility_changed'
@@ -1207,6 +1258,48 @@ class MultiTest(ContainerTest):
         remove_elem_func.assert_called_with(1)
         self.assertEqual(len(self.element.elements()), 2)
 
+    def test_set_value_replaces_rows(self):
+        for i in range(2):
+            self.element.add_element()
+
+        rows_seen = []
+        add_elem_func = mock.MagicMock()
+        self.element.element_added.register(add_elem_func)
+        self.element.rows_replaced.register(rows_seen.append)
+
+        self.element.set_value(['aaa', 'bbb', 'ccc'])
+        time.sleep(0.1)  # callbacks are called in threads.
+
+        # a single rows_replaced signal and no element_added signals.
+        self.assertFalse(add_elem_func.called)
+        self.assertEqual(len(rows_seen), 1)
+        self.assertEqual(rows_seen[0], self.element.elements())
+        self.assertEqual(self.element.value(), ['aaa', 'bbb', 'ccc'])
+
+    def test_clear(self):
+        for i in range(3):
+            self.element.add_element()
+
+        rows_seen = []
+        self.element.rows_replaced.register(rows_seen.append)
+        self.element.clear()
+        time.sleep(0.1)  # callbacks are called in threads.
+
+        self.assertEqual(len(self.element.elements()), 0)
+        self.assertEqual(rows_seen, [[]])
+
+    def test_rows_share_compiled_template(self):
+        """Verify rows are built from the template compiled at init."""
+        with mock.patch.object(self.element, '_registrar', {}):
+            # the registrar is no longer consulted when adding rows.
+            self.element.add_element()
+            self.element.add_element()
+
+        row_a, row_b = self.element.elements()
+        self.assertTrue(isinstance(row_a, elements.Text))
+        self.assertTrue(row_a.config is row_b.config)
+        self.assertTrue(row_a.config is self.element.config['template'])
+
     def test_value(self):
         # add a couple of default elements
         self.element.add_element()
@@ -1492,6 +1585,16 @@ class DropdownTest(LabeledPrimitiveTest):
     def setUp(self):
         self.element = elements.Dropdown({})
 
+    def test_value_cache_invalidated_by_options(self):
+        dropdown = elements.Dropdown({'options': ['a', 'b'], 'defaultValue': 1})
+        self.assertEqual(dropdown.value(), 'b')
+
+        dropdown.set_options(['c', 'd'], new_value=1)
+        self.assertEqual(dropdown.value(), 'd')
+
+        dropdown.set_value(0)
+        self.assertEqual(dropdown.value(), 'c')
+
     def test_signals(self):
         expected_signals = [
             'config_changed',
@@ -1686,6 +1789,62 @@ class DropdownTest(LabeledPrimitiveTest):
         self.assertEqual(self.element.value(), 'No options specified')
 
 
+class CSVFieldDropdownTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.element = elements.CSVFieldDropdown({})
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def _make_csv(self, filename, header):
+        csv_path = os.path.join(self.workspace, filename)
+        with open(csv_path, 'w') as csv_file:
+            csv_file.write(header + '\n')
+            csv_file.write('1,2,3\n')
+        return csv_path
+
+    def test_load_columns(self):
+        csv_path = self._make_csv('a.csv', 'lucode,name,c_above')
+        self.element.load_columns(csv_path).join()
+        self.assertEqual(self.element.options, ['lucode', 'name', 'c_above'])
+        self.assertEqual(self.element.value(), 'lucode')
+
+    def test_load_columns_missing_file(self):
+        self.element.load_columns(os.path.join(self.workspace, 'x.csv')).join()
+        self.assertEqual(self.element.options, [])
+
+    def test_load_columns_cached(self):
+        csv_path = self._make_csv('a.csv', 'a,b')
+        other_dropdown = elements.CSVFieldDropdown({})
+        self.element.load_columns(csv_path).join()
+
+        with mock.patch.object(other_dropdown, 'read_columns') as read:
+            other_dropdown.load_columns(csv_path).join()
+        self.assertEqual(read.call_count, 0)
+        self.assertEqual(other_dropdown.options, ['a', 'b'])
+
+    def test_stale_load_ignored(self):
+        """Verify a slow, superseded load does not replace newer columns."""
+        csv_a = self._make_csv('stale.csv', 'old_1,old_2')
+        csv_b = self._make_csv('fresh.csv', 'new_1,new_2')
+        release_first = threading.Event()
+        read_columns = self.element.read_columns
+
+        def _slow_read(filepath):
+            if filepath == csv_a:
+                release_first.wait(5)
+            return read_columns(filepath)
+
+        with mock.patch.object(self.element, 'read_columns', _slow_read):
+            first_load = self.element.load_columns(csv_a)
+            self.element.load_columns(csv_b).join()
+            release_first.set()
+            first_load.join()
+
+        self.assertEqual(self.element.options, ['new_1', 'new_2'])
+
+
 class CheckBoxTest(LabeledPrimitiveTest):
     def setUp(self):
         self.element = elements.CheckBox({})
@@ -1881,6 +2040,22 @@ class FormTest(unittest.TestCase):
         form.submit()
         form.runner.executor.join()
 
+    def test_preload_modules(self):
+        """Verify the target script is imported when preloading is started."""
+        self.assertEqual(self.form.preload_thread, None)
+        self.form.preload_modules().join()
+        with mock.patch('palisades.execution._import_module') as import_module:
+            execution.PythonRunner(self.config['targetScript'],
+                {'workspace_dir': self.workspace})
+        self.assertEqual(import_module.call_count, 0)
+
+    def test_preload_modules_subprocess(self):
+        """Verify the target script isn't preloaded for a subprocess runner."""
+        self.form.set_runner(execution.SubprocessRunner)
+        with mock.patch('palisades.execution.preload_modules') as preload:
+            self.assertEqual(self.form.preload_modules(), None)
+        self.assertEqual(preload.call_count, 0)
+
     def test_form_is_valid(self):
         # form should be valid by default.
         self.assertEqual(self.form.form_is_valid(), True)
@@ -2386,3 +2561,179 @@ class FormTest(unittest.TestCase):
         self.assertFalse(text_1.is_satisfied())  # no longer satisfied
         self.assertFalse(text_2.is_required())  # b/c text_1 not satisfied.
 
+
+    def test_bulk_update(self):
+        values_seen = []
+        text_1 = self.form.find_element('text_1')
+        text_1.value_changed.register(values_seen.append)
+
+        with mock.patch.object(text_1._validator, 'validate') as validate:
+            self.form.bulk_update({'text_1': 'abc', 'workspace': '/tmp'})
+            time.sleep(0.1)  # callbacks are called in threads.
+
+        self.assertEqual(self.form.find_element('workspace').value(), '/tmp')
+        self.assertEqual(values_seen, ['abc'])
+        self.assertEqual(validate.call_count, 1)
+
+    def test_bulk_update_unknown_id(self):
+        with self.assertRaises(KeyError):
+            self.form.bulk_update({'text_1': 'abc', 'nonexistent': 1})
+        self.assertEqual(self.form.find_element('text_1').value(), '7')
+
+    def test_batch_coalesces_signals(self):
+        text_1 = self.form.find_element('text_1')
+        values_seen = []
+        text_1.value_changed.register(values_seen.append)
+
+        with self.form.batch():
+            for value in ['a', 'b', 'c']:
+                text_1.set_value(value)
+            with self.form.batch():  # nested batches are allowed.
+                text_1.set_value('d')
+            self.assertEqual(values_seen, [])
+        time.sleep(0.1)  # callbacks are called in threads.
+        self.assertEqual(values_seen, ['d'])
+
+    def test_batch_multi_rows(self):
+        """Verify each row added or removed in a batch is signalled."""
+        form = elements.Form({
+            'modelName': 'Example_multi',
+            'elements': [{'id': 'multi', 'type': 'multi'}],
+        }, ignore_prev_runs=True)
+        multi = form.find_element('multi')
+        indices_added = []
+        indices_removed = []
+        multi.element_added.register(indices_added.append)
+        multi.element_removed.register(indices_removed.append)
+
+        with form.batch():
+            multi.add_element()
+            multi.add_element()
+        time.sleep(0.1)  # callbacks are called in threads.
+        self.assertEqual(sorted(indices_added), [0, 1])
+
+        with form.batch():
+            multi.remove_element(0)
+            multi.remove_element(0)
+        time.sleep(0.1)
+        self.assertEqual(indices_removed, [0, 0])
+        self.assertEqual(len(multi.elements()), 0)
+
+    def test_lastrun_applied_before_signals(self):
+        """Verify lastrun values are in place before any signal is sent."""
+        form_config = {
+            "modelName": "Example form",
+            "targetScript": os.path.join(TEST_DIR, 'data',
+                'sample_scripts.py'),
+            "elements": [
+                {
+                    "id": "checkbox_1",
+                    "type": "checkbox",
+                    "args_id": "checkbox_1",
+                    "defaultValue": False,
+                    "signals": ["disables:checkbox_2"]
+                },
+                {
+                    "id": "checkbox_2",
+                    "type": "checkbox",
+                    "args_id": "checkbox_2",
+                    "defaultValue": False,
+                },
+            ]
+        }
+        lastrun_dir = tempfile.mkdtemp()
+        lastrun_uri = os.path.join(lastrun_dir, 'lastrun.json')
+        try:
+            form = elements.Form(form_config, ignore_prev_runs=True)
+            form.find_element('checkbox_1').set_value(True)
+            form.save_state(lastrun_uri)
+
+            values_seen = []
+            original_set_disabled = elements.CheckBox.set_disabled
+
+            def _set_disabled(element, new_state):
+                values_seen.append(new_state)
+                original_set_disabled(element, new_state)
+
+            with mock.patch.object(elements.Form, 'lastrun_uri',
+                                   return_value=lastrun_uri):
+                with mock.patch.object(elements.CheckBox, 'set_disabled',
+                                       _set_disabled):
+                    form = elements.Form(form_config, initial_signals=True)
+                    time.sleep(0.2)  # callbacks are called in threads.
+
+            self.assertTrue(form.find_element('checkbox_1').value())
+            self.assertFalse(form.find_element('checkbox_2').is_enabled())
+            # checkbox_1's lastrun state is the last one sent to checkbox_2.
+            self.assertEqual(values_seen[-1], True)
+        finally:
+            shutil.rmtree(lastrun_dir)
+
+    def test_snapshot(self):
+        """Verify args, errors and state all derive from one snapshot."""
+        snapshot = self.form.snapshot()
+        self.assertEqual(snapshot.arguments(), self.form.collect_arguments())
+        self.assertEqual(snapshot.is_valid(), self.form.form_is_valid())
+        self.assertEqual(snapshot.errors(), [])
+        self.assertEqual(sorted(snapshot.state()),
+                         sorted(e.get_id() for e in self.form.elements))
+
+        # later changes to the form don't alter the snapshot.
+        self.form.find_element('text_1').set_value('abc')
+        self.assertEqual(snapshot.arguments()['market_disc_rate'], '7')
+        self.assertEqual(self.form.collect_arguments()['market_disc_rate'],
+                         'abc')
+
+    def test_snapshot_busy_multi(self):
+        """Verify a snapshot doesn't wait on a Multi that holds its lock."""
+        form = elements.Form({
+            'modelName': 'Example_multi',
+            'elements': [{'id': 'multi', 'type': 'multi', 'args_id': 'rows'}],
+        }, ignore_prev_runs=True)
+        multi = form.find_element('multi')
+        multi.set_value(['a', 'b'])
+
+        lock_held = threading.Event()
+        release_lock = threading.Event()
+
+        def _hold_lock():
+            with multi.lock:
+                lock_held.set()
+                release_lock.wait(5)
+        holder = threading.Thread(target=_hold_lock)
+        holder.start()
+        try:
+            lock_held.wait(5)
+            snapshots = []
+            reader = threading.Thread(
+                target=lambda: snapshots.append(form.snapshot()))
+            reader.start()
+            reader.join(2)
+            self.assertEqual(len(snapshots), 1)
+            self.assertEqual(snapshots[0].arguments(), {'rows': ['a', 'b']})
+        finally:
+            release_lock.set()
+            holder.join()
+
+    def test_snapshot_without_state(self):
+        snapshot = self.form.snapshot(include_state=False)
+        self.assertTrue('timber_shape_uri' in snapshot.arguments())
+        self.assertRaises(AssertionError, snapshot.state)
+
+    def test_load_state_compact(self):
+        """Verify a compact state file round-trips without re-hashing."""
+        state_dir = tempfile.mkdtemp()
+        state_uri = os.path.join(state_dir, 'state.bin')
+        try:
+            self.form.find_element('text_1').set_value('abc')
+            self.form.save_state(state_uri, state_format='compact')
+            self.form.find_element('text_1').set_value('7')
+
+            with mock.patch('palisades.utils.get_md5sum',
+                            side_effect=utils.get_md5sum) as get_md5sum:
+                self.form.load_state(state_uri)
+            self.assertEqual(self.form.find_element('text_1').value(), 'abc')
+            # only the debug logging of the element without a user ID hashes.
+            self.assertTrue(get_md5sum.call_count < len(self.form.elements))
+        finally:
+            shutil.rmtree(state_dir)
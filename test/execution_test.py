@@ -1,8 +1,14 @@
 import unittest
 import imp
+import json
 import os
 import logging
+import Queue
 import shutil
+import sys
+import tempfile
+import threading
+import time
 
 from palisades import execution
 
@@ -33,6 +39,151 @@ class ExecutionUtilsTest(unittest.TestCase):
         executeable, name = execution.locate_module(module_path)
         self.assertEqual(executeable.return_one(), 1)
 
+    def test_locate_module_cached(self):
+        """Verify unchanged source files aren't executed again."""
+        module_path = os.path.join(DATA_DIR, 'sample_scripts.py')
+        first_module, first_name = execution.locate_module(module_path)
+        second_module, second_name = execution.locate_module(module_path)
+        self.assertTrue(first_module is second_module)
+        self.assertEqual(first_name, second_name)
+
+    def test_locate_module_file_changed(self):
+        """Verify source files are loaded again when they change."""
+        workspace = tempfile.mkdtemp()
+        try:
+            module_path = os.path.join(workspace, 'changing_module.py')
+            with open(module_path, 'w') as module_file:
+                module_file.write('VALUE = 1\n')
+            first_module, name = execution.locate_module(module_path)
+            self.assertEqual(first_module.VALUE, 1)
+
+            with open(module_path, 'w') as module_file:
+                module_file.write('VALUE = 22\n')
+            modified_time = os.path.getmtime(module_path) + 10
+            os.utime(module_path, (modified_time, modified_time))
+            second_module, name = execution.locate_module(module_path)
+            self.assertEqual(second_module.VALUE, 22)
+        finally:
+            shutil.rmtree(workspace)
+
+    def test_locate_module_two_files(self):
+        """Verify each source file keeps its own module."""
+        workspace = tempfile.mkdtemp()
+        try:
+            modules = {}
+            for name in ['a', 'b']:
+                module_path = os.path.join(workspace, '%s.py' % name)
+                with open(module_path, 'w') as module_file:
+                    module_file.write('def execute():\n    return %r\n' %
+                                      name.upper())
+                modules[name] = module_path
+
+            module_a, name_a = execution.locate_module(modules['a'])
+            module_b, name_b = execution.locate_module(modules['b'])
+            self.assertEqual(module_a.execute(), 'A')
+            self.assertEqual(module_b.execute(), 'B')
+            self.assertEqual(
+                execution.locate_module(modules['a'])[0].execute(), 'A')
+            self.assertEqual((name_a, name_b), ('a', 'b'))
+        finally:
+            shutil.rmtree(workspace)
+
+    def test_get_module_from_path(self):
+        """Verify repeated imports from a folder don't grow sys.path."""
+        for _ in range(3):
+            module = execution._get_module_from_path(['sample_scripts'],
+                                                     [DATA_DIR])
+            self.assertEqual(module.return_one(), 1)
+        self.assertTrue(sys.path.count(DATA_DIR) <= 1)
+
+class PatchTempdirTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_no_tempdir(self):
+        default_tempdir = tempfile.gettempdir()
+        with execution.patch_tempdir(None):
+            self.assertEqual(tempfile.gettempdir(), default_tempdir)
+
+    def test_threads(self):
+        """Verify each thread's tempfiles are routed to its own tempdir."""
+        default_tempdir = tempfile.gettempdir()
+        old_tempdir = tempfile.tempdir
+        old_environment = dict((name, os.environ.get(name))
+                               for name in ['TMP', 'TEMP', 'TEMPDIR'])
+        entered = [threading.Event(), threading.Event()]
+        found_tempdirs = {}
+
+        def use_tempdir(index):
+            tempdir = os.path.join(self.workspace, str(index))
+            os.makedirs(tempdir)
+            with execution.patch_tempdir(tempdir):
+                entered[index].set()
+                for event in entered:
+                    event.wait(5)
+                found_tempdirs[index] = os.path.dirname(
+                    tempfile.mkdtemp())
+
+        threads = [threading.Thread(target=use_tempdir, args=(index,))
+                   for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(found_tempdirs, {
+            0: os.path.join(self.workspace, '0'),
+            1: os.path.join(self.workspace, '1'),
+        })
+        self.assertEqual(tempfile.gettempdir(), default_tempdir)
+        self.assertTrue(tempfile.gettempdir is execution._ORIGINAL_GETTEMPDIR)
+        self.assertEqual(tempfile.tempdir, old_tempdir)
+        self.assertEqual(dict((name, os.environ.get(name))
+                              for name in ['TMP', 'TEMP', 'TEMPDIR']),
+                         old_environment)
+
+    def test_tempfile_tempdir(self):
+        """Verify tempfile.tempdir follows the latest active tempdir and the
+        tempfile module is restored when the last context exits."""
+        old_tempdir = tempfile.tempdir
+        outer_tempdir = os.path.join(self.workspace, 'outer')
+        inner_tempdir = os.path.join(self.workspace, 'inner')
+
+        with execution.patch_tempdir(outer_tempdir):
+            self.assertEqual(tempfile.tempdir, outer_tempdir)
+            with execution.patch_tempdir(inner_tempdir):
+                self.assertEqual(tempfile.tempdir, inner_tempdir)
+            self.assertEqual(tempfile.tempdir, outer_tempdir)
+            self.assertFalse(
+                tempfile.gettempdir is execution._ORIGINAL_GETTEMPDIR)
+
+        self.assertEqual(tempfile.tempdir, old_tempdir)
+        self.assertTrue(tempfile.gettempdir is execution._ORIGINAL_GETTEMPDIR)
+
+    def test_concurrent_executors(self):
+        module = imp.load_source('sample', os.path.join(DATA_DIR,
+            'sample_scripts.py'))
+        executors = []
+        for index in range(2):
+            tempdir = os.path.join(self.workspace, str(index))
+            os.makedirs(tempdir)
+            executors.append(execution.Executor(module,
+                {'tempfiles': []}, 'make_tempfiles', tempdir=tempdir))
+        for executor in executors:
+            executor.start()
+        for executor in executors:
+            executor.join()
+
+        for executor in executors:
+            self.assertFalse(executor.failed)
+            self.assertEqual(
+                [os.path.dirname(path) for path in executor.args['tempfiles']],
+                [executor.tempdir, executor.tempdir])
+
+
 class ExecutorTest(unittest.TestCase):
     def test_smoke_execute(self):
         module = imp.load_source('sample', os.path.join(DATA_DIR,
@@ -49,6 +200,18 @@ class ExecutorTest(unittest.TestCase):
         executor.start()
         executor.join()
 
+    def test_missing_function(self):
+        """Verify a missing function fails the run and closes its logs."""
+        module = imp.load_source('sample', os.path.join(DATA_DIR,
+            'sample_scripts.py'))
+        executor = execution.Executor(module, {}, func_name='no_such_function')
+        executor.start()
+        executor.join()
+
+        self.assertTrue(executor.failed)
+        self.assertTrue(isinstance(executor.exception, AttributeError))
+        self.assertFalse(executor.name in execution.LOG_ROUTER._routes)
+
     def test_with_logging(self):
         """Verify only the thread-based logging is included"""
         module = imp.load_source('sample', os.path.join(DATA_DIR,
@@ -69,6 +232,65 @@ class ExecutorTest(unittest.TestCase):
         self.assertEqual(count_lines(temp_file_uri), 10)
         os.remove(temp_file_uri)
 
+class ProgressMonitorTest(unittest.TestCase):
+    def test_parse_progress(self):
+        self.assertEqual(execution.parse_progress(0.25), (0.25, None, None))
+        self.assertEqual(execution.parse_progress((1, 4)), (0.25, 1.0, 4.0))
+        self.assertEqual(execution.parse_progress(1.5), (1.0, None, None))
+        self.assertRaises(ValueError, execution.parse_progress, (1, 0))
+        self.assertRaises(ValueError, execution.parse_progress, None)
+
+    def test_executor_progress(self):
+        """Verify progress records from the run are tracked and emitted."""
+        module = imp.load_source('sample', os.path.join(DATA_DIR,
+            'sample_scripts.py'))
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        executor = execution.Executor(module, {},
+                                      func_name='report_progress',
+                                      tempdir=tempdir)
+        statuses_seen = []
+
+        def _progress_changed(status):
+            statuses_seen.append(status)
+        executor.progress_monitor.progress_changed.register(
+            _progress_changed)
+        executor.start()
+        executor.join()
+        time.sleep(0.1)  # callbacks are called in threads.
+
+        status = executor.progress_monitor.status()
+        self.assertEqual(status['fraction'], 1.0)
+        self.assertEqual((status['completed'], status['total']), (4.0, 4.0))
+        self.assertEqual(status['message'], 'Step 4 of 4')
+        # the first and the final status are always emitted.
+        fractions_seen = sorted(status['fraction'] for status in statuses_seen)
+        self.assertEqual(fractions_seen[0], 0.25)
+        self.assertEqual(fractions_seen[-1], 1.0)
+
+class CancellationTest(unittest.TestCase):
+    def test_check_cancelled(self):
+        # outside of a run, there's nothing to cancel.
+        self.assertFalse(execution.cancel_requested())
+        execution.check_cancelled()
+
+    def test_executor_cancel(self):
+        """Verify a threaded run stops cooperatively when cancelled."""
+        module = imp.load_source('sample', os.path.join(DATA_DIR,
+            'sample_scripts.py'))
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        executor = execution.Executor(module, {}, func_name='wait_for_cancel',
+                                      tempdir=tempdir)
+        executor.start()
+        time.sleep(0.2)
+        executor.cancel()
+        executor.join(5)
+
+        self.assertFalse(executor.is_alive())
+        self.assertTrue(executor.cancelled)
+        self.assertFalse(executor.failed)
+
 class LogManagerTest(unittest.TestCase):
     def test_creation_logfile(self):
         """Verify that logging works when we give a uri to the Manager."""
@@ -135,6 +357,114 @@ class LogManagerTest(unittest.TestCase):
 
         os.remove(log_file_uri)
 
+    def test_listener_thread(self):
+        """Verify records are handled in the listener thread."""
+        handled = []
+
+        class RecordingHandler(logging.Handler):
+            def emit(self, record):
+                handled.append((record.getMessage(),
+                                threading.current_thread().name))
+
+        manager = execution.LogManager(threading.current_thread().name)
+        manager.add_log_handler(RecordingHandler())
+        LOGGER.info('Log %s', 'me!')
+        manager.flush()
+        manager.close()
+        self.assertEqual(handled, [('Log me!', 'log_listener')])
+
+    def test_queue_drop_progress(self):
+        """Verify progress records are dropped when the queue is full."""
+        queue_handler = execution.QueueHandler(Queue.Queue(1))
+        for index in range(3):
+            queue_handler.handle(logging.makeLogRecord(
+                {'msg': 'Step %s', 'args': (index,), 'progress': index}))
+        self.assertEqual(queue_handler.dropped, 2)
+        self.assertEqual(queue_handler.queue.get().getMessage(), 'Step 0')
+
+
+class ErrorQueueFilterTest(unittest.TestCase):
+    def make_record(self, msg, args=(), name='model'):
+        return logging.makeLogRecord({'name': name, 'msg': msg,
+            'args': args, 'levelno': logging.WARNING,
+            'levelname': 'WARNING'})
+
+    def test_bounded(self):
+        """Verify only the first and last records are kept."""
+        error_filter = execution.ErrorQueueFilter(max_records=2)
+        for index in range(10):
+            error_filter.filter(self.make_record('Block %s has nodata',
+                                                 (index,)))
+        error_filter.filter(self.make_record('Slow', name='other'))
+
+        first_records, last_records = error_filter.get_records()
+        self.assertEqual([record.getMessage() for record in first_records],
+                         ['Block 0 has nodata', 'Block 1 has nodata'])
+        self.assertEqual([record.getMessage() for record in last_records],
+                         ['Block 9 has nodata', 'Slow'])
+        self.assertEqual(error_filter.count(), 11)
+        self.assertEqual(error_filter.summary(), [
+            (10, 'model', 'WARNING', u'Block %s has nodata'),
+            (1, 'other', 'WARNING', u'Slow'),
+        ])
+
+    def test_max_groups(self):
+        error_filter = execution.ErrorQueueFilter(max_groups=2)
+        for index in range(5):
+            error_filter.filter(self.make_record('Message %s' % index))
+        self.assertEqual(error_filter.summary()[0],
+                         (3,) + execution.ErrorQueueFilter.OTHER_GROUP)
+
+    def test_print_errors(self):
+        """Verify the logfile ends with a summary of the warnings."""
+        log_file = os.path.join(DATA_DIR, 'sample_log.txt')
+        manager = execution.LogManager(threading.current_thread().name,
+                                       log_file)
+        manager.logfile_handler.removeFilter(manager.error_queue_filter)
+        manager.error_queue_filter = execution.ErrorQueueFilter(max_records=1)
+        manager.logfile_handler.addFilter(manager.error_queue_filter)
+        for index in range(5):
+            LOGGER.warning('Block %s has nodata', index)
+        manager.print_errors()
+        manager.close()
+
+        log_text = open(log_file).read()
+        os.remove(log_file)
+        self.assertTrue('... 3 more warnings not shown ...' in log_text)
+        self.assertTrue('WARNING   test    Block %s has nodata' in log_text)
+
+
+class LogRouterTest(unittest.TestCase):
+    def test_routing(self):
+        """Verify records only reach the handlers of their thread."""
+        logger = logging.getLogger('test.router')
+        router = execution.LogRouter(logger)
+        handled = dict((name, []) for name in ['a', 'b'])
+
+        class RecordingHandler(logging.Handler):
+            def __init__(self, name):
+                logging.Handler.__init__(self)
+                self.name = name
+
+            def emit(self, record):
+                handled[self.name].append(record.getMessage())
+
+        handlers = dict((name, RecordingHandler(name)) for name in handled)
+        for name, handler in handlers.iteritems():
+            router.add_route('thread_' + name, handler)
+        self.assertTrue(router in logger.handlers)
+
+        for thread_name in ['thread_a', 'thread_b', 'thread_c']:
+            logger.handle(logging.makeLogRecord(
+                {'name': 'test.router', 'msg': thread_name,
+                 'threadName': thread_name, 'levelno': logging.INFO}))
+        self.assertEqual(handled, {'a': ['thread_a'], 'b': ['thread_b']})
+
+        for name, handler in handlers.iteritems():
+            router.remove_route('thread_' + name, handler)
+        self.assertFalse(router in logger.handlers)
+
+
 class PythonRunnerTest(unittest.TestCase):
     def test_smoke(self):
         module_path = os.path.join(DATA_DIR, 'sample_scripts.py')
@@ -146,3 +476,126 @@ class PythonRunnerTest(unittest.TestCase):
         shutil.rmtree(new_workspace)
 
     #TODO: Finish testing the PythonRunner class.
+
+
+class SubprocessRunnerTest(unittest.TestCase):
+    def setUp(self):
+        self.module_path = os.path.join(DATA_DIR, 'sample_scripts.py')
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def run_model(self, func_name, cancel=False, grace_period=5.0):
+        runner = execution.SubprocessRunner(self.module_path,
+            {'workspace_dir': self.workspace}, func_name)
+        executor = runner.executor
+        runner.start()
+        if cancel:
+            time.sleep(0.5)
+            runner.cancel(grace_period)
+        executor.join()
+        return executor
+
+    def test_logging(self):
+        """Verify the model's log records are written to the run's logfile."""
+        executor = self.run_model('try_logging')
+        self.assertFalse(executor.failed)
+
+        log_text = open(executor.log_manager.log_uri).read()
+        self.assertTrue('Starting the function' in log_text)
+        self.assertTrue('Finishing the function' in log_text)
+
+    def test_failure(self):
+        executor = self.run_model('raise_error')
+        self.assertTrue(executor.failed)
+        self.assertTrue('Something went wrong' in str(executor.exception))
+        self.assertTrue('ValueError' in executor.traceback)
+
+    def test_cancel(self):
+        """Verify a model that checks for cancellation stops cooperatively."""
+        executor = self.run_model('wait_for_cancel', cancel=True)
+        self.assertTrue(executor.cancelled)
+        self.assertFalse(executor.failed)
+
+        log_text = open(executor.log_manager.log_uri).read()
+        self.assertTrue('Execution cancelled' in log_text)
+
+    def test_cancel_terminate(self):
+        """Verify a model that ignores cancellation is terminated."""
+        executor = self.run_model('sleep_forever', cancel=True,
+                                  grace_period=0.2)
+        self.assertTrue(executor.cancelled)
+        self.assertFalse(executor.failed)
+
+
+class RunQueueTest(unittest.TestCase):
+    def setUp(self):
+        self.module_path = os.path.join(DATA_DIR, 'sample_scripts.py')
+        self.workspace = tempfile.mkdtemp()
+        self.queue_uri = os.path.join(self.workspace, 'queue.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_run_jobs(self):
+        """Verify queued jobs are run in their own workspaces."""
+        queue = execution.RunQueue(self.queue_uri, max_workers=2,
+            workspace_root=self.workspace)
+        job_ids = [queue.add(self.module_path, {}, func_name)
+                   for func_name in ['try_logging', 'raise_error',
+                                     'try_logging']]
+        self.assertEqual(queue.counts()['queued'], 3)
+
+        queue.start()
+        self.assertTrue(queue.wait(timeout=60))
+
+        jobs = queue.jobs()
+        self.assertEqual([job['id'] for job in jobs], job_ids)
+        self.assertEqual([job['status'] for job in jobs],
+                         ['finished', 'failed', 'finished'])
+        self.assertTrue('Something went wrong' in jobs[1]['error'])
+        self.assertEqual(len(set(job['args']['workspace_dir']
+                                 for job in jobs)), 3)
+        for job in jobs:
+            self.assertTrue(job['log_file'].startswith(
+                job['args']['workspace_dir']))
+            self.assertTrue(os.path.exists(job['log_file']))
+
+    def test_cancel_queued(self):
+        queue = execution.RunQueue(workspace_root=self.workspace)
+        job_id = queue.add(self.module_path, {}, 'try_logging')
+        queue.cancel(job_id)
+        self.assertEqual(queue.jobs()[0]['status'], 'cancelled')
+
+        queue.start()
+        self.assertTrue(queue.wait(timeout=0))
+        self.assertEqual(queue.jobs()[0]['log_file'], None)
+
+    def test_persistence(self):
+        """Verify the queue is restored from its file, and that interrupted
+        jobs are queued again."""
+        queue = execution.RunQueue(self.queue_uri,
+            workspace_root=self.workspace,
+            runner_class=execution.PythonRunner)
+        first_id = queue.add(self.module_path, {}, 'try_logging')
+        queue.add(self.module_path, {}, 'try_logging')
+        queue.cancel(first_id)
+
+        # simulate an application that exited while the job was running.
+        saved_queue = json.load(open(self.queue_uri))
+        saved_queue['jobs'][1]['status'] = 'running'
+        json.dump(saved_queue, open(self.queue_uri, 'w'))
+
+        restored_queue = execution.RunQueue(self.queue_uri,
+            workspace_root=self.workspace,
+            runner_class=execution.PythonRunner)
+        self.assertEqual([job['status'] for job in restored_queue.jobs()],
+                         ['cancelled', 'queued'])
+
+        new_id = restored_queue.add(self.module_path, {}, 'try_logging')
+        self.assertEqual(new_id, 2)
+
+        restored_queue.start()
+        self.assertTrue(restored_queue.wait(timeout=60))
+        self.assertEqual(restored_queue.counts()['finished'], 2)
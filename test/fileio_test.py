@@ -2,8 +2,14 @@ import subprocess
 import unittest
 import os
 import platform
+import json
+import shutil
+import tempfile
+
+import mock
 
 from palisades import fileio
+from palisades import utils
 
 TEST_DIR = os.path.dirname(__file__)
 FILEIO_DATA = os.path.join(TEST_DIR, 'data', 'fileio')
@@ -129,3 +135,120 @@ class FreeSpaceTest(unittest.TestCase):
 
     def test_free_space_auto_units_smoke(self):
         fileio.get_free_space(".")
+
+
+class StateFileTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_state_formats(self):
+        """Assert states round-trip through every state format."""
+        states = {
+            'a': {'value': u'foo', 'is_hidden': False},
+            'b': {'value': [[u'1', u'2']] * 3},
+            'c': None,
+        }
+        for state_format in fileio.STATE_FORMATS:
+            uri = os.path.join(self.workspace, state_format)
+            fileio.save_state(states, uri, state_format)
+            self.assertEqual(fileio.read_state(uri), states)
+
+    def test_compact_state_corrupt(self):
+        """Assert a truncated compact state file raises ValueError."""
+        uri = os.path.join(self.workspace, 'state.bin')
+        fileio.save_state({'a': {'value': u'foo'}}, uri, 'compact')
+        data = open(uri, 'rb').read()
+        open(uri, 'wb').write(data[:-4])
+        self.assertRaises(ValueError, fileio.read_state, uri)
+
+
+class FakeElement(object):
+    """A stand-in for an element whose state the LastrunStore autosaves."""
+    def __init__(self, element_id):
+        self.element_id = element_id
+        self.value_changed = utils.Communicator()
+        self.current_value = None
+
+    def get_id(self):
+        return self.element_id
+
+    def state(self):
+        return {'value': self.current_value}
+
+
+class LastrunStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+        self.uri = os.path.join(self.workspace, 'lastrun.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_save(self):
+        """Assert saved states are merged and written atomically."""
+        store = fileio.LastrunStore(self.uri)
+        self.assertTrue(store.save({'a': {'value': 1}, 'b': None}))
+        self.assertTrue(store.save({'a': {'value': 2}}))
+
+        self.assertEqual(json.load(open(self.uri)),
+                         {'a': {'value': 2}, 'b': None})
+        # no temporary files are left behind.
+        self.assertEqual(os.listdir(self.workspace), ['lastrun.json'])
+
+    def test_save_unchanged(self):
+        """Assert the file is not rewritten when no state changed."""
+        store = fileio.LastrunStore(self.uri)
+        store.save({'a': {'value': 1}})
+
+        with mock.patch('palisades.utils.write_atomic') as write_atomic:
+            self.assertFalse(store.save({'a': {'value': 1}}))
+        self.assertEqual(write_atomic.call_count, 0)
+
+    def test_autosave(self):
+        """Assert element changes are saved together after the delay."""
+        elements = [FakeElement('a'), FakeElement('b')]
+        store = fileio.LastrunStore(self.uri)
+        store.autosave(elements, delay=60)
+
+        for element in elements:
+            element.current_value = element.element_id
+            element.value_changed.emit(element.current_value, join=True)
+        self.assertFalse(os.path.exists(self.uri))
+
+        store.stop()
+        self.assertEqual(json.load(open(self.uri)),
+                         {'a': {'value': 'a'}, 'b': {'value': 'b'}})
+
+    def test_save_existing_file(self):
+        """Assert states already in the file are kept on a partial save."""
+        json.dump({'a': {'value': 1}, 'b': {'value': 2}}, open(self.uri, 'w'))
+
+        store = fileio.LastrunStore(self.uri)
+        self.assertTrue(store.save({'b': {'value': 3}}))
+        self.assertEqual(json.load(open(self.uri)),
+                         {'a': {'value': 1}, 'b': {'value': 3}})
+
+        # an unchanged state is not rewritten.
+        with mock.patch('palisades.utils.write_atomic') as write_atomic:
+            self.assertFalse(store.save({'a': {'value': 1}}))
+        self.assertEqual(write_atomic.call_count, 0)
+
+    def test_autosave_no_value(self):
+        """Assert a change emitted without a value is autosaved, and flushing
+        cancels the pending autosave."""
+        element = FakeElement('a')
+        element.current_value = 'a'
+        store = fileio.LastrunStore(self.uri)
+        store.autosave([element], delay=60)
+        element.value_changed.emit(None, join=True)
+
+        timer = store._timer
+        self.assertNotEqual(timer, None)
+        self.assertTrue(store.flush())
+        self.assertEqual(store._timer, None)
+        self.assertTrue(timer.finished.is_set())
+        self.assertEqual(json.load(open(self.uri)), {'a': {'value': 'a'}})
+        store.stop()
@@ -21,3 +21,67 @@ class TextGUITest(unittest.TestCase):
         self.gui._text_field.value_changed.emit(new_value)
         self.assertEqual(self.core_element.value(), new_value)
 
+
+class ContainerGUITest(unittest.TestCase):
+    def setUp(self):
+        self.core_element = elements.Container({
+            'collapsible': True,
+            'defaultValue': False,  # collapsed
+            'elements': [
+                {'type': 'text'},
+                {'type': 'file'},
+            ],
+        })
+
+    def test_lazy_views(self):
+        # verify that a collapsed container's views are only built once the
+        # container is expanded.
+        gui = core.ContainerGUI(self.core_element, lazy=True)
+        self.assertFalse(gui.is_populated())
+        self.assertEqual(gui.elements, [])
+
+        gui.widgets.set_collapsed(False)
+        self.assertTrue(gui.is_populated())
+        self.assertEqual(len(gui.elements), 2)
+
+    def test_eager_views(self):
+        gui = core.ContainerGUI(self.core_element)
+        self.assertTrue(gui.is_populated())
+        self.assertEqual(len(gui.elements), 2)
+
+class VirtualMultiGUITest(unittest.TestCase):
+    def setUp(self):
+        self.core_element = elements.Multi({
+            'virtualRows': True,
+            'defaultValue': ['a', 'b'],
+            'template': {'type': 'text'},
+        })
+
+    def test_can_represent(self):
+        self.assertTrue(core.VirtualMultiGUI.can_represent(self.core_element))
+        self.assertFalse(core.VirtualMultiGUI.can_represent(
+            elements.Multi({'template': {'type': 'text'}})))
+
+    def test_rows(self):
+        # verify that rows are read from and written to the core element
+        # without creating a view per row.
+        gui = core.VirtualMultiGUI(self.core_element)
+        self.assertEqual(gui.elements, [])
+        self.assertEqual(gui.widgets.count(), 2)
+        self.assertEqual(gui.row_value(0), 'a')
+
+        gui.set_row_value(1, 'c')
+        self.assertEqual(self.core_element.value(), ['a', 'c'])
+
+    def test_rows_watched_once(self):
+        # verify that replaying the current rows doesn't watch them twice.
+        gui = core.VirtualMultiGUI(self.core_element)
+        self.core_element.emit_signals()
+        self.core_element.rows_replaced.emit(self.core_element.elements(),
+                                             join=True)
+
+        for row in self.core_element.elements():
+            watchers = [callback for (priority, callback)
+                        in row.value_changed.callbacks
+                        if callback['func'] == gui._row_changed]
+            self.assertEqual(len(watchers), 1)
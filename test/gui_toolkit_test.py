@@ -130,6 +130,35 @@ class QtMultiTest(QtContainerTest):
         minus_button = self.widget.layout().itemAtPosition(2, 0).widget()
         self.assertEqual(isinstance(minus_button, qt4.Multi.MinusButton), True)
 
+    def test_replace_widgets(self):
+        new_views = [core.FileGUI(elements.File({'type': 'file'}))
+                     for i in range(3)]
+        self.widget.add_widget(new_views[0])
+        self.assertEqual(self.widget.count(), 1)
+
+        removed_func = mock.MagicMock()
+        self.widget.element_removed.register(removed_func)
+        self.widget.replace_widgets(new_views[1:])
+
+        # replacing rows does not signal that elements were removed.
+        self.assertEqual(self.widget.count(), 2)
+        self.assertFalse(removed_func.called)
+
+    def test_replace_widgets_reuses_rows(self):
+        # replacing rows removes the old rows' widgets from the layout, so
+        # the layout doesn't grow with every replacement.
+        layout = self.widget.layout()
+        old_view = core.FileGUI(elements.File({'type': 'file'}))
+        self.widget.replace_widgets([old_view])
+        row_count = layout.rowCount()
+
+        for i in range(3):
+            self.widget.replace_widgets(
+                [core.FileGUI(elements.File({'type': 'file'}))])
+        self.assertEqual(layout.rowCount(), row_count)
+        self.assertEqual(self.widget.count(), 1)
+        self.assertEqual(layout.indexOf(old_view.widgets[0]), -1)
+
     def test_remove_widget(self):
         # verify the starting number of rows.
         self.assertEqual(self.widget.layout().rowCount(), 2)
@@ -381,3 +410,26 @@ class RTMessagesDialogTest(unittest.TestCase):
     def setUp(self):
         self.widget = qt4.RealtimeMessagesDialog()
 
+
+    def test_write_batched(self):
+        # verify that writes are buffered until the next flush, and that
+        # only the most recent lines are kept.
+        widget = qt4.RealtimeMessagesDialog(max_lines=3)
+        for line in ['a\n', 'b\n', 'c\n']:
+            widget.write(line)
+        self.assertEqual(widget.statusArea.toPlainText(), '')
+
+        widget._flush_messages()
+        self.assertTrue(widget.statusArea.toPlainText().endswith('b\nc\n'))
+        self.assertTrue(widget.statusArea.document().blockCount() <= 3)
+
+    def test_flush_timer(self):
+        # verify the flush timer only runs while messages are buffered.
+        widget = qt4.RealtimeMessagesDialog()
+        self.assertFalse(widget._flush_timer.isActive())
+
+        widget.write('a\n')
+        self.assertTrue(widget._flush_timer.isActive())
+
+        widget._flush_messages()
+        self.assertFalse(widget._flush_timer.isActive())
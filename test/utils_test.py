@@ -1,6 +1,8 @@
 import time
 import unittest
 import os.path
+import shutil
+import tempfile
 
 import palisades
 from palisades import utils
@@ -24,6 +26,63 @@ class CommunicatorTest(unittest.TestCase):
 
         self.assertTrue(obj.called)
 
+    def test_emit_priority_order(self):
+        """Verify callbacks are started lowest priority first, in order."""
+        a = utils.Communicator()
+        calls = []
+
+        for name, priority in [('c', 2), ('a', 0), ('b', 1), ('a2', 0)]:
+            def callback(name=name):
+                calls.append(name)
+            a.register(callback, priority)
+
+        with mock.patch('palisades.utils.CommunicationWorker.start',
+                        lambda worker: worker.run()):
+            a.emit(None, join=False)
+
+        self.assertEqual(calls, ['a', 'a2', 'b', 'c'])
+
+    def test_hold_coalesces_emits(self):
+        """Verify held emits are deferred and only the last one is sent."""
+        a = utils.Communicator()
+        values_seen = []
+
+        def callback(value):
+            values_seen.append(value)
+        a.register(callback)
+
+        a.hold()
+        a.hold()
+        a.emit(1, join=True)
+        a.emit(2, join=True)
+        self.assertFalse(a.release())  # still held once
+        self.assertEqual(values_seen, [])
+
+        self.assertTrue(a.release())
+        self.assertEqual(values_seen, [2])
+        self.assertFalse(a.is_held())
+
+        # nothing pending, so a further release does not emit.
+        self.assertFalse(a.release())
+        self.assertEqual(values_seen, [2])
+
+    def test_hold_without_coalescing(self):
+        """Verify every held emit is sent in order if coalesce is False."""
+        a = utils.Communicator(coalesce=False)
+        values_seen = []
+
+        def callback(value):
+            values_seen.append(value)
+        a.register(callback)
+
+        a.hold()
+        a.emit(1, join=True)
+        a.emit(2, join=True)
+        self.assertEqual(values_seen, [])
+
+        self.assertTrue(a.release())
+        self.assertEqual(values_seen, [1, 2])
+
 
 class RepeatingTimerTest(unittest.TestCase):
     def test_timer_smoke(self):
@@ -43,6 +102,55 @@ class RepeatingTimerTest(unittest.TestCase):
             raise error
 
 
+
+class RingBufferTest(unittest.TestCase):
+    def test_drain(self):
+        buffer = utils.RingBuffer(3)
+        self.assertTrue(buffer.append(0))
+        for item in range(1, 5):
+            self.assertFalse(buffer.append(item))
+        self.assertEqual(len(buffer), 3)
+
+        # the two oldest items were discarded.
+        self.assertEqual(buffer.drain(), ([2, 3, 4], 2))
+        self.assertEqual(buffer.drain(), ([], 0))
+        self.assertTrue(buffer.append(5))
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        self.workspace = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.workspace)
+
+    def test_replace(self):
+        """Verify an existing file is replaced and no temp file is left."""
+        uri = os.path.join(self.workspace, 'file.txt')
+        utils.write_atomic(uri, 'old')
+        utils.write_atomic(uri, 'new')
+        self.assertEqual(open(uri).read(), 'new')
+        self.assertEqual(os.listdir(self.workspace), ['file.txt'])
+
+    def test_replace_windows(self):
+        """Verify the file is replaced in one step on Windows, never removed
+        first."""
+        uri = os.path.join(self.workspace, 'file.txt')
+        utils.write_atomic(uri, 'old')
+
+        with mock.patch('platform.system', return_value='Windows'), \
+                mock.patch('palisades.utils.ctypes.windll', create=True) \
+                as windll, mock.patch('os.remove') as remove:
+            windll.kernel32.MoveFileExW.return_value = 1
+            utils.write_atomic(uri, 'new')
+
+        self.assertEqual(remove.call_count, 0)
+        temp_uri, dest_uri, flags = (
+            windll.kernel32.MoveFileExW.call_args[0])
+        self.assertEqual(dest_uri, uri)
+        self.assertEqual(flags, 0x1 | 0x8)
+        os.remove(temp_uri)
+
+
 class DefaultsTest(unittest.TestCase):
     def test_apply_single_level_defaults_all_values_exist(self):
         defaults = {
@@ -162,6 +270,38 @@ class DefaultsTest(unittest.TestCase):
             }
         )
 
+    def test_defaults_template(self):
+        defaults = {
+            'a': 1,
+            'b': {
+                'c': 2,
+                'd': 3,
+            }
+        }
+        user_config = {
+            'b': {
+                'c': 'c',
+            }
+        }
+        template = utils.DefaultsTemplate(defaults)
+        merged_config = template.apply(user_config)
+        self.assertTrue(merged_config is user_config)
+        self.assertEqual(
+            merged_config,
+            {
+                'a': 1,
+                'b': {
+                    'c': 'c',
+                    'd': 3,
+                }
+            })
+
+    def test_defaults_template_rendered_again(self):
+        """Verify rendering a configuration again leaves it unchanged."""
+        template = utils.DefaultsTemplate({'a': 1, 'b': {'c': 2}})
+        user_config = template.apply({'b': {}})
+        self.assertEqual(template.apply(user_config), {'a': 1, 'b': {'c': 2}})
+        self.assertEqual(template.apply({}), {'a': 1, 'b': {'c': 2}})
 
 
 class CoreTest(unittest.TestCase):
@@ -392,3 +532,28 @@ class CoreTest(unittest.TestCase):
         self.assertEqual(utils.get_valid_signals(signals_list, known_signals),
             expected_signals)
 
+    def test_setup_signal_python_target(self):
+        """Verify Python: targets are located when they're first called."""
+        signal_config = {
+            "signal_name": "aaa",
+            "target": "Python:os.path.join",
+        }
+        signal_name, target_func = utils.setup_signal(signal_config, {})
+        self.assertEqual(signal_name, "aaa")
+        self.assertEqual(target_func('a', 'b'), os.path.join('a', 'b'))
+
+    def test_python_signal_modules(self):
+        signals_list = [
+            "enables:element",
+            {
+                "signal_name": "aaa",
+                "target": "Element:some_target.set_enabled",
+            },
+            {
+                "signal_name": "bbb",
+                "target": "Python:package.module.function",
+            },
+        ]
+        self.assertEqual(utils.python_signal_modules(signals_list),
+            ['package.module'])
+
@@ -779,3 +779,58 @@ class TestCSVValidation(unittest.TestCase):
         }]
 
         validation.check_csv(filename, restrictions=restrictions)
+
+    def test_table_csv(self):
+        """Validation (table): verify a CSV table is checked as a CSV."""
+        from palisades import validation
+
+        filename = os.path.join(self.workspace_dir, 'test.csv')
+        TestCSVValidation.create_sample_csv(filename)
+
+        validation.check_table(filename, fieldsExist=['foo', 'bar', 'baz'],
+                               mustExist=True, permissions='r')
+        with self.assertRaises(validation.ValidationError):
+            validation.check_table(filename, fieldsExist=['missing'])
+
+    def test_table_missing(self):
+        """Validation (table): verify missing CSV and DBF tables fail."""
+        from palisades import validation
+
+        for extension in ['csv', 'dbf']:
+            filename = os.path.join(self.workspace_dir,
+                                    'missing.%s' % extension)
+            with self.assertRaises(validation.ValidationError):
+                validation.check_table(filename, mustExist=True)
+
+    def test_table_validator_options(self):
+        """Validation (table): verify file options aren't passed to the CSV
+        check."""
+        from palisades import validation
+
+        filename = os.path.join(self.workspace_dir, 'test.csv')
+        TestCSVValidation.create_sample_csv(filename)
+
+        validator = validation.Validator('table')
+        results = []
+
+        def _record_result(result):
+            results.append(result)
+        validator.finished.register(_record_result)
+        validator.validate(filename, {'type': 'table', 'mustExist': True,
+                                      'permissions': 'r'}, join=True)
+        validator.validate(os.path.join(self.workspace_dir, 'missing.csv'),
+                           {'type': 'table', 'mustExist': True}, join=True)
+        self.assertEqual(results[0], (None, validation.V_PASS))
+        self.assertEqual(results[1][1], validation.V_FAIL)
+
+    def test_table_dbf(self):
+        """Validation (table): verify a DBF table is checked with OGR."""
+        from palisades import validation
+
+        filename = os.path.join(VALIDATION_DATA, 'harv_samp_cur.dbf')
+        with mock.patch('palisades.validation.check_vector') as check_vector:
+            validation.check_table(filename, fieldsExist=['foo'],
+                                   mustExist=True, permissions='r')
+        check_vector.assert_called_once_with(
+            filename, mustExist=True, permissions='r', fieldsExist=['foo'],
+            restrictions=None)